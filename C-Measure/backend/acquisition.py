@@ -0,0 +1,202 @@
+import builtins
+import functools
+import itertools
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from frame_ring import FrameRingReader, FrameRingWriter
+
+logger = logging.getLogger('CMeasure.Acquisition')
+
+# Names read as plain values over the control pipe; every other name is a method call.
+VALUE_ATTRIBUTES = frozenset([
+    "connected",
+    "simulate",
+    "sample_rate",
+    "data_interval_ms",
+    "calibration",
+    "recent_cycles",
+    "frame_seq",
+    "heights",
+    "cycles.config",
+    "filters.active",
+    "stats.reset_at",
+    "diagnostics.config",
+    "diagnostics.runs",
+    "diagnostics.results",
+    "triggers.active",
+    "storage.calibration_missing",
+    "storage.calibration_timestamp",
+])
+REMOTE_OBJECTS = ("cycles", "filters", "stats", "diagnostics", "triggers", "live")
+# Calls that block until something changes or for a requested time; each gets its own thread instead of a pool worker.
+WAITING_CALLS = frozenset(["wait_status", "profile"])
+CALL_TIMEOUT = 60.0
+READY_TIMEOUT = 30.0
+
+
+def _resolve(target, path):
+    for name in path.split("."):
+        target = getattr(target, name)
+    return target
+
+
+def run_acquisition(conn, data_dir, ring_path, num_ports, num_channels, simulate):
+    """Entry point of the acquisition process: owns PhidgetService and publishes its frames."""
+    logging.basicConfig(level=logging.WARNING)
+    from phidget_service import PhidgetService
+    from storage import Storage
+
+    service = PhidgetService(Storage(data_dir), num_ports=num_ports, num_channels=num_channels, simulate=simulate)
+    ring = FrameRingWriter(ring_path, service.num_ids, service.history.capacity)
+    service.add_frame_listener(ring.append)
+    send_lock = threading.Lock()
+    # Control calls such as averaging block for seconds; run them off the receive loop.
+    pool = ThreadPoolExecutor(max_workers=4)
+
+    def handle(request_id, path, call, args, kwargs):
+        try:
+            target = _resolve(service, path)
+            reply = (request_id, True, target(*args, **kwargs) if call else target)
+        except Exception as e:
+            reply = (request_id, False, (type(e).__name__, str(e)))
+        with send_lock:
+            conn.send(reply)
+
+    conn.send((0, True, service.num_ids))
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        if message[1] in WAITING_CALLS:
+            threading.Thread(target=handle, args=message, daemon=True).start()
+        else:
+            pool.submit(handle, *message)
+    service.disconnect()
+    pool.shutdown(wait=False)
+    ring.close()
+
+
+class _RemoteObject:
+    def __init__(self, client, prefix):
+        self._client = client
+        self._prefix = prefix
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        path = f"{self._prefix}.{name}"
+        if path in VALUE_ATTRIBUTES:
+            return self._client.call(path, call=False)
+        return functools.partial(self._client.call, path)
+
+
+class AcquisitionClient:
+    """Stands in for PhidgetService when acquisition runs in its own process.
+
+    Frames are read straight from the shared frame ring (history.latest() and
+    history.snapshot() never cross the pipe); everything else is forwarded as
+    a call on the service in the acquisition process.
+    """
+
+    def __init__(self, storage, ring_path, num_ports=6, num_channels=2, simulate=None):
+        self.storage = storage
+        self.ring_path = str(ring_path)
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._conn, child = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(
+            target=run_acquisition,
+            args=(child, str(storage.data_dir), self.ring_path, num_ports, num_channels, simulate),
+            name="cmeasure-acquisition",
+            daemon=True,
+        )
+        self._process.start()
+        child.close()
+        if not self._conn.poll(READY_TIMEOUT):
+            self._process.terminate()
+            raise RuntimeError("Acquisition process did not start")
+        _, _, self.num_ids = self._conn.recv()
+        self.history = FrameRingReader(self.ring_path)
+        for name in REMOTE_OBJECTS:
+            setattr(self, name, _RemoteObject(self, name))
+        self._receiver = threading.Thread(target=self._receive, name="acquisition-replies", daemon=True)
+        self._receiver.start()
+        logger.info(f"Acquisition process {self._process.pid} started, frames in {self.ring_path}")
+
+    @property
+    def pid(self):
+        return self._process.pid
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if name in VALUE_ATTRIBUTES:
+            return self.call(name, call=False)
+        return functools.partial(self.call, name)
+
+    def call(self, path, *args, call=True, **kwargs):
+        request_id = next(self._ids)
+        waiter = [threading.Event(), None]
+        with self._pending_lock:
+            self._pending[request_id] = waiter
+        try:
+            with self._send_lock:
+                self._conn.send((request_id, path, call, args, kwargs))
+            if not waiter[0].wait(CALL_TIMEOUT):
+                raise RuntimeError(f"Acquisition process did not answer {path}")
+        finally:
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
+        ok, result = waiter[1]
+        if ok:
+            return result
+        name, message = result
+        error = getattr(builtins, name, None)
+        if not (isinstance(error, type) and issubclass(error, Exception)):
+            error = RuntimeError
+        raise error(message)
+
+    def _receive(self):
+        while True:
+            try:
+                request_id, ok, result = self._conn.recv()
+            except (EOFError, OSError):
+                break
+            with self._pending_lock:
+                waiter = self._pending.get(request_id)
+            if waiter is not None:
+                waiter[1] = (ok, result)
+                waiter[0].set()
+        logger.error("Acquisition process exited")
+        with self._pending_lock:
+            for waiter in self._pending.values():
+                waiter[1] = (False, ("RuntimeError", "Acquisition process exited"))
+                waiter[0].set()
+
+    def update_calibration(self, rows, serial=None):
+        self.call("update_calibration", rows, serial=serial)
+        self.sync_calibration_state()
+
+    def sync_calibration_state(self):
+        """Copy the calibration state into the local Storage, which never reads the calibration file itself."""
+        self.storage.calibration_missing = self.call("storage.calibration_missing", call=False)
+        self.storage.calibration_timestamp = self.call("storage.calibration_timestamp", call=False)
+
+    def close(self):
+        try:
+            with self._send_lock:
+                self._conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self._process.join(timeout=2.0)
+        if self._process.is_alive():
+            self._process.terminate()
+        self.history.close()
@@ -0,0 +1,158 @@
+import logging
+import math
+from array import array
+
+logger = logging.getLogger('CMeasure.Cycles')
+
+DEFAULT_CYCLE_CONFIG = {
+    "enabled": False,
+    "startThreshold": 20.0,
+    "endThreshold": 10.0,
+    "plateauSlope": 2.0,
+    "plateauMinSeconds": 2.0,
+    "slopeSmoothing": 0.3,
+    "minCycleSeconds": 1.0,
+}
+
+IDLE = "idle"
+LOADING = "loading"
+PLATEAU = "plateau"
+RELEASING = "releasing"
+
+
+def normalize_cycle_config(config):
+    merged = dict(DEFAULT_CYCLE_CONFIG)
+    for key, value in (config or {}).items():
+        if key not in DEFAULT_CYCLE_CONFIG:
+            continue
+        if key == "enabled":
+            merged[key] = bool(value)
+        else:
+            merged[key] = float(value)
+    if merged["endThreshold"] > merged["startThreshold"]:
+        raise ValueError("endThreshold must not exceed startThreshold")
+    merged["slopeSmoothing"] = min(max(merged["slopeSmoothing"], 0.01), 1.0)
+    return merged
+
+
+class CycleDetector:
+    """Incremental load-up / hold / release segmentation of the total force.
+
+    Each frame updates a smoothed slope and, during the plateau, per-cell
+    running sums, so the work per frame does not depend on cycle length.
+    """
+
+    def __init__(self, count, config=None, on_cycle=None):
+        self.count = count
+        self.config = normalize_cycle_config(config)
+        self.on_cycle = on_cycle
+        self.cycles_detected = 0
+        self._sums = array("d", [0.0] * count)
+        self.reset()
+
+    def reset(self):
+        self.state = IDLE
+        self._prev_time = None
+        self._prev_total = 0.0
+        self._slope = 0.0
+        self._start_time = None
+        self._start_seq = None
+        self._peak = 0.0
+        self._candidate_start = None
+        self._plateau_start = None
+        self._plateau_end = None
+        self._plateau_frames = 0
+        self._clear_sums()
+
+    def _clear_sums(self):
+        for idx in range(self.count):
+            self._sums[idx] = 0.0
+        self._plateau_frames = 0
+
+    def _accumulate(self, values):
+        sums = self._sums
+        for idx in range(self.count):
+            sums[idx] += values[idx]
+        self._plateau_frames += 1
+
+    def status(self):
+        return {
+            "state": self.state,
+            "slope": self._slope,
+            "cyclesDetected": self.cycles_detected,
+            "startTime": self._start_time,
+            "plateauStart": self._plateau_start,
+        }
+
+    def update(self, seq, timestamp, values):
+        cfg = self.config
+        total = math.fsum(values[:self.count])
+        if self._prev_time is not None and timestamp > self._prev_time:
+            rate = (total - self._prev_total) / (timestamp - self._prev_time)
+            self._slope += cfg["slopeSmoothing"] * (rate - self._slope)
+        self._prev_time = timestamp
+        self._prev_total = total
+        flat = abs(self._slope) <= cfg["plateauSlope"]
+
+        if self.state == IDLE:
+            if total >= cfg["startThreshold"]:
+                self.state = LOADING
+                self._start_time = timestamp
+                self._start_seq = seq
+                self._peak = total
+            return None
+
+        self._peak = max(self._peak, total)
+        if self.state == LOADING:
+            if total < cfg["endThreshold"]:
+                self.reset()
+                return None
+            if not flat:
+                self._candidate_start = None
+                self._clear_sums()
+                return None
+            if self._candidate_start is None:
+                self._candidate_start = timestamp
+            self._accumulate(values)
+            if timestamp - self._candidate_start >= cfg["plateauMinSeconds"]:
+                self.state = PLATEAU
+                self._plateau_start = self._candidate_start
+            return None
+
+        if self.state == PLATEAU:
+            if flat and total >= cfg["endThreshold"]:
+                self._accumulate(values)
+                return None
+            self.state = RELEASING
+            self._plateau_end = timestamp
+
+        if self.state == RELEASING and total < cfg["endThreshold"]:
+            return self._finish(seq, timestamp)
+        return None
+
+    def _finish(self, seq, timestamp):
+        cfg = self.config
+        frames = max(self._plateau_frames, 1)
+        cycle = {
+            "startTime": self._start_time,
+            "plateauStart": self._plateau_start,
+            "plateauEnd": self._plateau_end,
+            "endTime": timestamp,
+            "startSeq": self._start_seq,
+            "endSeq": seq,
+            "plateauFrames": self._plateau_frames,
+            "plateauAverages": [value / frames for value in self._sums],
+            "peakTotal": self._peak,
+        }
+        cycle["plateauTotal"] = math.fsum(cycle["plateauAverages"])
+        self.reset()
+        if timestamp - cycle["startTime"] < cfg["minCycleSeconds"]:
+            return None
+        self.cycles_detected += 1
+        cycle["index"] = self.cycles_detected
+        if self.on_cycle is not None:
+            try:
+                self.on_cycle(cycle)
+            except Exception as e:
+                logger.error(f"Cycle handler failed: {e}")
+        return cycle
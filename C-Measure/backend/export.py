@@ -0,0 +1,326 @@
+"""Streaming export of recorded measurements and sessions.
+
+Every exporter is a generator of byte chunks, one chunk per batch of rows,
+so an export of any size is never held in memory at once. Supported
+formats:
+
+    csv      text/csv, header row then one row per frame / load cell
+    ndjson   one JSON object per row
+    arrow    Apache Arrow IPC stream (schema message, one record batch per
+             chunk, end-of-stream marker), readable by pyarrow / pandas /
+             polars without conversion
+
+The Arrow metadata (FlatBuffers) is written by hand below since pyarrow is
+not available for the 32-bit build; only the types used here are supported.
+"""
+import csv
+import io
+import json
+import struct
+import sys
+from array import array
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", ".csv"),
+    "ndjson": ("application/x-ndjson", ".ndjson"),
+    "arrow": ("application/vnd.apache.arrow.stream", ".arrows"),
+}
+BATCH_FRAMES = 8192
+MEASUREMENT_COLUMNS = ["LoadCell", "MeasuredValue", "UnfilteredValue", "Peak", "Valley", "Mean", "StdDev"]
+
+
+def session_schema(cells):
+    return [("time", "float64")] + [(f"cell{cell}", "float32") for cell in cells]
+
+
+def session_batches(reader, cells, start_time=None, end_time=None, batch_frames=BATCH_FRAMES):
+    """Column batches [times, cell values...] of a session, read `batch_frames` frames at a time."""
+    try:
+        start = 0 if start_time is None else reader.index_at(start_time)
+        stop = reader.frames if end_time is None else reader.index_at(end_time, right=True)
+        for index in range(start, stop, batch_frames):
+            times, series = reader.read(index, min(index + batch_frames, stop), cells=cells)
+            if times:
+                yield [times] + [series[cell] for cell in cells]
+    finally:
+        reader.close()
+
+
+def measurement_schema():
+    return [("File", "utf8"), ("LoadCell", "int32")] + [(name, "float64") for name in MEASUREMENT_COLUMNS[1:]]
+
+
+def measurement_batches(paths):
+    """One column batch per measurement CSV; empty or missing values become None."""
+    for path in paths:
+        columns = [[] for _ in range(len(MEASUREMENT_COLUMNS) + 1)]
+        with path.open("r", newline="") as handle:
+            for row in csv.DictReader(handle):
+                try:
+                    cell = int(row.get("LoadCell", ""))
+                except ValueError:
+                    continue
+                columns[0].append(path.name)
+                columns[1].append(cell)
+                for offset, name in enumerate(MEASUREMENT_COLUMNS[1:], 2):
+                    try:
+                        columns[offset].append(float(row.get(name) or ""))
+                    except ValueError:
+                        columns[offset].append(None)
+        if columns[0]:
+            yield columns
+
+
+def _format_value(kind, value):
+    if value is None:
+        return None
+    if kind == "float32":
+        # Nine significant digits round-trip a float32 exactly.
+        return float(f"{value:.9g}")
+    return value
+
+
+def csv_chunks(schema, batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow([name for name, _ in schema])
+    kinds = [kind for _, kind in schema]
+    for columns in batches:
+        for row in zip(*columns):
+            writer.writerow(["" if value is None else _format_value(kind, value) for kind, value in zip(kinds, row)])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def ndjson_chunks(schema, batches):
+    names = [name for name, _ in schema]
+    kinds = [kind for _, kind in schema]
+    encoder = json.JSONEncoder(separators=(",", ":"))
+    for columns in batches:
+        lines = []
+        for row in zip(*columns):
+            item = {name: _format_value(kind, value) for name, kind, value in zip(names, kinds, row)}
+            lines.append(encoder.encode(item))
+        lines.append("")
+        yield "\n".join(lines).encode("utf-8")
+
+
+# --- Arrow IPC stream -----------------------------------------------------
+
+_CONTINUATION = b"\xff\xff\xff\xff"
+_METADATA_V5 = 4
+_HEADER_SCHEMA = 1
+_HEADER_RECORD_BATCH = 3
+_TYPE_INT = 2
+_TYPE_FLOATING_POINT = 3
+_TYPE_UTF8 = 5
+_PRECISION = {"float32": 1, "float64": 2}
+_ARRAY_CODES = {"int32": "i", "float32": "f", "float64": "d"}
+
+
+class _Table:
+    """FlatBuffers table: fields[slot] is None, (struct format, value) or ("offset", child)."""
+
+    def __init__(self, *fields):
+        self.fields = fields
+
+
+class _Vector:
+    def __init__(self, items):
+        self.items = items
+
+
+class _StructVector:
+    def __init__(self, fmt, items):
+        self.record = struct.Struct(fmt)
+        self.items = items
+
+
+class _FlatBuilder:
+    """Front-to-back FlatBuffers writer: children are written after their parent,
+    so every uoffset points forward as the format requires."""
+
+    def __init__(self):
+        self.buf = bytearray(4)
+
+    def _pad(self, align):
+        self.buf += bytes(-len(self.buf) % align)
+
+    def finish(self, root):
+        struct.pack_into("<I", self.buf, 0, self._write(root))
+        self._pad(8)
+        return bytes(self.buf)
+
+    def _write(self, obj):
+        if isinstance(obj, _Table):
+            return self._write_table(obj)
+        if isinstance(obj, _StructVector):
+            # Elements are 8-byte aligned; the length prefix sits just before them.
+            self.buf += bytes(-(len(self.buf) + 4) % 8)
+            pos = len(self.buf)
+            self.buf += struct.pack("<I", len(obj.items))
+            for item in obj.items:
+                self.buf += obj.record.pack(*item)
+            return pos
+        if isinstance(obj, _Vector):
+            self._pad(4)
+            pos = len(self.buf)
+            self.buf += struct.pack("<I", len(obj.items))
+            slots = []
+            for _ in obj.items:
+                slots.append(len(self.buf))
+                self.buf += bytes(4)
+            for slot, item in zip(slots, obj.items):
+                struct.pack_into("<I", self.buf, slot, self._write(item) - slot)
+            return pos
+        data = obj.encode("utf-8")
+        self._pad(4)
+        pos = len(self.buf)
+        self.buf += struct.pack("<I", len(data)) + data + b"\0"
+        return pos
+
+    def _write_table(self, table):
+        count = len(table.fields)
+        self._pad(2)
+        vtable = len(self.buf)
+        self.buf += bytes(4 + 2 * count)
+        present = []
+        for slot, field in enumerate(table.fields):
+            if field is None:
+                continue
+            size = 4 if field[0] == "offset" else struct.calcsize("<" + field[0])
+            present.append((size, slot, field))
+        # Largest fields first keeps the inline part compact and aligned.
+        present.sort(key=lambda item: -item[0])
+        self._pad(max([4] + [size for size, _, _ in present]))
+        start = len(self.buf)
+        self.buf += bytes(4)
+        offsets = [0] * count
+        children = []
+        for size, slot, field in present:
+            self._pad(size)
+            offsets[slot] = len(self.buf) - start
+            if field[0] == "offset":
+                children.append((len(self.buf), field[1]))
+                self.buf += bytes(4)
+            else:
+                self.buf += struct.pack("<" + field[0], field[1])
+        struct.pack_into(f"<HH{count}H", self.buf, vtable, 4 + 2 * count, len(self.buf) - start, *offsets)
+        struct.pack_into("<i", self.buf, start, start - vtable)
+        for slot, child in children:
+            struct.pack_into("<I", self.buf, slot, self._write(child) - slot)
+        return start
+
+
+def _arrow_type(kind):
+    if kind == "utf8":
+        return _TYPE_UTF8, _Table()
+    if kind == "int32":
+        return _TYPE_INT, _Table(("i", 32), ("?", True))
+    return _TYPE_FLOATING_POINT, _Table(("h", _PRECISION[kind]))
+
+
+def _arrow_message(header_type, header, body_length):
+    message = _Table(("h", _METADATA_V5), ("B", header_type), ("offset", header), ("q", body_length))
+    metadata = _FlatBuilder().finish(message)
+    return _CONTINUATION + struct.pack("<i", len(metadata)) + metadata
+
+
+def _arrow_schema_message(schema):
+    fields = []
+    for name, kind in schema:
+        type_id, type_table = _arrow_type(kind)
+        fields.append(_Table(
+            ("offset", name),
+            ("?", True),
+            ("B", type_id),
+            ("offset", type_table),
+            None,
+            ("offset", _Vector([])),
+        ))
+    return _arrow_message(_HEADER_SCHEMA, _Table(("h", 0), ("offset", _Vector(fields))), 0)
+
+
+def _validity(values):
+    nulls = 0
+    bitmap = bytearray((len(values) + 7) // 8)
+    for idx, value in enumerate(values):
+        if value is None:
+            nulls += 1
+        else:
+            bitmap[idx >> 3] |= 1 << (idx & 7)
+    return (bytes(bitmap), nulls) if nulls else (b"", 0)
+
+
+def _arrow_buffers(kind, values):
+    bitmap, nulls = _validity(values)
+    if kind == "utf8":
+        offsets = array("i", [0])
+        data = bytearray()
+        for value in values:
+            if value is not None:
+                data += value.encode("utf-8")
+            offsets.append(len(data))
+        buffers = [bitmap, offsets, bytes(data)]
+    else:
+        if nulls:
+            values = [0 if value is None else value for value in values]
+        data = values if isinstance(values, array) and values.typecode == _ARRAY_CODES[kind] else None
+        if data is None:
+            data = array(_ARRAY_CODES[kind], values)
+        buffers = [bitmap, data]
+    if sys.byteorder != "little":
+        buffers = [_swapped(buffer) for buffer in buffers]
+    return nulls, buffers
+
+
+def _swapped(buffer):
+    if not isinstance(buffer, array):
+        return buffer
+    swapped = array(buffer.typecode, buffer)
+    swapped.byteswap()
+    return swapped
+
+
+def _arrow_record_batch(schema, columns):
+    length = len(columns[0])
+    nodes = []
+    buffers = []
+    body = []
+    offset = 0
+    for (_, kind), values in zip(schema, columns):
+        nulls, parts = _arrow_buffers(kind, values)
+        nodes.append((length, nulls))
+        for part in parts:
+            size = len(part) * (part.itemsize if isinstance(part, array) else 1)
+            padding = -size % 8
+            buffers.append((offset, size))
+            body.append(part)
+            if padding:
+                body.append(bytes(padding))
+            offset += size + padding
+    header = _Table(("q", length), ("offset", _StructVector("<qq", nodes)), ("offset", _StructVector("<qq", buffers)))
+    return [_arrow_message(_HEADER_RECORD_BATCH, header, offset)] + body
+
+
+def arrow_chunks(schema, batches):
+    yield _arrow_schema_message(schema)
+    for columns in batches:
+        yield b"".join(part if not isinstance(part, array) else part.tobytes() for part in _arrow_record_batch(schema, columns))
+    yield _CONTINUATION + b"\0\0\0\0"
+
+
+FORMAT_WRITERS = {
+    "csv": csv_chunks,
+    "ndjson": ndjson_chunks,
+    "arrow": arrow_chunks,
+}
+
+
+def export_chunks(fmt, schema, batches):
+    if fmt not in FORMAT_WRITERS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    return FORMAT_WRITERS[fmt](schema, batches)
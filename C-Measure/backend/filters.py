@@ -0,0 +1,327 @@
+import logging
+import math
+from array import array
+
+logger = logging.getLogger('CMeasure.Filters')
+
+DEFAULT_BATCH_SIZE = 16
+# Longest a completed frame waits for its batch to be filtered.
+DEFAULT_MAX_DELAY = 0.1
+
+
+class _Stage:
+    """Base for a filter stage; state for all channels lives in flat arrays."""
+
+    kind = None
+
+    def __init__(self, count, config):
+        self.count = count
+        channels = config.get("channels")
+        if channels is None:
+            self.channels = None
+        else:
+            self.channels = set(int(ch) for ch in channels if 0 <= int(ch) < count)
+        self.config = dict(config)
+
+    def applies(self, idx):
+        return self.channels is None or idx in self.channels
+
+    def process(self, idx, values):
+        raise NotImplementedError
+
+    def kept(self, idx, count):
+        """Indices of the next `count` inputs that process() will emit, or None when it emits one per input."""
+        return None
+
+    def reset(self):
+        raise NotImplementedError
+
+
+class MovingAverageStage(_Stage):
+    kind = "movingAverage"
+
+    def __init__(self, count, config):
+        super().__init__(count, config)
+        self.window = max(int(config.get("window", 8)), 1)
+        self.reset()
+
+    def reset(self):
+        self._buf = array("d", bytes(8 * self.count * self.window))
+        self._pos = array("l", [0] * self.count)
+        self._filled = array("l", [0] * self.count)
+        self._sum = array("d", [0.0] * self.count)
+
+    def process(self, idx, values):
+        window = self.window
+        buf = self._buf
+        base = idx * window
+        pos = self._pos[idx]
+        filled = self._filled[idx]
+        total = self._sum[idx]
+        out = []
+        for value in values:
+            slot = base + pos
+            if filled == window:
+                total -= buf[slot]
+            else:
+                filled += 1
+            buf[slot] = value
+            total += value
+            pos += 1
+            if pos == window:
+                pos = 0
+                # Recompute once per wrap so rounding error cannot accumulate.
+                total = math.fsum(buf[base:base + filled])
+            out.append(total / filled)
+        self._pos[idx] = pos
+        self._filled[idx] = filled
+        self._sum[idx] = total
+        return out
+
+
+class MedianStage(_Stage):
+    kind = "median"
+
+    def __init__(self, count, config):
+        super().__init__(count, config)
+        self.window = max(int(config.get("window", 5)), 1)
+        self.reset()
+
+    def reset(self):
+        self._buf = array("d", bytes(8 * self.count * self.window))
+        self._pos = array("l", [0] * self.count)
+        self._filled = array("l", [0] * self.count)
+
+    def process(self, idx, values):
+        window = self.window
+        buf = self._buf
+        base = idx * window
+        pos = self._pos[idx]
+        filled = self._filled[idx]
+        out = []
+        for value in values:
+            buf[base + pos] = value
+            pos = (pos + 1) % window
+            if filled < window:
+                filled += 1
+            ordered = sorted(buf[base:base + filled])
+            mid = filled // 2
+            if filled % 2:
+                out.append(ordered[mid])
+            else:
+                out.append((ordered[mid - 1] + ordered[mid]) / 2.0)
+        self._pos[idx] = pos
+        self._filled[idx] = filled
+        return out
+
+
+class IirStage(_Stage):
+    """Single-pole low-pass: y += alpha * (x - y)."""
+
+    kind = "iir"
+
+    def __init__(self, count, config, sample_rate):
+        super().__init__(count, config)
+        alpha = config.get("alpha")
+        cutoff = config.get("cutoffHz")
+        if alpha is None and cutoff is not None and sample_rate > 0:
+            alpha = 1.0 - math.exp(-2.0 * math.pi * float(cutoff) / sample_rate)
+        self.alpha = min(max(float(alpha if alpha is not None else 0.2), 0.0), 1.0)
+        self.reset()
+
+    def reset(self):
+        self._state = array("d", [0.0] * self.count)
+        self._primed = array("b", [0] * self.count)
+
+    def process(self, idx, values):
+        alpha = self.alpha
+        y = self._state[idx]
+        primed = self._primed[idx]
+        out = []
+        for value in values:
+            if not primed:
+                y = value
+                primed = 1
+            else:
+                y += alpha * (value - y)
+            out.append(y)
+        self._state[idx] = y
+        self._primed[idx] = primed
+        return out
+
+
+class NotchStage(_Stage):
+    """Biquad notch (RBJ cookbook) for mains pickup."""
+
+    kind = "notch"
+
+    def __init__(self, count, config, sample_rate):
+        super().__init__(count, config)
+        self.frequency = float(config.get("frequency", 50.0))
+        self.q = max(float(config.get("q", 30.0)), 0.1)
+        if not (sample_rate > 0 and 0 < self.frequency < sample_rate / 2.0):
+            raise ValueError(
+                f"Notch at {self.frequency:g} Hz needs a sample rate above {2 * self.frequency:g} Hz "
+                f"(data interval gives {sample_rate:.3f} Hz)"
+            )
+        w0 = 2.0 * math.pi * self.frequency / sample_rate
+        cos_w0 = math.cos(w0)
+        alpha = math.sin(w0) / (2.0 * self.q)
+        a0 = 1.0 + alpha
+        self._coeffs = (
+            1.0 / a0,
+            -2.0 * cos_w0 / a0,
+            1.0 / a0,
+            -2.0 * cos_w0 / a0,
+            (1.0 - alpha) / a0,
+        )
+        self.reset()
+
+    def reset(self):
+        # x1, x2, y1, y2 per channel
+        self._state = array("d", [0.0] * (self.count * 4))
+        self._primed = array("b", [0] * self.count)
+
+    def process(self, idx, values):
+        b0, b1, b2, a1, a2 = self._coeffs
+        state = self._state
+        base = idx * 4
+        x1, x2, y1, y2 = state[base], state[base + 1], state[base + 2], state[base + 3]
+        primed = self._primed[idx]
+        out = []
+        for value in values:
+            if not primed:
+                # Start from steady state so the first samples do not ring.
+                x1 = x2 = y1 = y2 = value
+                primed = 1
+            y = b0 * value + b1 * x1 + b2 * x2 - a1 * y1 - a2 * y2
+            x2, x1 = x1, value
+            y2, y1 = y1, y
+            out.append(y)
+        state[base], state[base + 1], state[base + 2], state[base + 3] = x1, x2, y1, y2
+        self._primed[idx] = primed
+        return out
+
+
+class DecimateStage(_Stage):
+    """Keeps every Nth sample; place a low-pass stage in front of it.
+
+    On all channels it also lowers the frame rate (see FilterChain.frame_factor);
+    limited to some channels it holds their value between kept samples.
+    """
+
+    kind = "decimate"
+
+    def __init__(self, count, config):
+        super().__init__(count, config)
+        self.factor = max(int(config.get("factor", 2)), 1)
+        self.reset()
+
+    def reset(self):
+        self._phase = array("l", [0] * self.count)
+
+    def kept(self, idx, count):
+        phase = self._phase[idx]
+        return [i for i in range(count) if (phase + i + 1) % self.factor == 0]
+
+    def process(self, idx, values):
+        factor = self.factor
+        phase = self._phase[idx]
+        out = []
+        for value in values:
+            phase += 1
+            if phase >= factor:
+                phase = 0
+                out.append(value)
+        self._phase[idx] = phase
+        return out
+
+
+def _build_stage(config, count, sample_rate):
+    kind = config.get("type")
+    if kind == MovingAverageStage.kind:
+        return MovingAverageStage(count, config)
+    if kind == MedianStage.kind:
+        return MedianStage(count, config)
+    if kind == IirStage.kind:
+        return IirStage(count, config, sample_rate)
+    if kind == NotchStage.kind:
+        return NotchStage(count, config, sample_rate)
+    if kind == DecimateStage.kind:
+        return DecimateStage(count, config)
+    raise ValueError(f"Unknown filter type: {kind}")
+
+
+class FilterChain:
+    """Ordered filter stages applied per channel to batches of raw samples."""
+
+    def __init__(self, count, stages=None, sample_rate=1.0, batch_size=DEFAULT_BATCH_SIZE, max_delay=DEFAULT_MAX_DELAY):
+        self.count = count
+        self.sample_rate = float(sample_rate)
+        self.batch_size = max(int(batch_size), 1)
+        self.max_delay = max(float(max_delay), 0.0)
+        self.stages = list(stages or [])
+
+    @classmethod
+    def from_config(cls, config, count, sample_rate=1.0, batch_size=DEFAULT_BATCH_SIZE):
+        stages = []
+        for item in config or []:
+            if not isinstance(item, dict):
+                raise ValueError("Filter stage must be an object")
+            stages.append(_build_stage(item, count, sample_rate))
+        return cls(count, stages, sample_rate=sample_rate, batch_size=batch_size)
+
+    @property
+    def active(self):
+        return bool(self.stages)
+
+    @property
+    def frame_factor(self):
+        """Only every Nth frame is kept: the product of the decimate stages that apply to all channels."""
+        factor = 1
+        for stage in self.stages:
+            if isinstance(stage, DecimateStage) and stage.channels is None:
+                factor *= stage.factor
+        return factor
+
+    def describe(self):
+        return [dict(stage.config) for stage in self.stages]
+
+    def process(self, idx, values):
+        for stage in self.stages:
+            if not values:
+                break
+            if stage.applies(idx):
+                values = stage.process(idx, values)
+        return values
+
+    def process_held(self, idx, values, last):
+        """Like process(), but with one output per input: the latest chain output as of that input.
+
+        Inputs before the first output get `last`, the value held from the
+        previous batch, so each frame can take the filtered value of its own
+        sample even when the frame was closed before the batch ran.
+        """
+        count = len(values)
+        positions = list(range(count))
+        for stage in self.stages:
+            if not values:
+                break
+            if stage.applies(idx):
+                kept = stage.kept(idx, len(values))
+                values = stage.process(idx, values)
+                if kept is not None:
+                    positions = [positions[i] for i in kept]
+        held = []
+        outputs = iter(zip(positions, values))
+        position, value = next(outputs, (count, last))
+        for i in range(count):
+            while position <= i:
+                last = value
+                position, value = next(outputs, (count, last))
+            held.append(last)
+        return held
+
+    def reset(self):
+        for stage in self.stages:
+            stage.reset()
@@ -0,0 +1,180 @@
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+
+MAGIC = b"CMRING1\n"
+VERSION = 1
+HEADER_SIZE = 64
+# magic, version, cells, capacity, slot size, created (unique per writer), last seq
+HEADER = struct.Struct("<8sIIIIdQ")
+LAST_SEQ = struct.Struct("<Q")
+LAST_SEQ_OFFSET = 32
+SEQ = struct.Struct("<Q")
+
+
+def default_ring_path():
+    """Where the backend publishes live frames unless CMEASURE_LIVE_FRAMES or liveFramePath says otherwise."""
+    env_path = os.getenv("CMEASURE_LIVE_FRAMES")
+    if env_path:
+        return env_path
+    if sys.platform == "win32" and os.environ.get("APPDATA"):
+        return os.path.join(os.environ["APPDATA"], "C-Measure", "live", "frames.ring")
+    return os.path.join(tempfile.gettempdir(), "cmeasure-live", "frames.ring")
+
+
+def slot_size(count):
+    # begin seq, timestamp, values, end seq: a multiple of 8 so the slots can be viewed as doubles.
+    return 8 + 8 + 8 * count + 8
+
+
+class FrameRingWriter:
+    """Single-writer frame ring in a memory-mapped file.
+
+    Each slot carries its sequence number before and after the payload. The
+    writer stores begin seq, payload, end seq and finally the header's last
+    seq, so a reader that sees the same seq on both ends of a slot has read a
+    complete frame without taking any lock.
+    """
+
+    def __init__(self, path, count, capacity):
+        self.path = str(path)
+        self.count = count
+        self.capacity = max(int(capacity), 1)
+        self.slot_size = slot_size(count)
+        self._payload = struct.Struct(f"<d{count}d")
+        size = HEADER_SIZE + self.capacity * self.slot_size
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+        try:
+            if os.fstat(fd).st_size != size:
+                os.ftruncate(fd, size)
+            self._mm = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        self._lock = threading.Lock()
+        self.last_seq = 0
+        HEADER.pack_into(self._mm, 0, MAGIC, VERSION, count, self.capacity, self.slot_size, time.time(), 0)
+
+    def append(self, seq, timestamp, values):
+        mm = self._mm
+        offset = HEADER_SIZE + (seq % self.capacity) * self.slot_size
+        with self._lock:
+            SEQ.pack_into(mm, offset, seq)
+            self._payload.pack_into(mm, offset + 8, timestamp, *values[:self.count])
+            SEQ.pack_into(mm, offset + self.slot_size - 8, seq)
+            LAST_SEQ.pack_into(mm, LAST_SEQ_OFFSET, seq)
+            self.last_seq = seq
+
+    def close(self):
+        with self._lock:
+            if self._mm is not None:
+                self._mm.close()
+                self._mm = None
+
+
+class FrameRingReader:
+    """Read-only view of a FrameRingWriter file; safe to use from any process."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._mm = None
+        self.attach()
+
+    def attach(self):
+        with open(self.path, "rb") as handle:
+            mm = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, capacity, size, created, _ = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC or version != VERSION:
+            mm.close()
+            raise ValueError(f"{self.path} is not a frame ring")
+        if self._mm is not None:
+            self._mm.close()
+        self._mm = mm
+        self.count = count
+        self.capacity = capacity
+        self.slot_size = size
+        self.created = created
+        self._payload = struct.Struct(f"<d{count}d")
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def last_seq(self):
+        return LAST_SEQ.unpack_from(self._mm, LAST_SEQ_OFFSET)[0]
+
+    def restarted(self):
+        """True when a new writer has taken over the file since attach()."""
+        return HEADER.unpack_from(self._mm, 0)[5] != self.created
+
+    def read(self, seq):
+        """(timestamp, values) for `seq`, or None if it is not (or no longer) in the ring."""
+        if seq <= 0:
+            return None
+        mm = self._mm
+        offset = HEADER_SIZE + (seq % self.capacity) * self.slot_size
+        if SEQ.unpack_from(mm, offset + self.slot_size - 8)[0] != seq:
+            return None
+        payload = self._payload.unpack_from(mm, offset + 8)
+        if SEQ.unpack_from(mm, offset)[0] != seq:
+            return None
+        return payload[0], list(payload[1:])
+
+    def latest(self):
+        for _ in range(3):
+            seq = self.last_seq
+            if not seq:
+                return None
+            frame = self.read(seq)
+            if frame is not None:
+                return seq, frame[0], frame[1]
+        return None
+
+    def snapshot(self, start_time=None, end_time=None, cells=None):
+        """Same contract as FrameHistory.snapshot(), copied with strided slices.
+
+        The columns are copied one after the other without a lock, so the
+        writer keeps going meanwhile. last_seq is read again afterwards and
+        every slot the writer could have reached since (including the one it
+        may be writing now) is dropped, so no row pairs a timestamp with
+        values of a newer frame.
+        """
+        cells = [cell for cell in (range(self.count) if cells is None else cells) if 0 <= cell < self.count]
+        last = self.last_seq
+        first = max(last - self.capacity + 1, 1)
+        if last < first:
+            return array("d"), {cell: array("d") for cell in cells}
+        stride = self.slot_size // 8
+        doubles = memoryview(self._mm)[HEADER_SIZE:HEADER_SIZE + self.capacity * self.slot_size].cast("d")
+        p0 = first % self.capacity
+        p1 = last % self.capacity + 1
+        spans = [(p0, p1)] if p0 < p1 else [(p0, self.capacity), (0, p1)]
+
+        def column(offset):
+            out = array("d")
+            for a, b in spans:
+                out.fromlist(doubles[a * stride + offset:b * stride:stride].tolist())
+            return out
+
+        times = column(1)
+        columns = {cell: column(2 + cell) for cell in cells}
+        doubles.release()
+        # Slots up to (last_seq now) - capacity + 1 may hold a newer frame, or half of one, by now.
+        skip = min(max(self.last_seq - self.capacity + 2 - first, 0), len(times))
+        lo = skip if start_time is None else bisect_left(times, start_time, skip)
+        hi = len(times) if end_time is None else bisect_right(times, end_time, lo)
+        return times[lo:hi], {cell: values[lo:hi] for cell, values in columns.items()}
@@ -0,0 +1,240 @@
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+
+DEFAULT_HISTORY_FRAMES = 65536
+MAX_PLOT_WIDTH = 4000
+
+
+class FrameHistory:
+    """Fixed-capacity ring of frames (timestamp + one value per cell)."""
+
+    def __init__(self, count, capacity=DEFAULT_HISTORY_FRAMES):
+        self.count = count
+        self.capacity = max(int(capacity), 1)
+        self._times = array("d", bytes(8 * self.capacity))
+        self._values = array("d", bytes(8 * self.capacity * count))
+        self._head = 0
+        self._size = 0
+        self._last_seq = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def last_seq(self):
+        return self._last_seq
+
+    def append(self, seq, timestamp, values):
+        count = self.count
+        with self._lock:
+            head = self._head
+            self._times[head] = timestamp
+            base = head * count
+            self._values[base:base + count] = array("d", values)
+            self._head = (head + 1) % self.capacity
+            if self._size < self.capacity:
+                self._size += 1
+            self._last_seq = seq
+
+    def clear(self):
+        with self._lock:
+            self._head = 0
+            self._size = 0
+
+    def latest(self):
+        with self._lock:
+            if not self._size:
+                return None
+            pos = (self._head - 1) % self.capacity
+            base = pos * self.count
+            return self._last_seq, self._times[pos], list(self._values[base:base + self.count])
+
+    def _segments(self, start, stop):
+        """Physical [p0, p1) segments for logical indices [start, stop)."""
+        first = (self._head - self._size) % self.capacity
+        p0 = (first + start) % self.capacity
+        length = stop - start
+        if length <= 0:
+            return []
+        if p0 + length <= self.capacity:
+            return [(p0, p0 + length)]
+        return [(p0, self.capacity), (0, p0 + length - self.capacity)]
+
+    def snapshot(self, start_time=None, end_time=None, cells=None):
+        """Copy frames in [start_time, end_time] as (times, {cell: values})."""
+        cells = list(range(self.count)) if cells is None else list(cells)
+        count = self.count
+        with self._lock:
+            times = array("d")
+            for p0, p1 in self._segments(0, self._size):
+                times.extend(self._times[p0:p1])
+            lo = 0 if start_time is None else bisect_left(times, start_time)
+            hi = len(times) if end_time is None else bisect_right(times, end_time)
+            series = {}
+            for cell in cells:
+                values = array("d")
+                for p0, p1 in self._segments(lo, hi):
+                    values.extend(self._values[p0 * count + cell:p1 * count:count])
+                series[cell] = values
+        return times[lo:hi], series
+
+
+def minmax_decimate(times, values, start_time, end_time, width):
+    """Per-bucket min and max points in time order, at most 2 * width points."""
+    if not times or width <= 0 or end_time <= start_time:
+        return [], []
+    step = (end_time - start_time) / float(width)
+    bounds = [bisect_left(times, start_time + step * k) for k in range(width)]
+    bounds.append(bisect_right(times, end_time))
+    out_t = []
+    out_v = []
+    for k in range(width):
+        _bucket_extremes(times, values, bounds[k], bounds[k + 1], out_t, out_v)
+    return out_t, out_v
+
+
+def _bucket_extremes(times, values, lo, hi, out_t, out_v):
+    if hi <= lo:
+        return
+    segment = values[lo:hi]
+    low = min(segment)
+    high = max(segment)
+    i_low = lo + segment.index(low)
+    i_high = lo + segment.index(high)
+    if i_low == i_high:
+        out_t.append(times[i_low])
+        out_v.append(low)
+    elif i_low < i_high:
+        out_t.extend((times[i_low], times[i_high]))
+        out_v.extend((low, high))
+    else:
+        out_t.extend((times[i_high], times[i_low]))
+        out_v.extend((high, low))
+
+
+def lttb(times, values, threshold):
+    """Largest-Triangle-Three-Buckets downsampling to `threshold` points."""
+    n = len(times)
+    if threshold >= n or threshold < 3:
+        return list(times), list(values)
+    out_t = [times[0]]
+    out_v = [values[0]]
+    every = (n - 2) / float(threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, n)
+        avg_len = avg_end - avg_start
+        if avg_len > 0:
+            avg_t = sum(times[avg_start:avg_end]) / avg_len
+            avg_v = sum(values[avg_start:avg_end]) / avg_len
+        else:
+            avg_t, avg_v = times[n - 1], values[n - 1]
+        range_start = int(i * every) + 1
+        range_end = int((i + 1) * every) + 1
+        at, av = times[a], values[a]
+        best = -1.0
+        chosen = range_start
+        for j in range(range_start, range_end):
+            area = abs((at - avg_t) * (values[j] - av) - (at - times[j]) * (avg_v - av))
+            if area > best:
+                best = area
+                chosen = j
+        out_t.append(times[chosen])
+        out_v.append(values[chosen])
+        a = chosen
+    out_t.append(times[n - 1])
+    out_v.append(values[n - 1])
+    return out_t, out_v
+
+
+def downsample(times, values, start_time, end_time, width, method="minmax"):
+    """Bounded-size plot series; LTTB runs on a min/max pre-reduction."""
+    width = max(1, min(int(width), MAX_PLOT_WIDTH))
+    if method == "lttb":
+        if len(times) > 8 * width:
+            times, values = minmax_decimate(times, values, start_time, end_time, 4 * width)
+        return lttb(times, values, width)
+    if len(times) <= 2 * width:
+        lo = bisect_left(times, start_time)
+        hi = bisect_right(times, end_time)
+        return list(times[lo:hi]), list(values[lo:hi])
+    return minmax_decimate(times, values, start_time, end_time, width)
+
+
+def downsample_session(reader, cells, start_time, end_time, width, method="minmax"):
+    """Like downsample() for each cell, reading a session one bucket at a time."""
+    width = max(1, min(int(width), MAX_PLOT_WIDTH))
+    lo = reader.index_at(start_time)
+    hi = reader.index_at(end_time, right=True)
+    buckets = 4 * width if method == "lttb" else width
+    if hi - lo <= 2 * buckets:
+        times, series = reader.read(lo, hi, cells=cells)
+        return {cell: downsample(times, series[cell], start_time, end_time, width, method) for cell in series}
+    step = (end_time - start_time) / float(buckets)
+    cells = [cell for cell in cells if 0 <= cell < reader.cells]
+    if getattr(reader, "blocks", None):
+        reduced = _block_bucket_extremes(reader, cells, start_time, end_time, step, buckets)
+    else:
+        bounds = [lo] + [reader.index_at(start_time + step * k) for k in range(1, buckets)] + [hi]
+        reduced = {cell: ([], []) for cell in cells}
+        for k in range(buckets):
+            if bounds[k + 1] <= bounds[k]:
+                continue
+            times, series = reader.read(bounds[k], bounds[k + 1], cells=cells)
+            for cell, (out_t, out_v) in reduced.items():
+                _bucket_extremes(times, series[cell], 0, len(times), out_t, out_v)
+    if method == "lttb":
+        return {cell: lttb(t, v, width) for cell, (t, v) in reduced.items()}
+    return reduced
+
+
+def _block_bucket_extremes(reader, cells, start_time, end_time, step, buckets):
+    """Min/max per bucket from a block session, using the stored per-block min/max
+    for blocks that fall entirely inside a bucket instead of decompressing them.
+
+    Such a block's extremes are placed at its middle time, which is inside the
+    bucket, so at most a pixel away from where they really are.
+    """
+    blocks = reader.blocks
+    reduced = {cell: ([], []) for cell in cells}
+    number = bisect_left([block.last_time for block in blocks], start_time)
+    for k in range(buckets):
+        b0 = start_time + step * k
+        last = k == buckets - 1
+        b1 = end_time if last else start_time + step * (k + 1)
+        parts = []
+        j = number
+        while j < len(blocks) and (blocks[j].first_time <= b1 if last else blocks[j].first_time < b1):
+            parts.append(j)
+            j += 1
+        if len(parts) == 1 and not (blocks[parts[0]].first_time >= b0 and blocks[parts[0]].last_time < b1):
+            # Bucket inside a single block (buckets narrower than blocks): reduce straight into the output.
+            times, columns = reader.block_data(parts[0])
+            seg_lo = bisect_left(times, b0)
+            seg_hi = bisect_right(times, b1) if last else bisect_left(times, b1)
+            for cell, (out_t, out_v) in reduced.items():
+                _bucket_extremes(times, columns[cell], seg_lo, seg_hi, out_t, out_v)
+        elif parts:
+            candidates = {cell: ([], []) for cell in cells}
+            for j in parts:
+                block = blocks[j]
+                if block.first_time >= b0 and (block.last_time <= b1 if last else block.last_time < b1):
+                    middle = (block.first_time + block.last_time) / 2.0
+                    for cell, (out_t, out_v) in candidates.items():
+                        out_t.extend((middle, middle))
+                        out_v.extend((block.mins[cell], block.maxs[cell]))
+                else:
+                    times, columns = reader.block_data(j)
+                    seg_lo = bisect_left(times, b0)
+                    seg_hi = bisect_right(times, b1) if last else bisect_left(times, b1)
+                    for cell, (out_t, out_v) in candidates.items():
+                        _bucket_extremes(times, columns[cell], seg_lo, seg_hi, out_t, out_v)
+            for cell, (out_t, out_v) in reduced.items():
+                cand_t, cand_v = candidates[cell]
+                _bucket_extremes(cand_t, cand_v, 0, len(cand_t), out_t, out_v)
+        while number < len(blocks) and blocks[number].last_time < b1:
+            number += 1
+    return reduced
@@ -8,10 +8,12 @@ import io
 import time
 import sys
 import csv
+import queue
+from array import array
 from collections import OrderedDict
 from datetime import datetime, timedelta
-from threading import Thread
-from PyQt5.QtWidgets import QWidget, QMainWindow, QApplication, QAction, QTableWidget, QTableWidgetItem, QVBoxLayout, QPushButton, QSizePolicy
+from threading import Thread, Event, Lock
+from PyQt5.QtWidgets import QWidget, QMainWindow, QApplication, QAction, QTableView, QVBoxLayout, QPushButton, QSizePolicy
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.backends.backend_qt4agg import NavigationToolbar2QT as NavigationToolbar
 import matplotlib.pyplot as plt
@@ -30,6 +32,15 @@ NUM_CHANNELS = 2
 NUM_PORTS = 6
 NUM_MEAS_IDS = NUM_CHANNELS * NUM_PORTS
 INVALID_VALUE = 1e300
+# The control loop blocks on qcontrol; the timeout only bounds how long stop() waits.
+CONTROL_TIMEOUT = 1.0
+# Seconds between frames pushed to the GUI while continuous measuring is on.
+STREAM_INTERVAL = 0.1
+# The GUI drains qdata/qconnectStatus without waiting on this timer.
+GUI_POLL_MS = 50
+DISCONNECTED, CONNECTING, CONNECTED, ERROR = range(4)
+STATUS_TEXT = ('Disconnected', 'Connecting', 'Connected', 'Error')
+STATUS_COLOR = (None, Qt.yellow, Qt.green, Qt.red)
 
 logname = "WrapView.log"
 AppName = "WrapView"
@@ -60,20 +71,70 @@ class PhidgetMeas(Thread):
         self.calibrate = AutoCalibStartUp
         #self.initphidget()
         self.CalibCount = 3
+        self.stopevent = Event()
+        self.streaminterval = None
+        self.frameseq = 0
+        self.statuslock = Lock()
+        self.statuscodes = array('b', [DISCONNECTED] * NUM_MEAS_IDS)
+        self.statusdirty = False
          
     def run(self):
-        while True:
-            while not qcontrol.empty():
-                item = qcontrol.get()
+        nextframe = 0.0
+        while not self.stopevent.is_set():
+            timeout = CONTROL_TIMEOUT
+            if self.streaminterval:
+                timeout = max(nextframe - time.monotonic(), 0)
+            try:
+                item = qcontrol.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is not None:
+                if item[0] == 'Stop':
+                    break
                 if item[0] == 'Connect':
                     self.closeall()
                     self.initphidget()
                 if  item[0] == 'GetMeasurement':
-                    if not qdata.full():
-                        for i in ch:
-                            if i.isReady:
-                                qdata.put((i.channelIndex, i.value))
-        pass
+                    self.sendmeasurement()
+                if item[0] == 'StartStream':
+                    self.streaminterval = float(item[1])
+                    nextframe = time.monotonic()
+                if item[0] == 'StopStream':
+                    self.streaminterval = None
+            # The control queue timeout doubles as the stream clock.
+            if self.streaminterval and time.monotonic() >= nextframe:
+                self.sendmeasurement()
+                nextframe = max(nextframe + self.streaminterval, time.monotonic())
+            self.flushstatus()
+
+    def sendmeasurement(self):
+        # One message per tick: ('Frame', seq, timestamp, values), INVALID_VALUE for channels not ready.
+        values = array('d', [getattr(i, 'value', INVALID_VALUE) if getattr(i, 'isReady', False) else INVALID_VALUE
+                             for i in ch])
+        self.frameseq += 1
+        if not qdata.full():
+            qdata.put(('Frame', self.frameseq, time.time(), values))
+
+    def setstatus(self, index, code):
+        with self.statuslock:
+            self.statuscodes[index] = code
+            self.statusdirty = True
+
+    def flushstatus(self):
+        # Status changes since the last flush go out as one ('Status', connecting, connected, error) bitmap message.
+        with self.statuslock:
+            if not self.statusdirty:
+                return
+            self.statusdirty = False
+            masks = [0, 0, 0, 0]
+            for index, code in enumerate(self.statuscodes):
+                masks[code] |= 1 << index
+        if not qconnectStatus.full():
+            qconnectStatus.put(('Status', masks[CONNECTING], masks[CONNECTED], masks[ERROR]))
+
+    def stop(self):
+        self.stopevent.set()
+        qcontrol.put(('Stop', True))
 
 
     def storeCalibvalues(self):
@@ -91,8 +152,8 @@ class PhidgetMeas(Thread):
         channel = int(ph.getChannel())
         index = (port << 1) + channel
         ch[index].isReady = False
-        if not qconnectStatus.full():
-            qconnectStatus.put((index, str('Error:'+description)))
+        logging.warning("Channel " + str(index) + " error: " + description)
+        self.setstatus(index, ERROR)
 
 
     def onVoltageRatioChangeHandler(self, phself, sensorValue):
@@ -116,8 +177,7 @@ class PhidgetMeas(Thread):
         channel = int(ph.getChannel())
         index = (port << 1) + channel
         ch[index].isReady = True
-        if not qconnectStatus.full():
-            qconnectStatus.put((index, 'Connected'))
+        self.setstatus(index, CONNECTED)
             
     def initphidget(self):
         Net.enableServerDiscovery(PhidgetServerType.PHIDGETSERVER_DEVICEREMOTE)
@@ -136,12 +196,13 @@ class PhidgetMeas(Thread):
                     ch[i].channelIndex = i
                     ch[i].isReady = False
                     ch[i].CalibValues = []
-                    if not qconnectStatus.full():
-                        qconnectStatus.put((i, 'Connecting'))
+                    self.setstatus(i, CONNECTING)
+                    self.flushstatus()
           
                     ch[i].openWaitForAttachment(2000)
                 except:
                     print("Error in no" + str(i))
+                self.flushstatus()
                     
     def closeall(self):
         i = -1
@@ -154,6 +215,67 @@ class PhidgetMeas(Thread):
                     print("Error in no" + str(i))
         time.sleep(1)
 
+class MeasurementModel(QAbstractTableModel):
+    # Values and statuses live in flat arrays; the view asks for text/colours on paint only.
+    HEADERS = ("Load cell Number", "Connect Status", "Cal_Multiplier", "Cal_Adder", "Measured Load")
+    STATUS_COLUMN = 1
+    VALUE_COLUMN = 4
+
+    def __init__(self, caldata, parent=None):
+        super().__init__(parent)
+        self.caldata = caldata
+        self.values = array('d', [INVALID_VALUE] * NUM_MEAS_IDS)
+        self.statuses = array('b', [DISCONNECTED] * NUM_MEAS_IDS)
+        self.brushes = [QtGui.QBrush(QtGui.QColor(c)) if c is not None else None for c in STATUS_COLOR]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else NUM_MEAS_IDS
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        row = index.row()
+        col = index.column()
+        if role == Qt.DisplayRole:
+            if col == 0:
+                return "Cell_" + str(row)
+            if col == self.STATUS_COLUMN:
+                return STATUS_TEXT[self.statuses[row]]
+            if col == 2:
+                return self.caldata[row]['Multiplier']
+            if col == 3:
+                return self.caldata[row]['Addend']
+            if col == self.VALUE_COLUMN:
+                value = self.values[row]
+                return "Value" if value == INVALID_VALUE else "{:.5f}".format(value)
+        elif role == Qt.BackgroundRole and col == self.STATUS_COLUMN:
+            return self.brushes[self.statuses[row]]
+        return None
+
+    def setvalues(self, updates):
+        if not updates:
+            return
+        for idn, value in updates.items():
+            self.values[idn] = value
+        self.dataChanged.emit(self.index(min(updates), self.VALUE_COLUMN),
+                              self.index(max(updates), self.VALUE_COLUMN), [Qt.DisplayRole])
+
+    def setstatuses(self, updates):
+        if not updates:
+            return
+        for idn, status in updates.items():
+            self.statuses[idn] = status
+        self.dataChanged.emit(self.index(min(updates), self.STATUS_COLUMN),
+                              self.index(max(updates), self.STATUS_COLUMN),
+                              [Qt.DisplayRole, Qt.BackgroundRole])
+
+
 class App(QWidget):
 
     def __init__(self):
@@ -169,9 +291,8 @@ class App(QWidget):
         self.caldata = []
         self.readCalData()
         self.initUI()
-        self.showmeasdata = False
         self.runningmeasure = False
-        self.timerrun = False
+        self.pendingwrite = False
         self.timersetup()
 
     def say_hello(self):                                                                                     
@@ -190,7 +311,7 @@ class App(QWidget):
         self.layout.addWidget(self.MakeMeasurebutton)
         
         
-        self.layout.addWidget(self.tableWidget) 
+        self.layout.addWidget(self.tableView) 
 
         self.gplot = PlotCanvas(self, width=5, height=4)
         self.gplot.move(0, 0)
@@ -217,98 +338,92 @@ class App(QWidget):
 
     def createTable(self):
         # Create table
-        self.tableWidget = QTableWidget()
-        self.tableWidget.verticalHeader().setVisible(False)
-        self.tableWidget.horizontalHeader().setVisible(True)
-        self.tableWidget.setRowCount(NUM_MEAS_IDS)
-        self.tableWidget.setColumnCount(5)
-        self.tableWidget.setHorizontalHeaderItem(0, QTableWidgetItem("Load cell Number"))
-        self.tableWidget.setHorizontalHeaderItem(1, QTableWidgetItem("Connect Status"))
-        self.tableWidget.setHorizontalHeaderItem(2, QTableWidgetItem("Cal_Multiplier"))
-        self.tableWidget.setHorizontalHeaderItem(3, QTableWidgetItem("Cal_Adder"))
-        self.tableWidget.setHorizontalHeaderItem(4, QTableWidgetItem("Measured Load"))        
-        for mId in range (0, NUM_MEAS_IDS):
-            self.tableWidget.setItem(mId, 0, QTableWidgetItem("Cell_"+ str(mId)))
-            self.tableWidget.setItem(mId, 1, QTableWidgetItem("Disconnected"))
-            self.tableWidget.setItem(mId, 2, QTableWidgetItem(self.caldata[mId]['Multiplier']))
-            self.tableWidget.setItem(mId, 3, QTableWidgetItem(self.caldata[mId]['Addend']))
-            self.tableWidget.setItem(mId, 4, QTableWidgetItem("Value"))
-        self.tableWidget.move(0, 0)
+        self.model = MeasurementModel(self.caldata, self)
+        self.tableView = QTableView()
+        self.tableView.setModel(self.model)
+        self.tableView.verticalHeader().setVisible(False)
+        self.tableView.horizontalHeader().setVisible(True)
+        self.tableView.move(0, 0)
 
     @pyqtSlot()
     def update_on_click(self):
         if not self.runningmeasure:
             self.updatebutton.setStyleSheet("background-color:green;")
-            self.showmeasdata = True
-            self.startfreeruntimer()
+            qcontrol.put(("StartStream", STREAM_INTERVAL))
         else:
             self.updatebutton.setStyleSheet("")
-            self.showmeasdata = False
-            self.stopfreeruntimer()
+            qcontrol.put(("StopStream", True))
 
         self.runningmeasure = not self.runningmeasure
-
-        self.updatemeasuemntdata()
         
     def AddMeasurement_click(self):
-        self.updatemeasuemntdata(clearplot=False)
-        self.writecsvdatafile(vals)
+        # Written by pollqueues() once the requested values have arrived.
+        self.pendingwrite = True
+        self.updatemeasuemntdata()
         
         
     def connect_on_click(self):
         if not qcontrol.full():
             qcontrol.put(("Connect", True))
-        self.update2()
-        self.startfreeruntimer()
-        
-    def startfreeruntimer(self):
-        self.timerrun = True 
-        self.timer.start()
-
-    def stopfreeruntimer(self):
-        self.timerrun = False
-        self.timer.stop()
-
 
     def timersetup(self):
         self.timer = QTimer()
-        self.timer.setInterval(1000)
-        self.timer.timeout.connect(self.update2)
-        if self.timerrun:
-            self.timer.start()
+        self.timer.setInterval(GUI_POLL_MS)
+        self.timer.timeout.connect(self.pollqueues)
+        self.timer.start()
             
-    def updatemeasuemntdata(self, clearplot=True):
+    def updatemeasuemntdata(self):
         if not qcontrol.full():
             qcontrol.put(("GetMeasurement", True))
-            time.sleep(0.2)
-        while not qdata.empty():
-            item = qdata.get()
-            idn = int(item[0])
-            measvalue = float(item[1])
+
+    def pollqueues(self):
+        self.update2()
+        frame = None
+        while True:
+            try:
+                frame = qdata.get_nowait()
+            except queue.Empty:
+                break
+        if frame is None:
+            return
+        # Only the newest frame is shown; older ones queued during a slow repaint are superseded.
+        kind, seq, timestamp, raw = frame
+        updates = {}
+        for idn, measvalue in enumerate(raw):
+            if measvalue == INVALID_VALUE:
+                continue
             value = self.GetCalibratedValue(idn, measvalue)
-            strval = "{:.5f}".format(value)
-            self.tableWidget.setItem(idn, 4, QTableWidgetItem(strval))
             vals[idn] = value
+            updates[idn] = value
+        self.model.setvalues(updates)
         if self.gplot is not None:
-            if clearplot:
-                self.gplot.clearplots()
             self.gplot.pltupdate()
+        if self.pendingwrite:
+            self.pendingwrite = False
+            self.writecsvdatafile(vals)
 
     def update2(self):
-        while not qconnectStatus.empty():
-            item = qconnectStatus.get()
-            if item[1] == 'Connecting':
-                self.tableWidget.setItem(int(item[0]), 1, QTableWidgetItem('Connecting'))
-                self.tableWidget.item(int(item[0]),1).setBackground(QtGui.QColor(Qt.yellow)) 
-            elif item[1] == 'Connected':
-                self.tableWidget.setItem(int(item[0]), 1, QTableWidgetItem('Connected'))
-                self.tableWidget.item(int(item[0]),1).setBackground(QtGui.QColor(Qt.green)) 
-            elif 'Error:' in item[1]:
-                self.tableWidget.setItem(int(item[0]), 1, QTableWidgetItem('Error'))
-                self.tableWidget.item(int(item[0]),1).setBackground(QtGui.QColor(Qt.red)) 
-        if self.showmeasdata:
-            self.updatemeasuemntdata()
-            # print(item)
+        status = None
+        while True:
+            try:
+                status = qconnectStatus.get_nowait()
+            except queue.Empty:
+                break
+        if status is None:
+            return
+        kind, connecting, connected, error = status
+        updates = {}
+        for idn in range(NUM_MEAS_IDS):
+            bit = 1 << idn
+            if error & bit:
+                updates[idn] = ERROR
+            elif connected & bit:
+                updates[idn] = CONNECTED
+            elif connecting & bit:
+                updates[idn] = CONNECTING
+            else:
+                updates[idn] = DISCONNECTED
+        self.model.setstatuses(updates)
     
     def readCalData(self):
         if not os.path.exists(os.path.dirname(self.calfilename)):
@@ -389,20 +504,36 @@ class PlotCanvas(FigureCanvas):
                 QSizePolicy.Expanding)
         FigureCanvas.updateGeometry(self)
         self.line = None
+        self.background = None
         self.plot()
+        # Every full draw (resize, new limits) refreshes the cached axes background used for blitting.
+        self.mpl_connect('draw_event', self.on_draw)
+
+    def on_draw(self, event):
+        self.background = self.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.line)
 
     def pltupdate(self):
-        self.ax.relim()
-        self.ax.autoscale_view(True)
-        self.ax.set_xlim(0,1)
-        y = range(len(vals))
-        x = vals
-        #self.ax.clear()
-        self.line = self.ax.plot(x, y, '.-')
-        self.ax.set_title('Load plot')
-        self.ax.set_ylabel('Cells')
-        self.fig.canvas.draw()
-        self.fig.canvas.flush_events()
+        x = list(vals)
+        self.line.set_data(x, range(len(x)))
+        if self.updatelimits(x) or self.background is None:
+            self.draw()
+        else:
+            self.restore_region(self.background)
+            self.ax.draw_artist(self.line)
+            self.blit(self.ax.bbox)
+        self.flush_events()
+
+    def updatelimits(self, x):
+        # Only widen/narrow the force axis when values leave it, so most updates are a blit.
+        lo, hi = self.ax.get_xlim()
+        xmin = min(min(x), 0)
+        xmax = max(max(x), 1)
+        if lo <= xmin and xmax <= hi and (hi - lo) <= 4 * (xmax - xmin):
+            return False
+        pad = 0.1 * (xmax - xmin)
+        self.ax.set_xlim(xmin - pad if xmin < 0 else 0, xmax + pad)
+        return True
 
     def barplot(self):
         x = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
@@ -412,18 +543,14 @@ class PlotCanvas(FigureCanvas):
         self.ax.set_ylabel('Cells')
     
     def plot(self):
-        y = range(12)
-        x = range(12)
         self.ax = self.figure.add_subplot(111)
-        #self.ax.plot(x, y, 'o-')  
         self.ax.set_title('Load plot')
         self.ax.set_ylabel('Cells')
         self.ax.set_xlabel("Force") 
-    
-    def clearplots(self):
-        self.ax.clear()
-        
-        # self.draw()
+        self.ax.set_xlim(0, 1)
+        self.ax.set_ylim(-0.5, NUM_MEAS_IDS - 0.5)
+        # One persistent artist, drawn by blitting on top of the cached axes.
+        self.line, = self.ax.plot([], [], '.-', animated=True)
 
 
 def WriteSetupFile(data):
@@ -485,4 +612,6 @@ if __name__ == '__main__':
     ph = PhidgetMeas(appsettings)
     ph.start()
 
-    sys.exit(app.exec_()) 
+    ret = app.exec_()
+    ph.stop()
+    sys.exit(ret) 
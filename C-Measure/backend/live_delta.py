@@ -0,0 +1,103 @@
+import threading
+from bisect import bisect_right
+
+DEFAULT_LIVE_DELTA_CONFIG = {
+    "deadband": 0.05,
+    "keyframeSeconds": 10.0,
+    "decimals": 3,
+}
+
+
+def normalize_live_delta_config(config):
+    merged = dict(DEFAULT_LIVE_DELTA_CONFIG)
+    for key, value in (config or {}).items():
+        if key not in DEFAULT_LIVE_DELTA_CONFIG:
+            continue
+        if key == "decimals":
+            merged[key] = min(max(int(value), 0), 9)
+        elif key == "keyframeSeconds":
+            merged[key] = max(float(value), 0.1)
+        else:
+            merged[key] = max(float(value), 0.0)
+    return merged
+
+
+class DeltaLog:
+    """Frame listener that keeps what a client needs to go from any recent frame to the latest one.
+
+    Each cell has a reference value; a frame only logs the cells that moved
+    more than `deadband` from it. Every `keyframeSeconds` the references are
+    reset to the current frame and the log is cleared, so a client whose
+    last frame is older than the latest keyframe (or that missed anything)
+    gets a full keyframe instead of deltas. Frames carry the filtered
+    values, so clients see the same stream as /api/measurements.
+    """
+
+    def __init__(self, count, config=None):
+        self.count = count
+        self.config = normalize_live_delta_config(config)
+        self._lock = threading.Lock()
+        self._values = [0.0] * count
+        self._statuses = ["Disconnected"] * count
+        self._status_version = 0
+        self._seq = 0
+        self._time = None
+        self._key_seq = 0
+        self._key_time = None
+        self._log_seqs = []
+        self._log = []
+
+    def update(self, seq, timestamp, values):
+        deadband = self.config["deadband"]
+        decimals = self.config["decimals"]
+        with self._lock:
+            if (
+                self._key_time is None
+                or seq <= self._seq
+                or timestamp - self._key_time >= self.config["keyframeSeconds"]
+            ):
+                self._values = [round(value, decimals) for value in values[:self.count]]
+                self._key_seq = seq
+                self._key_time = timestamp
+                self._log_seqs = []
+                self._log = []
+            else:
+                references = self._values
+                for cell, value in enumerate(values[:self.count]):
+                    if abs(value - references[cell]) > deadband:
+                        value = round(value, decimals)
+                        references[cell] = value
+                        self._log_seqs.append(seq)
+                        self._log.append((cell, value))
+            self._seq = seq
+            self._time = timestamp
+
+    def changes(self, since=None, status_version=None, statuses=None):
+        """Keyframe or deltas for a client that holds frame `since` and status version `status_version`.
+
+        `statuses` are the current channel statuses; a change bumps the status
+        version and the full status list is included for clients behind it.
+        """
+        with self._lock:
+            if statuses is not None and list(statuses) != self._statuses:
+                self._statuses = list(statuses)
+                self._status_version += 1
+            payload = {
+                "seq": self._seq,
+                "t": self._time,
+                "statusVersion": self._status_version,
+            }
+            if since is None or since < self._key_seq or since > self._seq:
+                payload["key"] = True
+                payload["values"] = list(self._values)
+                payload["statuses"] = list(self._statuses)
+                return payload
+            start = bisect_right(self._log_seqs, since)
+            latest = {}
+            for cell, value in self._log[start:]:
+                latest[cell] = value
+            payload["key"] = False
+            payload["changes"] = [[cell, value] for cell, value in sorted(latest.items())]
+            if status_version != self._status_version:
+                payload["statuses"] = list(self._statuses)
+            return payload
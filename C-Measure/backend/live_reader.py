@@ -0,0 +1,132 @@
+"""Read live C-Measure frames from a local Python script.
+
+The backend publishes every frame (timestamp + calibrated force per cell)
+into a memory-mapped ring file when ``liveFrames`` is enabled in settings, or
+always when it runs with ``acquisitionProcess``. This module attaches to that
+file read-only, so a script can follow every sample at full rate without
+going through HTTP or JSON and without slowing the backend down.
+
+The file is found at, in order: the ``path`` argument, ``CMEASURE_LIVE_FRAMES``,
+``%APPDATA%\\C-Measure\\live\\frames.ring`` on Windows, or
+``<tmp>/cmeasure-live/frames.ring`` elsewhere (``liveFramePath`` in settings
+moves it; pass the same path here).
+
+Example::
+
+    from live_reader import LiveReader
+
+    with LiveReader() as reader:
+        print(reader.cells, "cells")
+        print(reader.latest())
+        for frame in reader.frames(timeout=5.0):
+            print(frame.seq, frame.timestamp, max(frame.values))
+
+Frames carry a sequence number that increases by one per frame. When a
+consumer falls more than one ring length behind, the missed frames are
+skipped and counted in ``reader.dropped``. If the backend restarts, the
+reader re-attaches and continues from the new sequence.
+
+Put the backend directory on ``sys.path`` (the module needs ``frame_ring.py``
+next to it), or run ``python live_reader.py [path]`` to print frames as they
+arrive.
+"""
+import sys
+import time
+from collections import namedtuple
+
+from frame_ring import FrameRingReader, default_ring_path
+
+Frame = namedtuple("Frame", ["seq", "timestamp", "values"])
+
+
+class LiveReader:
+    def __init__(self, path=None, poll_interval=0.001):
+        self.path = path or default_ring_path()
+        self.poll_interval = poll_interval
+        self.dropped = 0
+        self._ring = FrameRingReader(self.path)
+
+    @property
+    def cells(self):
+        return self._ring.count
+
+    @property
+    def capacity(self):
+        return self._ring.capacity
+
+    @property
+    def last_seq(self):
+        return self._ring.last_seq
+
+    def close(self):
+        self._ring.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def latest(self):
+        """The most recent frame, or None before the first frame."""
+        frame = self._ring.latest()
+        return Frame(*frame) if frame is not None else None
+
+    def read(self, seq):
+        """Frame `seq` if it is still in the ring, else None."""
+        frame = self._ring.read(seq)
+        return Frame(seq, frame[0], frame[1]) if frame is not None else None
+
+    def history(self, start_time=None, end_time=None, cells=None):
+        """(times, {cell: values}) arrays for the frames still in the ring."""
+        return self._ring.snapshot(start_time, end_time, cells)
+
+    def frames(self, start_seq=None, timeout=None):
+        """Yield every frame from `start_seq` (default: the next new one) in sequence order.
+
+        Blocks while waiting for new frames, polling every `poll_interval`
+        seconds. Stops after `timeout` seconds without a new frame if given.
+        """
+        ring = self._ring
+        next_seq = ring.last_seq + 1 if start_seq is None else max(int(start_seq), 1)
+        idle_since = time.monotonic()
+        while True:
+            if ring.restarted():
+                ring.attach()
+                next_seq = 1
+            last = ring.last_seq
+            if next_seq > last:
+                if timeout is not None and time.monotonic() - idle_since >= timeout:
+                    return
+                time.sleep(self.poll_interval)
+                continue
+            oldest = last - ring.capacity + 2
+            if next_seq < oldest:
+                self.dropped += oldest - next_seq
+                next_seq = oldest
+            frame = ring.read(next_seq)
+            if frame is None:
+                # Overwritten while we were reading it: count it and move on.
+                self.dropped += 1
+            else:
+                yield Frame(next_seq, frame[0], frame[1])
+            next_seq += 1
+            idle_since = time.monotonic()
+
+
+def main(argv):
+    path = argv[1] if len(argv) > 1 else None
+    with LiveReader(path) as reader:
+        print(f"Attached to {reader.path} ({reader.cells} cells, {reader.capacity} frames)")
+        try:
+            for frame in reader.frames():
+                values = " ".join(f"{value:8.3f}" for value in frame.values)
+                print(f"{frame.seq:>10} {frame.timestamp:.3f} {values}")
+        except KeyboardInterrupt:
+            pass
+        if reader.dropped:
+            print(f"Dropped {reader.dropped} frames", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
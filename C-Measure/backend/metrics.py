@@ -0,0 +1,68 @@
+import math
+from operator import mul
+
+DEFAULT_CELL_SPACING_CM = 15.0
+
+
+def cell_heights(count, settings=None):
+    """Mounting height of each cell in cm; cell 0 is the lowest."""
+    settings = settings or {}
+    heights = settings.get("cellHeightsCm")
+    if isinstance(heights, list) and len(heights) >= count:
+        try:
+            return [float(h) for h in heights[:count]]
+        except (TypeError, ValueError):
+            pass
+    try:
+        spacing = float(settings.get("cellSpacingCm", DEFAULT_CELL_SPACING_CM))
+    except (TypeError, ValueError):
+        spacing = DEFAULT_CELL_SPACING_CM
+    return [spacing * (i + 1) for i in range(count)]
+
+
+class WrapMetrics:
+    """Derived containment values for one frame of per-cell forces.
+
+    Heights and zone membership are fixed per instance, so a frame costs a
+    handful of C-level reductions (sum/map/min/max) over the value list.
+    """
+
+    def __init__(self, heights):
+        self.heights = [float(h) for h in heights]
+        self.count = len(self.heights)
+        order = sorted(range(self.count), key=lambda idx: self.heights[idx])
+        third = self.count // 3
+        bottom = order[:third]
+        top = order[self.count - third:] if third else []
+        middle = order[third:self.count - third] if third else order
+        self.zones = {"bottom": bottom, "middle": middle, "top": top}
+
+    def compute(self, values):
+        values = list(values[:self.count])
+        n = len(values)
+        if not n:
+            return None
+        total = math.fsum(values)
+        mean = total / n
+        if total:
+            centroid = math.fsum(map(mul, self.heights, values)) / total
+        else:
+            centroid = None
+        variance = math.fsum((v - mean) * (v - mean) for v in values) / n
+        cv = math.sqrt(variance) / abs(mean) if mean else None
+        zones = {}
+        for name, members in self.zones.items():
+            picked = [values[idx] for idx in members if idx < n]
+            zones[name] = math.fsum(picked) / len(picked) if picked else None
+        high = max(values)
+        low = min(values)
+        return {
+            "totalForce": total,
+            "meanForce": mean,
+            "centroidHeightCm": centroid,
+            "zones": zones,
+            "uniformity": max(0.0, 1.0 - cv) if cv is not None else None,
+            "cv": cv,
+            "maxCell": {"cell": values.index(high), "value": high},
+            "minCell": {"cell": values.index(low), "value": low},
+        }
@@ -4,36 +4,130 @@ import os
 import socket
 import threading
 import time
+from array import array
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 logger = logging.getLogger('CMeasure.Phidget')
 
-try:
-    from Phidget22.Devices.VoltageRatioInput import VoltageRatioInput
-    from Phidget22.Net import Net, PhidgetServerType
-    PHIDGET_AVAILABLE = True
-    logger.info("Phidget22 library loaded successfully")
-except Exception as e:
-    PHIDGET_AVAILABLE = False
-    logger.warning(f"Phidget22 library not available: {e}")
-
+# Phidget22 is imported on first use (load_phidget): loading the native
+# library is a large part of backend startup and simulation never needs it.
+PHIDGET_AVAILABLE = None
+PHIDGET_IMPORT_SECONDS = None
+VoltageRatioInput = None
+Net = None
+PhidgetServerType = None
+_phidget_lock = threading.Lock()
+
+
+def load_phidget():
+    global PHIDGET_AVAILABLE, PHIDGET_IMPORT_SECONDS, VoltageRatioInput, Net, PhidgetServerType
+    with _phidget_lock:
+        if PHIDGET_AVAILABLE is None:
+            started = time.perf_counter()
+            try:
+                from Phidget22.Devices.VoltageRatioInput import VoltageRatioInput
+                from Phidget22.Net import Net, PhidgetServerType
+                PHIDGET_AVAILABLE = True
+                logger.info("Phidget22 library loaded successfully")
+            except Exception as e:
+                PHIDGET_AVAILABLE = False
+                logger.warning(f"Phidget22 library not available: {e}")
+            PHIDGET_IMPORT_SECONDS = time.perf_counter() - started
+    return PHIDGET_AVAILABLE
+
+from cycles import CycleDetector
+from diagnostics import DiagnosticsJob
+from filters import FilterChain
+from history import DEFAULT_HISTORY_FRAMES, FrameHistory
+from live_delta import DeltaLog
+from metrics import WrapMetrics, cell_heights
+from profiler import DEFAULT_INTERVAL, code_labels, sample_stacks
+from publisher import FramePublisher, normalize_publisher_config
 from settings import load_settings
+from stats import ChannelStats
+from triggers import TriggerEngine
 
 
 class PhidgetService:
-    def __init__(self, storage, num_ports=6, num_channels=2, simulate=None):
+    def __init__(self, storage, num_ports=6, num_channels=2, simulate=None, settings=None):
         self.storage = storage
         self.num_ports = num_ports
         self.num_channels = num_channels
         self.num_ids = num_ports * num_channels
         self.raw_values = [0.0 for _ in range(self.num_ids)]
+        self.filtered_values = [0.0 for _ in range(self.num_ids)]
         self.values = [0.0 for _ in range(self.num_ids)]
         self.zero_offsets = [0.0 for _ in range(self.num_ids)]
+        self.stats = ChannelStats(self.num_ids)
         self.statuses = ["Disconnected" for _ in range(self.num_ids)]
-        settings = load_settings()
-        self.calibration = self.storage.read_calibration(self.num_ids, serial=settings.get("systemSerial"))
+        settings = load_settings() if settings is None else settings
+        try:
+            self.storage.configure_sessions(settings.get("sessionStorage"))
+        except (TypeError, ValueError) as e:
+            logger.error(f"Invalid session storage settings, using defaults: {e}")
+        # Calibration is read from disk on first use (see _coefficients).
+        self._calibration = None
+        self._coeffs = None
+        self._calibration_serial = settings.get("systemSerial")
+        self._calibration_lock = threading.Lock()
+        self._calibration_load_seconds = None
         self.connected = False
         self.lock = threading.Lock()
+        # Signalled (under self.lock) whenever statuses, connected or bridge reachability change.
+        self._status_changed = threading.Condition(self.lock)
+        self._status_version = 0
+        self._status_key = None
+        self._bridge_reachable = None
+        self._frame_seq = 0
+        self._frame_mask = 0
+        self._frame_full = (1 << self.num_ids) - 1
+        self._frame_listeners = []
+        self._open_frames = []
+        self._frames_dropped = 0
+        self.history = FrameHistory(self.num_ids, settings.get("historyFrames") or DEFAULT_HISTORY_FRAMES)
+        self.heights = cell_heights(self.num_ids, settings)
+        self.metrics = WrapMetrics(self.heights)
+        self._latest_metrics = None
+        self.recent_cycles = deque(maxlen=20)
+        try:
+            self.cycles = CycleDetector(self.num_ids, settings.get("cycleDetection"), on_cycle=self._on_cycle)
+        except (TypeError, ValueError) as e:
+            logger.error(f"Invalid cycle detection settings, using defaults: {e}")
+            self.cycles = CycleDetector(self.num_ids, on_cycle=self._on_cycle)
+        if self.cycles.config["enabled"]:
+            self.add_frame_listener(self.cycles.update)
+        try:
+            self.diagnostics = DiagnosticsJob(self.history, settings.get("diagnostics"))
+        except (TypeError, ValueError) as e:
+            logger.error(f"Invalid diagnostics settings, using defaults: {e}")
+            self.diagnostics = DiagnosticsJob(self.history)
+        self.triggers = TriggerEngine(self.num_ids, self.history, save_capture=self._save_trigger_capture)
+        self.add_frame_listener(self.triggers.update)
+        try:
+            self.live = DeltaLog(self.num_ids, settings.get("liveDelta"))
+        except (TypeError, ValueError) as e:
+            logger.error(f"Invalid live delta settings, using defaults: {e}")
+            self.live = DeltaLog(self.num_ids)
+        self.add_frame_listener(self.live.update)
+        self._session = None
+        self._session_lock = threading.Lock()
+        self.publisher = None
+        self.publisher_config = normalize_publisher_config(None)
+        try:
+            self.configure_publisher(settings.get("publisher"))
+        except (TypeError, ValueError, OSError) as e:
+            logger.error(f"Invalid frame publisher settings, publishing disabled: {e}")
+        self._sim_thread = None
+        self._sim_stop = threading.Event()
+        self.data_interval_ms = self._resolve_data_interval(settings.get("dataIntervalMs"))
+        self._filter_lock = threading.Lock()
+        self._pending = [array("d") for _ in range(self.num_ids)]
+        try:
+            self.filters = FilterChain.from_config(settings.get("filters"), self.num_ids, self.sample_rate)
+        except (TypeError, ValueError) as e:
+            logger.error(f"Invalid filter configuration, filtering disabled: {e}")
+            self.filters = FilterChain(self.num_ids, sample_rate=self.sample_rate)
         self._channels = []
         self._connect_lock = threading.Lock()
         self._connecting = False
@@ -51,7 +145,6 @@ class PhidgetService:
         logger.info(f"  - Remote port: {self._remote_port}")
         logger.info(f"  - Num ports: {num_ports}, Num channels: {num_channels}")
         logger.info(f"  - Total sensors: {self.num_ids}")
-        logger.info(f"  - Phidget available: {PHIDGET_AVAILABLE}")
         self._bridge_status = {
             "reachable": None,
             "error": None,
@@ -63,26 +156,37 @@ class PhidgetService:
         self._bridge_check_interval = float(os.getenv("CMEASURE_BRIDGE_CHECK_INTERVAL", "2.0"))
         self._bridge_timeout = float(os.getenv("CMEASURE_BRIDGE_TIMEOUT", "0.8"))
         self._bridge_check_lock = threading.Lock()
-        self._simulate = self._resolve_simulation(simulate)
+        # None: decided on first use by whether Phidget22 can be loaded.
+        self._simulate = None if simulate is None else bool(simulate)
         self._last_sim = time.time()
 
-    def _resolve_simulation(self, simulate):
-        if simulate is not None:
-            return bool(simulate)
-        return not PHIDGET_AVAILABLE
-
     @property
     def simulate(self):
+        if self._simulate is None:
+            self._simulate = not load_phidget()
         return self._simulate
 
+    @property
+    def sample_rate(self):
+        return 1000.0 / self.data_interval_ms
+
+    def _resolve_data_interval(self, value):
+        try:
+            interval = int(value) if value is not None else 1000
+        except (TypeError, ValueError):
+            interval = 1000
+        return max(interval, 1)
+
     def connect(self, use_remote=True):
-        logger.info(f"Connect called (use_remote={use_remote}, simulate={self._simulate})")
+        logger.info(f"Connect called (use_remote={use_remote}, simulate={self.simulate})")
 
-        if self._simulate:
+        if self.simulate:
             logger.info("Running in simulation mode - setting all connected")
             with self.lock:
                 self.statuses = ["Connected" for _ in range(self.num_ids)]
                 self.connected = True
+                self._status_touched()
+            self._start_simulation()
             return
 
         with self.lock:
@@ -103,6 +207,7 @@ class PhidgetService:
         with self.lock:
             self.statuses = ["Connecting" for _ in range(self.num_ids)]
             self.connected = False
+            self._status_touched()
 
         self._connect_thread = threading.Thread(
             target=self._connect_worker,
@@ -116,15 +221,18 @@ class PhidgetService:
         connect_thread = self._connect_thread
         if connect_thread and connect_thread.is_alive():
             connect_thread.join(timeout=0.2)
-        if self._simulate:
+        self._sim_stop.set()
+        if self.simulate:
             with self.lock:
                 self.statuses = ["Disconnected" for _ in range(self.num_ids)]
                 self.connected = False
+                self._status_touched()
             return
         self._close_channels()
         with self.lock:
             self.statuses = ["Disconnected" for _ in range(self.num_ids)]
             self.connected = False
+            self._status_touched()
 
     def _on_attach(self, ph):
         if self._connect_cancel.is_set():
@@ -134,7 +242,7 @@ class PhidgetService:
             return
         try:
             # Configure DataInterval - minimum time between VoltageRatioChange events (ms)
-            ph.setDataInterval(1000)
+            ph.setDataInterval(self.data_interval_ms)
             # Set VoltageRatioChangeTrigger to 0 to get all changes
             ph.setVoltageRatioChangeTrigger(0.0)
         except Exception:
@@ -142,6 +250,7 @@ class PhidgetService:
         with self.lock:
             if 0 <= idx < self.num_ids:
                 self.statuses[idx] = "Connected"
+                self._status_touched()
 
     def _on_error(self, ph, code, description):
         if self._connect_cancel.is_set():
@@ -153,58 +262,328 @@ class PhidgetService:
         with self.lock:
             if 0 <= idx < self.num_ids:
                 self.statuses[idx] = "Disconnected"
+                self._status_touched()
 
     def _on_change(self, ph, sensor_value):
         idx = getattr(ph, "channelIndex", None)
         if idx is None:
             return
+        self._ingest(idx, float(sensor_value))
+
+    def _ingest(self, idx, value):
+        flush = False
+        frames = []
+        now = time.time()
         with self.lock:
-            if 0 <= idx < self.num_ids:
-                self.raw_values[idx] = float(sensor_value)
+            if not 0 <= idx < self.num_ids:
+                return
+            bit = 1 << idx
+            if self._frame_mask & bit:
+                # Channel repeated before every channel reported: close the frame with held values.
+                frames.append(self._complete_frame(now))
+            self.raw_values[idx] = value
+            gains, offsets = self._coefficients
+            self.stats.update(idx, (value - offsets[idx]) * gains[idx] - self.zero_offsets[idx], now)
+            if self.filters.active:
+                pending = self._pending[idx]
+                pending.append(value)
+                flush = len(pending) >= self.filters.batch_size
+            else:
+                self.filtered_values[idx] = value
+            self._frame_mask |= bit
+            if self._frame_mask == self._frame_full:
+                frames.append(self._complete_frame(now))
+            # Run the batch early rather than let a frame wait past max_delay for the next sample.
+            if self._open_frames and now - self._open_frames[0][1] + self.data_interval_ms / 1000.0 > self.filters.max_delay:
+                flush = True
+        for frame in frames:
+            if frame is not None:
+                self._notify_frame(*frame)
+        if flush:
+            self._drain_filters()
+
+    def _complete_frame(self, timestamp):
+        """Close the current frame; caller holds self.lock.
+
+        Frames carry the calibrated filtered stream, i.e. the values
+        get_measurements reports. With filters active the frame waits in
+        _open_frames, with the number of pending samples it covers per
+        channel, until _drain_filters runs the batch (batch_size samples,
+        filters.max_delay seconds or a reader asking for values). Decimation
+        on all channels drops frames in between; their samples stay pending
+        and count towards the next kept frame.
+        """
+        self._frame_mask = 0
+        if self.filters.active:
+            self._frames_dropped += 1
+            if self._frames_dropped < self.filters.frame_factor:
+                return None
+            self._frames_dropped = 0
+        self._frame_seq += 1
+        if self.filters.active:
+            self._open_frames.append((self._frame_seq, timestamp, [len(pending) for pending in self._pending]))
+            return None
+        return self._finish_frame(self._frame_seq, timestamp, self.filtered_values)
+
+    def _finish_frame(self, seq, timestamp, raw_values):
+        values = self._calibrate(raw_values, self.zero_offsets)
+        self.history.append(seq, timestamp, values)
+        return seq, timestamp, values
+
+    def _notify_frame(self, seq, timestamp, values):
+        metrics = self.metrics.compute(values)
+        latest = self._latest_metrics
+        if latest is None or latest["seq"] < seq:
+            metrics["seq"] = seq
+            metrics["timestamp"] = timestamp
+            self._latest_metrics = metrics
+        for listener in self._frame_listeners:
+            try:
+                listener(seq, timestamp, values)
+            except Exception as e:
+                logger.error(f"Frame listener {listener!r} failed: {e}")
+
+    def add_frame_listener(self, listener):
+        """Call listener(seq, timestamp, values) for every completed frame of calibrated (filtered) values."""
+        with self.lock:
+            self._frame_listeners = self._frame_listeners + [listener]
+
+    def remove_frame_listener(self, listener):
+        with self.lock:
+            self._frame_listeners = [item for item in self._frame_listeners if item != listener]
+
+    @property
+    def frame_seq(self):
+        return self._frame_seq
+
+    def get_metrics(self):
+        """Wrap metrics of the latest frame (computed once per frame), or None."""
+        return self._latest_metrics
+
+    def _drain_filters(self):
+        if not self.filters.active:
+            return
+        with self._filter_lock:
+            with self.lock:
+                batches = []
+                for idx, pending in enumerate(self._pending):
+                    if pending:
+                        batches.append((idx, pending))
+                        self._pending[idx] = array("d")
+                open_frames = self._open_frames
+                self._open_frames = []
+                previous = list(self.filtered_values)
+            held = {}
+            for idx, batch in batches:
+                held[idx] = self.filters.process_held(idx, batch, previous[idx])
+            with self.lock:
+                for idx, values in held.items():
+                    self.filtered_values[idx] = values[-1]
+                frames = []
+                for seq, timestamp, counts in open_frames:
+                    raw = list(previous)
+                    for idx, values in held.items():
+                        if counts[idx]:
+                            raw[idx] = values[counts[idx] - 1]
+                    frames.append(self._finish_frame(seq, timestamp, raw))
+        for frame in frames:
+            self._notify_frame(*frame)
+
+    def configure_filters(self, config):
+        chain = FilterChain.from_config(config, self.num_ids, self.sample_rate)
+        with self._filter_lock:
+            with self.lock:
+                # Frames waiting for the old chain are finished with what it produced so far.
+                frames = [
+                    self._finish_frame(seq, timestamp, self.filtered_values)
+                    for seq, timestamp, _ in self._open_frames
+                ]
+                self._open_frames = []
+                self._frames_dropped = 0
+                self.filters = chain
+                self._pending = [array("d") for _ in range(self.num_ids)]
+                self.filtered_values = list(self.raw_values)
+        for frame in frames:
+            self._notify_frame(*frame)
+        return chain.describe()
+
+    def set_data_dir(self, data_dir):
+        self.storage.set_data_dir(data_dir)
+        return self.refresh_calibration()
+
+    def set_simulate(self, simulate):
+        self._simulate = bool(simulate)
 
     def refresh_calibration(self):
         settings = load_settings()
-        self.calibration = self.storage.read_calibration(self.num_ids, serial=settings.get("systemSerial"))
+        self._calibration_serial = settings.get("systemSerial")
+        self._load_calibration()
         return self.calibration
 
+    def _load_calibration(self):
+        started = time.perf_counter()
+        rows = self.storage.read_calibration(self.num_ids, serial=self._calibration_serial)
+        self._calibration_load_seconds = time.perf_counter() - started
+        self._set_calibration(rows)
+
+    def _ensure_calibration(self):
+        with self._calibration_lock:
+            if self._coeffs is None:
+                self._load_calibration()
+            return self._coeffs
+
+    @property
+    def calibration(self):
+        if self._coeffs is None:
+            self._ensure_calibration()
+        return self._calibration
+
+    @property
+    def _coefficients(self):
+        return self._coeffs or self._ensure_calibration()
+
+    def get_load_timings(self):
+        """Seconds spent on the deferred Phidget22 import and calibration read (None until they happen)."""
+        return {
+            "phidgetImportSeconds": PHIDGET_IMPORT_SECONDS,
+            "calibrationLoadSeconds": self._calibration_load_seconds,
+        }
+
+    def profile(self, seconds, interval=DEFAULT_INTERVAL):
+        """Sample the thread stacks of this process, attributing time to service and storage methods."""
+        return sample_stacks(seconds, interval, labels=code_labels([PhidgetService, type(self.storage)]))
+
     def update_calibration(self, rows, serial=None):
-        self.calibration = rows
+        self._set_calibration(rows)
+        self.reset_stats()
         self.storage.write_calibration(rows, serial=serial)
 
+    def reset_stats(self, idx=None):
+        if idx is not None and not 0 <= idx < self.num_ids:
+            raise ValueError("Invalid cell index")
+        with self.lock:
+            self.stats.reset(idx)
+
+    def get_stats(self):
+        with self.lock:
+            return self.stats.snapshot()
+
+    def _set_calibration(self, rows):
+        gains = []
+        offsets = []
+        for idx in range(self.num_ids):
+            gain, offset = self._calibration_coefficients(rows, idx)
+            gains.append(gain)
+            offsets.append(offset)
+        self._calibration = rows
+        self._coeffs = (gains, offsets)
+
     def get_statuses(self):
         with self.lock:
             return list(self.statuses)
 
+    def _status_touched(self):
+        """Bump the status version and wake waiters if anything changed; call with self.lock held."""
+        key = (tuple(self.statuses), self.connected, self._bridge_reachable)
+        if key != self._status_key:
+            self._status_key = key
+            self._status_version += 1
+            self._status_changed.notify_all()
+
+    def wait_status(self, since=None, timeout=0.0):
+        """Statuses, connected flag and status version.
+
+        If `since` is the current version, blocks up to `timeout` seconds for
+        it to change. Bridge reachability is only probed on demand, so the
+        wait wakes every bridge check interval to probe it.
+        """
+        deadline = time.monotonic() + max(float(timeout), 0.0)
+        while True:
+            if not self.simulate:
+                self.get_bridge_status()
+            with self.lock:
+                remaining = deadline - time.monotonic()
+                if since is not None and self._status_version == since and remaining > 0:
+                    self._status_changed.wait(min(remaining, self._bridge_check_interval))
+                if since is None or self._status_version != since or time.monotonic() >= deadline:
+                    return {
+                        "version": self._status_version,
+                        "statuses": list(self.statuses),
+                        "connected": self.connected,
+                    }
+
     def get_measurements(self):
-        if self._simulate:
-            self._simulate_values()
-        with self.lock:
-            raw_snapshot = list(self.raw_values)
-            tare_offsets = list(self.zero_offsets)
-        calibrated = self._apply_calibration_all(raw_snapshot)
-        final = []
-        for idx, value in enumerate(calibrated):
-            tare = tare_offsets[idx] if idx < len(tare_offsets) else 0.0
-            final.append(value - tare)
+        raw_snapshot, tare_offsets = self._snapshot()
+        final = self._calibrate(raw_snapshot, tare_offsets)
         with self.lock:
             self.values = final
         return final
 
     def get_raw_values(self):
-        if self._simulate:
-            self._simulate_values()
+        raw_snapshot, _ = self._snapshot()
+        return raw_snapshot
+
+    def get_unfiltered(self):
+        """Calibrated values and raw ratios of the unfiltered stream."""
+        with self.lock:
+            raw_snapshot = list(self.raw_values)
+            tare_offsets = list(self.zero_offsets)
+        return self._calibrate(raw_snapshot, tare_offsets), raw_snapshot
+
+    def measurement_snapshot(self):
+        """Everything /api/measurements reports, taken together in one call.
+
+        With the acquisition process this is a single pipe round trip instead
+        of one per getter. `unfiltered`/`rawUnfiltered` are None without filters.
+        """
+        self._maybe_simulate()
+        self._drain_filters()
+        bridge = self.get_bridge_status()
+        with self.lock:
+            raw_snapshot = list(self.filtered_values)
+            raw_unfiltered = list(self.raw_values) if self.filters.active else None
+            tare_offsets = list(self.zero_offsets)
+            statuses = list(self.statuses)
+            stats = self.stats.snapshot()
+            stats_reset_at = self.stats.reset_at
+            metrics = self._latest_metrics
+        values = self._calibrate(raw_snapshot, tare_offsets)
+        with self.lock:
+            self.values = values
+        return {
+            "values": values,
+            "raw": raw_snapshot,
+            "unfiltered": self._calibrate(raw_unfiltered, tare_offsets) if raw_unfiltered is not None else None,
+            "rawUnfiltered": raw_unfiltered,
+            "statuses": statuses,
+            "bridge": bridge,
+            "stats": stats,
+            "statsResetAt": stats_reset_at,
+            "metrics": metrics,
+        }
+
+    def _snapshot(self):
+        self._maybe_simulate()
+        self._drain_filters()
         with self.lock:
-            return list(self.raw_values)
+            return list(self.filtered_values), list(self.zero_offsets)
+
+    def _calibrate(self, raw_snapshot, tare_offsets):
+        gains, offsets = self._coefficients
+        return [
+            (value - offsets[idx]) * gains[idx] - tare_offsets[idx]
+            for idx, value in enumerate(raw_snapshot)
+        ]
 
     def average_raw_all(self, samples=10, delay=0.05):
         if samples <= 0:
-            return self.get_raw_values()
+            self._maybe_simulate()
+            return self.get_unfiltered()[1]
         sums = [0.0 for _ in range(self.num_ids)]
         for _ in range(samples):
             if self._connect_cancel.is_set():
                 break
-            if self._simulate:
-                self._simulate_values()
+            self._maybe_simulate()
             with self.lock:
                 snapshot = list(self.raw_values)
             for idx, value in enumerate(snapshot):
@@ -219,15 +598,14 @@ class PhidgetService:
         for _ in range(samples):
             if self._connect_cancel.is_set():
                 break
-            if self._simulate:
-                self._simulate_values()
+            self._maybe_simulate()
             with self.lock:
                 total += float(self.raw_values[idx])
             time.sleep(delay)
         return total / max(samples, 1)
 
     def get_bridge_status(self):
-        if self._simulate:
+        if self.simulate:
             return {
                 "reachable": True,
                 "error": None,
@@ -252,20 +630,168 @@ class PhidgetService:
         }
         with self._bridge_check_lock:
             self._bridge_status = status
+        with self.lock:
+            self._bridge_reachable = reachable
+            self._status_touched()
         return dict(status)
 
     def record_measurement(self, name=None):
         values = self.get_measurements()
-        return self.storage.write_measurement(values, name=name)
+        unfiltered = self.get_unfiltered()[0] if self.filters.active else None
+        metrics = self.metrics.compute(values)
+        if metrics is not None:
+            metrics["heightsCm"] = self.heights
+        return self.storage.write_measurement(
+            values,
+            name=name,
+            unfiltered=unfiltered,
+            metrics=metrics,
+            stats=self.get_stats(),
+        )
 
     def zero_set(self):
-        if self._simulate:
-            self._simulate_values()
-        with self.lock:
-            raw_snapshot = list(self.raw_values)
+        raw_snapshot, _ = self._snapshot()
         offsets = self._apply_calibration_all(raw_snapshot)
         with self.lock:
             self.zero_offsets = list(offsets)
+            self.stats.reset()
+
+    def start_session(self, name=None):
+        with self._session_lock:
+            if self._session is not None:
+                return self.session_info()
+            self._session = self.storage.create_session(
+                self.num_ids,
+                name=name,
+                metadata={"sampleRate": self.sample_rate, "unit": "N", "heightsCm": self.heights},
+            )
+            self.add_frame_listener(self._record_session_frame)
+            return self.session_info()
+
+    def stop_session(self):
+        with self._session_lock:
+            session = self._session
+            if session is None:
+                return None
+            self.remove_frame_listener(self._record_session_frame)
+            self._session = None
+            session.close()
+            return self._describe_session(session)
+
+    def session_info(self):
+        session = self._session
+        if session is None:
+            return None
+        return self._describe_session(session)
+
+    def _describe_session(self, session):
+        return {
+            "file": session.path.name,
+            "frames": session.frames,
+            "startTime": session.first_time,
+            "endTime": session.last_time,
+            "recording": not session.closed,
+        }
+
+    def _record_session_frame(self, seq, timestamp, values):
+        session = self._session
+        if session is not None:
+            session.append(timestamp, values)
+
+    def configure_cycles(self, config):
+        detector = CycleDetector(self.num_ids, config, on_cycle=self._on_cycle)
+        previous = self.cycles
+        self.remove_frame_listener(previous.update)
+        detector.cycles_detected = previous.cycles_detected
+        self.cycles = detector
+        if detector.config["enabled"]:
+            self.add_frame_listener(detector.update)
+        return dict(detector.config)
+
+    def configure_publisher(self, config):
+        config = normalize_publisher_config(config)
+        publisher = FramePublisher(self.num_ids, config) if config["enabled"] else None
+        previous = self.publisher
+        if previous is not None:
+            self.remove_frame_listener(previous.publish)
+            previous.close()
+        self.publisher = publisher
+        self.publisher_config = config
+        if publisher is not None:
+            self.add_frame_listener(publisher.publish)
+        return config
+
+    def publisher_status(self):
+        publisher = self.publisher
+        if publisher is None:
+            return {"config": self.publisher_config, "published": 0, "dropped": 0, "queued": 0, "sinks": []}
+        return publisher.describe()
+
+    def _on_cycle(self, cycle):
+        self.recent_cycles.append(cycle)
+        # Runs on the acquisition callback: hand the file writes to a worker.
+        threading.Thread(target=self._save_cycle, args=(cycle,), daemon=True).start()
+
+    def _save_cycle(self, cycle):
+        name = f"cycle{cycle['index']}"
+        try:
+            times, series = self.history.snapshot(cycle["startTime"], cycle["endTime"])
+            cycle["session"] = self.storage.write_session(
+                self.num_ids,
+                times,
+                series,
+                name=name,
+                metadata={"sampleRate": self.sample_rate, "unit": "N", "heightsCm": self.heights, "cycle": cycle},
+            )
+            averages = cycle["plateauAverages"]
+            metrics = self.metrics.compute(averages)
+            if metrics is not None:
+                metrics["heightsCm"] = self.heights
+            cycle["file"] = self.storage.write_measurement(averages, name=name, metrics=metrics)
+            logger.info(f"Cycle {cycle['index']} saved: {cycle['file']}, {cycle['session']}")
+        except OSError as e:
+            logger.error(f"Failed to save cycle {cycle['index']}: {e}")
+
+    def _save_trigger_capture(self, event, times, series):
+        trigger = event["trigger"]
+        return self.storage.write_session(
+            self.num_ids,
+            times,
+            series,
+            name=trigger["name"],
+            metadata={
+                "sampleRate": self.sample_rate,
+                "unit": "N",
+                "heightsCm": self.heights,
+                "trigger": trigger,
+                "firedAt": event["firedAt"],
+                "seq": event["seq"],
+            },
+        )
+
+    def _maybe_simulate(self):
+        sim_thread = self._sim_thread
+        if self.simulate and not (sim_thread and sim_thread.is_alive() and not self._sim_stop.is_set()):
+            self._simulate_values()
+
+    def _start_simulation(self):
+        if self._sim_thread and self._sim_thread.is_alive() and not self._sim_stop.is_set():
+            return
+        self._sim_stop = threading.Event()
+        self._sim_thread = threading.Thread(target=self._simulation_worker, args=(self._sim_stop,), daemon=True)
+        self._sim_thread.start()
+
+    def _simulation_worker(self, stop):
+        interval = self.data_interval_ms / 1000.0
+        next_tick = time.monotonic()
+        while self.simulate and not stop.is_set():
+            self._simulate_values()
+            next_tick += interval
+            wait = next_tick - time.monotonic()
+            if wait < 0:
+                next_tick = time.monotonic()
+                wait = 0
+            stop.wait(wait)
 
     def _simulate_values(self):
         now = time.time()
@@ -273,29 +799,32 @@ class PhidgetService:
         self._last_sim = now
         phase = now * 0.7
         with self.lock:
-            for idx in range(self.num_ids):
-                wave = math.sin(phase + idx * 0.4)
-                drift = math.cos((phase + idx) * 0.3) * 0.15
-                base = (wave + 1.5) * 8 + idx * 0.2
-                self.raw_values[idx] = max(base + drift * delta * 10, 0)
-                if self.connected:
-                    self.statuses[idx] = "Connected"
-
-    def _apply_calibration(self, idx, value):
+            if self.connected:
+                self.statuses = ["Connected" for _ in range(self.num_ids)]
+                self._status_touched()
+        for idx in range(self.num_ids):
+            wave = math.sin(phase + idx * 0.4)
+            drift = math.cos((phase + idx) * 0.3) * 0.15
+            base = (wave + 1.5) * 8 + idx * 0.2
+            self._ingest(idx, max(base + drift * delta * 10, 0))
+
+    def _calibration_coefficients(self, rows, idx):
         try:
-            cal = self.calibration[idx]
+            cal = rows[idx]
             gain = float(cal.get("Gain", 1))
             offset = float(cal.get("Offset", 0))
-        except (ValueError, IndexError, TypeError):
-            gain = 1
-            offset = 0
-        return (value - offset) * gain
+        except (ValueError, IndexError, TypeError, AttributeError):
+            gain = 1.0
+            offset = 0.0
+        return gain, offset
+
+    def _apply_calibration(self, idx, value):
+        gains, offsets = self._coefficients
+        return (value - offsets[idx]) * gains[idx]
 
     def _apply_calibration_all(self, raw_values):
-        calibrated = []
-        for idx, value in enumerate(raw_values):
-            calibrated.append(self._apply_calibration(idx, value))
-        return calibrated
+        gains, offsets = self._coefficients
+        return [(value - offsets[idx]) * gains[idx] for idx, value in enumerate(raw_values)]
 
     def _probe_bridge(self):
         host = self._remote_host
@@ -324,6 +853,7 @@ class PhidgetService:
 
     def _connect_worker(self, use_remote=True):
         logger.info(f"Connect worker started (use_remote={use_remote})")
+        load_phidget()
         try:
             self._close_channels()
 
@@ -370,6 +900,7 @@ class PhidgetService:
                 ph.channelIndex = idx
                 with self.lock:
                     self.statuses[idx] = "Connecting"
+                    self._status_touched()
                 try:
                     logger.debug(f"Channel {idx}: waiting for attachment (timeout=2000ms)...")
                     ph.openWaitForAttachment(2000)
@@ -383,11 +914,13 @@ class PhidgetService:
                         self._channels.append(ph)
                         if self.statuses[idx] == "Connecting":
                             self.statuses[idx] = "Connected"
+                            self._status_touched()
                     logger.info(f"Channel {idx} CONNECTED (port={port}, channel={channel})")
                 except Exception as e:
                     logger.error(f"Channel {idx} FAILED (port={port}, channel={channel}): {e}")
                     with self.lock:
                         self.statuses[idx] = "Disconnected"
+                        self._status_touched()
                     try:
                         ph.close()
                     except Exception:
@@ -410,6 +943,7 @@ class PhidgetService:
                 connected_count = sum(1 for s in self.statuses if s == "Connected")
                 if self._connect_cancel.is_set() and not self.connected:
                     self.statuses = ["Disconnected" for _ in range(self.num_ids)]
+                self._status_touched()
             with self._connect_lock:
                 self._connecting = False
             logger.info(f"Connect worker finished: {connected_count}/{self.num_ids} channels connected")
@@ -0,0 +1,165 @@
+"""On-demand sampling profiler for diagnosing a slow backend on site.
+
+Nothing is installed until a profile is requested: sample_stacks() reads
+sys._current_frames() from the calling thread every `interval` seconds for
+the requested duration and returns, so the backend runs exactly as before
+when no profile is running. Stacks are reported in the collapsed format
+("root;caller;callee count") that flamegraph.pl and speedscope read.
+"""
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+MAX_SECONDS = 30.0
+DEFAULT_INTERVAL = 0.005
+MIN_INTERVAL = 0.001
+# Innermost frames of a thread that is blocked waiting for work. Such stacks are
+# dropped unless they belong to a request, where waiting is part of its latency.
+IDLE_FRAMES = frozenset([
+    "threading:wait",
+    "threading:_wait_for_tstate_lock",
+    "selectors:select",
+    "multiprocessing.connection:_recv",
+    "multiprocessing.connection:_recv_bytes",
+    "multiprocessing.connection:_poll",
+    "concurrent.futures.thread:_worker",
+    "socket:accept",
+    "socket:readinto",
+])
+
+_active = threading.Lock()
+
+
+def code_labels(classes):
+    """Map the code of every method (and property getter) of `classes` to "Class.method"."""
+    labels = {}
+    for cls in classes:
+        for name, member in vars(cls).items():
+            if isinstance(member, property):
+                member = member.fget
+            member = getattr(member, "__func__", member)
+            code = getattr(member, "__code__", None)
+            if code is not None:
+                labels[code] = f"{cls.__name__}.{name}"
+    return labels
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    module = frame.f_globals.get("__name__")
+    if not module or module == "__main__":
+        module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}:{code.co_name}"
+
+
+def _thread_label(name):
+    # "Thread-12 (process_request_thread)" and "Thread-13" are the same kind of thread.
+    return re.sub(r"-\d+", "", name or "thread")
+
+
+def sample_stacks(seconds, interval=DEFAULT_INTERVAL, labels=None, roots=None, exclude=()):
+    """Sample the stacks of all other threads of this process for `seconds`.
+
+    `labels` maps code objects to names counted per method (see code_labels);
+    `roots` maps code objects to a function of the frame that names the
+    stack instead of its thread, e.g. the route of a request handler. Returns
+    a dict with the elapsed seconds, the number of ticks and sample counts per
+    collapsed stack, root and labelled method; idle background threads are
+    only counted.
+    """
+    if not _active.acquire(blocking=False):
+        raise RuntimeError("A profile is already running")
+    try:
+        seconds = min(max(float(seconds), 0.0), MAX_SECONDS)
+        interval = max(float(interval), MIN_INTERVAL)
+        labels = labels or {}
+        roots = roots or {}
+        skip = set(exclude) | {threading.get_ident()}
+        threads = {}
+        cache = {}
+        stacks = Counter()
+        root_counts = Counter()
+        methods = Counter()
+        idle = 0
+        ticks = 0
+        started = time.perf_counter()
+        next_tick = started
+        while True:
+            now = time.perf_counter()
+            if now - started >= seconds:
+                break
+            for ident, frame in sys._current_frames().items():
+                if ident in skip:
+                    continue
+                stack = []
+                seen = set()
+                root = None
+                while frame is not None:
+                    code = frame.f_code
+                    label = labels.get(code)
+                    if label is not None:
+                        seen.add(label)
+                    else:
+                        label = cache.get(code)
+                        if label is None:
+                            label = cache[code] = _frame_label(frame)
+                    if code in roots:
+                        root = roots[code](frame)
+                    stack.append(label)
+                    frame = frame.f_back
+                if root is not None:
+                    root_counts[root] += 1
+                elif not stack or stack[0] in IDLE_FRAMES:
+                    idle += 1
+                    continue
+                else:
+                    if ident not in threads:
+                        threads = {thread.ident: thread.name for thread in threading.enumerate()}
+                    root = _thread_label(threads.get(ident))
+                stack.append(root)
+                stack.reverse()
+                stacks[";".join(stack)] += 1
+                methods.update(seen)
+            frame = None
+            ticks += 1
+            next_tick += interval
+            time.sleep(max(next_tick - time.perf_counter(), 0.0))
+        return {
+            "seconds": time.perf_counter() - started,
+            "ticks": ticks,
+            "stacks": dict(stacks),
+            "roots": dict(root_counts),
+            "methods": dict(methods),
+            "idle": idle,
+        }
+    finally:
+        _active.release()
+
+
+def collapsed(result, prefix=None):
+    lines = []
+    for stack, count in sorted(result["stacks"].items()):
+        lines.append(f"{prefix};{stack} {count}" if prefix else f"{stack} {count}")
+    return "\n".join(lines)
+
+
+def summarize(result):
+    """Seconds per root and per labelled method, largest first."""
+    per_tick = result["seconds"] / result["ticks"] if result["ticks"] else 0.0
+
+    def seconds(counts):
+        return {
+            name: round(count * per_tick, 4)
+            for name, count in sorted(counts.items(), key=lambda item: -item[1])
+        }
+
+    return {
+        "seconds": round(result["seconds"], 3),
+        "samples": result["ticks"],
+        "idleSamples": result["idle"],
+        "routes": seconds(result["roots"]),
+        "methods": seconds(result["methods"]),
+    }
@@ -0,0 +1,260 @@
+"""Binary frame publisher for PLCs, historians and other local consumers.
+
+Every published frame is one datagram, little-endian:
+
+    offset  size  field
+    0       4     magic b"CMFR"
+    4       1     version (1)
+    5       1     flags (0)
+    6       2     cell count N (uint16)
+    8       8     frame sequence number (uint64)
+    16      8     timestamp, seconds since the epoch (float64)
+    24      4*N   calibrated force per cell (float32)
+
+The datagram is encoded once per frame on the acquisition thread and handed
+to a sender thread through a bounded queue; when the queue is full the frame
+is dropped and counted instead of delaying acquisition.
+"""
+import ipaddress
+import logging
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+
+logger = logging.getLogger('CMeasure.Publisher')
+
+MAGIC = b"CMFR"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHQd")
+DEFAULT_QUEUE_SIZE = 1024
+REOPEN_INTERVAL = 1.0
+
+DEFAULT_PUBLISHER_CONFIG = {
+    "enabled": False,
+    "rateHz": 0.0,
+    "queueSize": DEFAULT_QUEUE_SIZE,
+    "sinks": [],
+}
+
+
+def frame_struct(count):
+    return struct.Struct(f"<4sBBHQd{count}f")
+
+
+class UdpSink:
+    """UDP unicast or multicast (chosen by the destination address)."""
+
+    def __init__(self, config):
+        self.host = str(config.get("host") or "127.0.0.1")
+        self.port = int(config.get("port", 5005))
+        if not 0 < self.port < 65536:
+            raise ValueError("Invalid UDP port")
+        self.multicast = ipaddress.ip_address(socket.gethostbyname(self.host)).is_multicast
+        self.sent = 0
+        self.errors = 0
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        if self.multicast:
+            self._sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, int(config.get("ttl", 1)))
+            interface = config.get("interface")
+            if interface:
+                self._sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(interface))
+        self._address = (self.host, self.port)
+
+    def send(self, data):
+        self._sock.sendto(data, self._address)
+
+    def describe(self):
+        return {"type": "udp", "host": self.host, "port": self.port, "multicast": self.multicast}
+
+    def close(self):
+        self._sock.close()
+
+
+class FileSink:
+    """Appends datagrams back to back to a file (fixed record size per cell count)."""
+
+    def __init__(self, config):
+        path = config.get("path")
+        if not path:
+            raise ValueError("File sink needs a path")
+        self.path = str(path)
+        self.sent = 0
+        self.errors = 0
+        self._handle = open(self.path, "ab")
+        self._flushed = time.monotonic()
+
+    def send(self, data):
+        self._handle.write(data)
+        now = time.monotonic()
+        if now - self._flushed >= 1.0:
+            self._handle.flush()
+            self._flushed = now
+
+    def describe(self):
+        return {"type": "file", "path": self.path}
+
+    def close(self):
+        self._handle.close()
+
+
+class PipeSink:
+    """Writes datagrams to a named pipe (FIFO, or \\\\.\\pipe\\name on Windows) created by the consumer.
+
+    Frames are dropped while no reader has the pipe open; the sink retries
+    opening it once a second.
+    """
+
+    def __init__(self, config):
+        path = config.get("path")
+        if not path:
+            raise ValueError("Pipe sink needs a path")
+        self.path = str(path)
+        self.sent = 0
+        self.errors = 0
+        self._fd = None
+        self._handle = None
+        self._retry_at = 0.0
+
+    def _open(self):
+        now = time.monotonic()
+        if now < self._retry_at:
+            raise OSError("Pipe not connected")
+        self._retry_at = now + REOPEN_INTERVAL
+        if os.name == "nt":
+            self._handle = open(self.path, "wb", buffering=0)
+        else:
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_NONBLOCK)
+
+    def send(self, data):
+        if self._fd is None and self._handle is None:
+            self._open()
+        try:
+            if self._handle is not None:
+                self._handle.write(data)
+            else:
+                os.write(self._fd, data)
+        except BlockingIOError:
+            # Reader is behind: drop this frame but keep the pipe open.
+            raise
+        except OSError:
+            self.close()
+            raise
+
+    def describe(self):
+        return {"type": "pipe", "path": self.path, "connected": self._fd is not None or self._handle is not None}
+
+    def close(self):
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+SINK_TYPES = {
+    "udp": UdpSink,
+    "file": FileSink,
+    "pipe": PipeSink,
+}
+
+
+def build_sink(config):
+    sink_type = config.get("type") if isinstance(config, dict) else None
+    if sink_type not in SINK_TYPES:
+        raise ValueError(f"Unknown publisher sink: {sink_type}")
+    return SINK_TYPES[sink_type](config)
+
+
+def normalize_publisher_config(config):
+    merged = dict(DEFAULT_PUBLISHER_CONFIG)
+    for key, value in (config or {}).items():
+        if key not in DEFAULT_PUBLISHER_CONFIG:
+            continue
+        if key == "enabled":
+            merged[key] = bool(value)
+        elif key == "sinks":
+            if not isinstance(value, list):
+                raise ValueError("sinks must be a list")
+            merged[key] = [dict(sink) for sink in value]
+        elif key == "queueSize":
+            merged[key] = max(int(value), 1)
+        else:
+            merged[key] = max(float(value), 0.0)
+    return merged
+
+
+class FramePublisher:
+    """Frame listener that encodes frames once and fans them out to the configured sinks."""
+
+    def __init__(self, count, config=None):
+        self.count = count
+        self.config = normalize_publisher_config(config)
+        self.sinks = []
+        try:
+            for sink in self.config["sinks"]:
+                self.sinks.append(build_sink(sink))
+        except Exception:
+            # Do not leak the sockets and files of the sinks built before the failing one.
+            for sink in self.sinks:
+                sink.close()
+            raise
+        self._frame = frame_struct(count)
+        self._min_interval = 1.0 / self.config["rateHz"] if self.config["rateHz"] else 0.0
+        self._last_time = None
+        self._queue = queue.Queue(maxsize=self.config["queueSize"])
+        self.published = 0
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._sender, name="frame-publisher", daemon=True)
+        self._thread.start()
+
+    def publish(self, seq, timestamp, values):
+        if self._min_interval:
+            # Small tolerance so a frame arriving slightly early does not halve the rate.
+            if self._last_time is not None and timestamp - self._last_time < self._min_interval * 0.95:
+                return
+            self._last_time = timestamp
+        data = self._frame.pack(MAGIC, VERSION, 0, self.count, seq, timestamp, *values[:self.count])
+        try:
+            self._queue.put_nowait(data)
+        except queue.Full:
+            self.dropped += 1
+
+    def _sender(self):
+        while True:
+            data = self._queue.get()
+            if data is None:
+                break
+            for sink in self.sinks:
+                try:
+                    sink.send(data)
+                    sink.sent += 1
+                except OSError:
+                    sink.errors += 1
+            self.published += 1
+
+    def describe(self):
+        return {
+            "config": self.config,
+            "published": self.published,
+            "dropped": self.dropped,
+            "queued": self._queue.qsize(),
+            "sinks": [dict(sink.describe(), sent=sink.sent, errors=sink.errors) for sink in self.sinks],
+        }
+
+    def close(self):
+        try:
+            while True:
+                self._queue.get_nowait()
+        except queue.Empty:
+            pass
+        self._queue.put_nowait(None)
+        self._thread.join(timeout=1.0)
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except OSError:
+                pass
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+cmeasure-record: headless session recorder.
+
+Connects to the load cells through PhidgetService, optionally zeroes them
+and records frames to a session file (data/sessions/Session_*.cms) without
+starting the HTTP server or the UI. Progress goes to stderr; the session
+file name is printed on stdout when recording stops.
+
+Usage:
+    python backend/record.py --duration 3600 --rate 10 --name rig3
+    python backend/record.py --zero            # until Ctrl+C / SIGTERM
+"""
+import argparse
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+
+from phidget_service import PhidgetService
+from settings import load_settings
+from storage import Storage, default_data_dir
+
+logger = logging.getLogger('CMeasure.Record')
+
+
+class SessionRecorder:
+    """Frame listener writing at most `rate` frames per second to a session."""
+
+    def __init__(self, writer, rate=None):
+        self.writer = writer
+        self.min_interval = 1.0 / rate if rate else 0.0
+        self.frames = 0
+        self.seen = 0
+        self._last_time = None
+        self._lock = threading.Lock()
+
+    def __call__(self, seq, timestamp, values):
+        with self._lock:
+            self.seen += 1
+            if self.min_interval and self._last_time is not None:
+                if timestamp - self._last_time < self.min_interval * 0.95:
+                    return
+            self._last_time = timestamp
+            self.writer.append(timestamp, values)
+            self.frames += 1
+
+    def close(self):
+        with self._lock:
+            self.writer.close()
+
+
+def _install_signal_handlers(stop):
+    def handler(signum, frame):
+        stop.set()
+
+    signal.signal(signal.SIGINT, handler)
+    signal.signal(signal.SIGTERM, handler)
+    if hasattr(signal, "SIGBREAK"):
+        signal.signal(signal.SIGBREAK, handler)
+
+
+def _wait_connected(service, timeout, stop):
+    deadline = time.monotonic() + timeout
+    while not stop.is_set() and time.monotonic() < deadline:
+        if service.connected and service.frame_seq:
+            return True
+        stop.wait(0.1)
+    return service.connected
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="cmeasure-record", description="Record C-Measure sessions without the UI")
+    parser.add_argument("--name", help="Session name (part of the file name)")
+    parser.add_argument("--duration", type=float, default=0.0, help="Seconds to record (0 = until interrupted)")
+    parser.add_argument("--rate", type=float, default=0.0, help="Frames per second to keep (0 = every frame)")
+    parser.add_argument("--zero", action="store_true", help="Zero all cells before recording")
+    parser.add_argument("--data-dir", help="Data directory (default: settings / CMEASURE_DATA_DIR)")
+    parser.add_argument("--simulate", action="store_true", help="Use simulated sensors")
+    parser.add_argument("--local", action="store_true", help="Use locally attached Phidgets instead of the network bridge")
+    parser.add_argument("--connect-timeout", type=float, default=30.0, help="Seconds to wait for the sensors")
+    parser.add_argument("--stats-interval", type=float, default=5.0, help="Seconds between progress lines")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    settings = load_settings()
+    data_dir = args.data_dir or os.getenv("CMEASURE_DATA_DIR") or settings.get("dataDir") or default_data_dir()
+    simulate = True if args.simulate else settings.get("simulate")
+    storage = Storage(data_dir)
+    service = PhidgetService(
+        storage,
+        num_ports=int(settings.get("numPorts", 6)),
+        num_channels=int(settings.get("numChannels", 2)),
+        simulate=simulate,
+    )
+
+    stop = threading.Event()
+    _install_signal_handlers(stop)
+    service.connect(use_remote=not args.local)
+    if not _wait_connected(service, args.connect_timeout, stop):
+        print("Sensors did not connect", file=sys.stderr)
+        service.disconnect()
+        return 2
+    if args.zero:
+        service.zero_set()
+
+    writer = storage.create_session(
+        service.num_ids,
+        name=args.name,
+        metadata={
+            "sampleRate": service.sample_rate,
+            "unit": "N",
+            "heightsCm": service.heights,
+            "recordRateHz": args.rate or None,
+            "source": "cmeasure-record",
+        },
+    )
+    recorder = SessionRecorder(writer, rate=args.rate or None)
+    service.add_frame_listener(recorder)
+    started = time.monotonic()
+    print(f"Recording {writer.path}", file=sys.stderr)
+
+    last_report = started
+    last_frames = 0
+    while not stop.is_set():
+        now = time.monotonic()
+        remaining = started + args.duration - now if args.duration else None
+        if remaining is not None and remaining <= 0:
+            break
+        wait = args.stats_interval if remaining is None else min(args.stats_interval, remaining)
+        if stop.wait(wait):
+            break
+        now = time.monotonic()
+        frames = recorder.frames
+        rate = (frames - last_frames) / (now - last_report) if now > last_report else 0.0
+        try:
+            size = os.path.getsize(writer.path)
+        except OSError:
+            size = 0
+        print(
+            f"{now - started:9.1f}s  frames {frames}  {rate:7.1f}/s  seen {recorder.seen}  {size / 1e6:8.2f} MB",
+            file=sys.stderr,
+        )
+        last_report = now
+        last_frames = frames
+
+    service.remove_frame_listener(recorder)
+    recorder.close()
+    service.disconnect()
+    elapsed = time.monotonic() - started
+    rate = recorder.frames / elapsed if elapsed > 0 else 0.0
+    print(f"Stopped after {elapsed:.1f}s: {recorder.frames} frames ({rate:.1f}/s)", file=sys.stderr)
+    print(writer.path.name)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,19 +3,23 @@ import io
 import json
 import logging
 import mimetypes
+import multiprocessing
 import os
 import re
 import subprocess
 import sys
 import tempfile
 import threading
+import time
 import uuid
 from datetime import datetime
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from urllib.parse import urlparse
+from urllib.parse import parse_qs, urlparse
 from xml.sax.saxutils import escape as xml_escape
 
+STARTED = time.perf_counter()
+
 
 def _extract_serial_from_filename(filename):
     if not filename:
@@ -150,48 +154,80 @@ def _next_backup_path(path):
             return candidate
         counter += 1
 
+from acquisition import AcquisitionClient
+from export import EXPORT_FORMATS, export_chunks, measurement_batches, measurement_schema, session_batches, session_schema
+from frame_ring import FrameRingWriter, default_ring_path
+from history import downsample, downsample_session
+from metrics import WrapMetrics, cell_heights
 from phidget_service import PhidgetService
+from profiler import DEFAULT_INTERVAL, MAX_SECONDS as MAX_PROFILE_SECONDS, code_labels, collapsed, sample_stacks, summarize
 from settings import load_settings, save_settings, get_data_dir
 from storage import Storage, default_data_dir
+from wire import MEASUREMENTS_TYPE, PLOT_TYPE, encode_measurements, encode_plot, wants_binary
 
 # Minimal logging - only errors to console
 logging.basicConfig(level=logging.WARNING)
 logger = logging.getLogger('CMeasure')
 
+# API requests (other than /api/health) arriving before the service is up wait this long.
+STARTUP_WAIT_SECONDS = 30.0
+# Upper bound for /api/status?wait=, well below the acquisition call timeout.
+STATUS_WAIT_MAX_SECONDS = 25.0
+
 
 class ApiHandler(BaseHTTPRequestHandler):
     server_version = "CMeasureHTTP/0.1"
 
     def do_GET(self):
-        if self.path.startswith("/api/"):
-            self._handle_api_get()
+        if urlparse(self.path).path == "/api/health":
+            self._send_json({"status": "ok", "ready": self.server.ready.is_set()})
+        elif self.path.startswith("/api/"):
+            if self._wait_ready():
+                self._handle_api_get()
         else:
             self._serve_static()
 
     def do_POST(self):
         if self.path.startswith("/api/"):
-            self._handle_api_post()
+            if self._wait_ready():
+                self._handle_api_post()
         else:
             self.send_error(404)
 
     def do_PUT(self):
         if self.path.startswith("/api/"):
-            self._handle_api_put()
+            if self._wait_ready():
+                self._handle_api_put()
         else:
             self.send_error(404)
 
+    def _wait_ready(self):
+        server = self.server
+        if server.startup_error is None:
+            server.ready.wait(STARTUP_WAIT_SECONDS)
+        if server.ready.is_set():
+            return True
+        self._send_json({"error": server.startup_error or "Backend is still starting"}, status=503)
+        return False
+
     def _handle_api_get(self):
         route = urlparse(self.path).path
-        if route == "/api/health":
-            return self._send_json({"status": "ok"})
         if route == "/api/status":
+            query = self._query()
+            try:
+                since = int(query["since"]) if query.get("since") else None
+                wait = min(max(float(query.get("wait") or 0), 0.0), STATUS_WAIT_MAX_SECONDS)
+            except ValueError:
+                return self._send_json({"error": "Invalid query parameters"}, status=400)
+            state = self.server.service.wait_status(since, wait)
             bridge = self.server.service.get_bridge_status()
-            statuses = self.server.service.get_statuses()
-            connected = self.server.service.connected
+            statuses = state["statuses"]
+            connected = state["connected"]
             if bridge and not bridge.get("simulated") and bridge.get("reachable") is False:
                 statuses = ["Disconnected" for _ in statuses]
                 connected = False
             return self._send_json({
+                "version": state["version"],
                 "connected": connected,
                 "simulate": self.server.service.simulate,
                 "statuses": statuses,
@@ -199,22 +235,58 @@ class ApiHandler(BaseHTTPRequestHandler):
                 "calibrationMissing": self.server.storage.calibration_missing,
             })
         if route == "/api/measurements":
-            values = self.server.service.get_measurements()
-            raw_values = self.server.service.get_raw_values()
-            statuses = self.server.service.get_statuses()
-            bridge = self.server.service.get_bridge_status()
+            snapshot = self.server.service.measurement_snapshot()
+            values = snapshot["values"]
+            raw_values = snapshot["raw"]
+            statuses = snapshot["statuses"]
+            bridge = snapshot["bridge"]
             if bridge and not bridge.get("simulated") and bridge.get("reachable") is False:
                 statuses = ["Disconnected" for _ in statuses]
+            unfiltered, raw_unfiltered = snapshot["unfiltered"], snapshot["rawUnfiltered"]
+            stats = snapshot["stats"]
+            if wants_binary(self.headers.get("Accept"), self._query()):
+                return self._send_bytes(
+                    encode_measurements(
+                        values, raw_values, statuses, unfiltered, raw_unfiltered, stats, snapshot["statsResetAt"],
+                    ),
+                    content_type=MEASUREMENTS_TYPE,
+                    vary="Accept",
+                )
             items = []
             for idx, value in enumerate(values):
-                items.append({
+                item = {
                     "id": idx,
                     "status": statuses[idx] if idx < len(statuses) else "Unknown",
                     "value": value,
                     "raw": raw_values[idx] if idx < len(raw_values) else None,
                     "unit": "N",
-                })
-            return self._send_json({"measurements": items})
+                }
+                if unfiltered is not None:
+                    item["valueUnfiltered"] = unfiltered[idx] if idx < len(unfiltered) else None
+                    item["rawUnfiltered"] = raw_unfiltered[idx] if idx < len(raw_unfiltered) else None
+                if idx < len(stats):
+                    item["peak"] = stats[idx]["peak"]
+                    item["valley"] = stats[idx]["valley"]
+                    item["mean"] = stats[idx]["mean"]
+                    item["std"] = stats[idx]["std"]
+                items.append(item)
+            return self._send_json({
+                "measurements": items,
+                "metrics": snapshot["metrics"],
+                "statsResetAt": snapshot["statsResetAt"],
+            }, vary="Accept")
+        if route == "/api/live":
+            query = self._query()
+            try:
+                since = int(query["since"]) if query.get("since") else None
+                status_version = int(query["statusVersion"]) if query.get("statusVersion") else None
+            except ValueError:
+                return self._send_json({"error": "Invalid query parameters"}, status=400)
+            statuses = self.server.service.get_statuses()
+            bridge = self.server.service.get_bridge_status()
+            if bridge and not bridge.get("simulated") and bridge.get("reachable") is False:
+                statuses = ["Disconnected" for _ in statuses]
+            return self._send_json(self.server.service.live.changes(since, status_version, statuses))
         if route == "/api/calibration":
             settings = load_settings()
             return self._send_json({
@@ -240,8 +312,47 @@ class ApiHandler(BaseHTTPRequestHandler):
                 content_type="text/csv; charset=utf-8",
                 filename=calibration_path.name,
             )
+        if route == "/api/filters":
+            return self._send_json({
+                "filters": self.server.service.filters.describe(),
+                "sampleRate": self.server.service.sample_rate,
+            })
         if route == "/api/tests":
             return self._send_json({"files": self.server.storage.list_measurements()})
+        if route == "/api/sessions":
+            return self._send_json({
+                "sessions": self.server.storage.list_sessions(),
+                "recording": self.server.service.session_info(),
+            })
+        if route == "/api/history/plot":
+            return self._handle_history_plot()
+        if route == "/api/export":
+            return self._handle_export()
+        if route == "/api/triggers":
+            try:
+                since = int(self._query().get("since", 0))
+            except ValueError:
+                return self._send_json({"error": "Invalid since"}, status=400)
+            triggers = self.server.service.triggers
+            return self._send_json({"triggers": triggers.describe(), "events": triggers.events_since(since)})
+        if route == "/api/diagnostics":
+            diagnostics = self.server.service.diagnostics
+            if self._query().get("refresh") in ("1", "true"):
+                diagnostics.request_run()
+            return self._send_json({
+                "config": diagnostics.config,
+                "runs": diagnostics.runs,
+                "results": diagnostics.results,
+            })
+        if route == "/api/publisher":
+            return self._send_json(self.server.service.publisher_status())
+        if route == "/api/cycles":
+            service = self.server.service
+            return self._send_json({
+                "config": service.cycles.config,
+                "status": service.cycles.status(),
+                "recent": list(service.recent_cycles),
+            })
         if route == "/api/settings":
             return self._send_json({
                 "dataDir": str(self.server.storage.data_dir),
@@ -253,6 +364,13 @@ class ApiHandler(BaseHTTPRequestHandler):
             info = dict(self.server.system_info)
             info["wifiSsid"] = settings.get("wifiSsid")
             info["lastCalibrationAt"] = self.server.storage.calibration_timestamp
+            info["startup"] = self.server.startup.describe()
+            info["startup"]["deferred"] = self.server.service.get_load_timings()
+            return self._send_json(info)
+        if route == "/api/system/runtime":
+            info = process_runtime_info()
+            if isinstance(self.server.service, AcquisitionClient):
+                info["acquisitionPid"] = self.server.service.pid
             return self._send_json(info)
         if route == "/api/wifi/networks":
             items, code, output = list_wifi_networks()
@@ -272,6 +390,8 @@ class ApiHandler(BaseHTTPRequestHandler):
                 "connected": self.server.service.connected,
                 "statuses": self.server.service.get_statuses(),
             })
+        if route == "/api/system/profile":
+            return self._handle_profile(self._read_json())
         if route == "/api/disconnect":
             self.server.service.disconnect()
             return self._send_json({
@@ -336,24 +456,59 @@ class ApiHandler(BaseHTTPRequestHandler):
             data_a = self.server.storage.read_measurement(file_a) if file_a else []
             data_b = self.server.storage.read_measurement(file_b) if file_b else []
             size = max(len(data_a), len(data_b))
-            heights = [15 * (i + 1) for i in range(size)]
+            heights = cell_heights(size, load_settings())
+            metrics = WrapMetrics(heights)
             return self._send_json({
                 "fileA": file_a,
                 "fileB": file_b,
                 "heightsCm": heights,
                 "valuesA": data_a,
                 "valuesB": data_b,
+                "metricsA": self._measurement_metrics(file_a, data_a, metrics),
+                "metricsB": self._measurement_metrics(file_b, data_b, metrics),
             })
         if route == "/api/reports/single":
             payload = self._read_json()
             file_name = payload.get("file")
             data = self.server.storage.read_measurement(file_name) if file_name else []
-            heights = [15 * (i + 1) for i in range(len(data))]
+            heights = cell_heights(len(data), load_settings())
             return self._send_json({
                 "file": file_name,
                 "heightsCm": heights,
                 "values": data,
+                "metrics": self._measurement_metrics(file_name, data, WrapMetrics(heights)),
             })
+        if route == "/api/sessions/start":
+            payload = self._read_json()
+            name = payload.get("name") if isinstance(payload, dict) else None
+            return self._send_json({"recording": self.server.service.start_session(name=name)})
+        if route == "/api/sessions/stop":
+            return self._send_json({"recording": self.server.service.stop_session()})
+        if route == "/api/triggers":
+            payload = self._read_json()
+            if not isinstance(payload, dict):
+                return self._send_json({"error": "Invalid trigger"}, status=400)
+            try:
+                trigger = self.server.service.triggers.arm(payload)
+            except (TypeError, ValueError) as err:
+                return self._send_json({"error": str(err)}, status=400)
+            return self._send_json({"trigger": trigger})
+        if route == "/api/triggers/disarm":
+            payload = self._read_json()
+            trigger_id = payload.get("id") if isinstance(payload, dict) else None
+            try:
+                trigger_id = int(trigger_id) if trigger_id is not None else None
+            except (TypeError, ValueError):
+                return self._send_json({"error": "Invalid trigger id"}, status=400)
+            return self._send_json({"disarmed": self.server.service.triggers.disarm(trigger_id)})
+        if route == "/api/stats/reset":
+            payload = self._read_json()
+            cell = payload.get("cell") if isinstance(payload, dict) else None
+            try:
+                self.server.service.reset_stats(int(cell) if cell is not None else None)
+            except (TypeError, ValueError):
+                return self._send_json({"error": "Invalid cell index"}, status=400)
+            return self._send_json({"status": "ok", "statsResetAt": self.server.service.stats.reset_at})
         if route == "/api/zero":
             self.server.service.zero_set()
             return self._send_json({"status": "ok"})
@@ -426,10 +581,9 @@ class ApiHandler(BaseHTTPRequestHandler):
             plot_max_x = payload.get("plotMaxX") if isinstance(payload, dict) else None
             if data_dir:
                 self.server.storage.set_data_dir(data_dir)
-                self.server.service.storage = self.server.storage
-                self.server.service.refresh_calibration()
+                self.server.service.set_data_dir(str(self.server.storage.data_dir))
             if simulate is not None:
-                self.server.service._simulate = bool(simulate)
+                self.server.service.set_simulate(simulate)
             settings = load_settings()
             settings["dataDir"] = str(self.server.storage.data_dir)
             settings["simulate"] = self.server.service.simulate
@@ -446,6 +600,55 @@ class ApiHandler(BaseHTTPRequestHandler):
                 "simulate": self.server.service.simulate,
                 "plotMaxX": settings.get("plotMaxX"),
             })
+        if route == "/api/filters":
+            payload = self._read_json()
+            config = payload.get("filters") if isinstance(payload, dict) else None
+            if not isinstance(config, list):
+                return self._send_json({"error": "Invalid filter configuration"}, status=400)
+            try:
+                filters = self.server.service.configure_filters(config)
+            except (TypeError, ValueError) as err:
+                return self._send_json({"error": str(err)}, status=400)
+            settings = load_settings()
+            settings["filters"] = filters
+            save_settings(settings)
+            return self._send_json({"filters": filters, "sampleRate": self.server.service.sample_rate})
+        if route == "/api/cycles":
+            payload = self._read_json()
+            if not isinstance(payload, dict):
+                return self._send_json({"error": "Invalid cycle detection settings"}, status=400)
+            try:
+                config = self.server.service.configure_cycles(payload)
+            except (TypeError, ValueError) as err:
+                return self._send_json({"error": str(err)}, status=400)
+            settings = load_settings()
+            settings["cycleDetection"] = config
+            save_settings(settings)
+            return self._send_json({"config": config})
+        if route == "/api/diagnostics":
+            payload = self._read_json()
+            if not isinstance(payload, dict):
+                return self._send_json({"error": "Invalid diagnostics settings"}, status=400)
+            try:
+                config = self.server.service.diagnostics.configure(payload)
+            except (TypeError, ValueError) as err:
+                return self._send_json({"error": str(err)}, status=400)
+            settings = load_settings()
+            settings["diagnostics"] = config
+            save_settings(settings)
+            return self._send_json({"config": config})
+        if route == "/api/publisher":
+            payload = self._read_json()
+            if not isinstance(payload, dict):
+                return self._send_json({"error": "Invalid publisher settings"}, status=400)
+            try:
+                config = self.server.service.configure_publisher(payload)
+            except (TypeError, ValueError, OSError) as err:
+                return self._send_json({"error": str(err)}, status=400)
+            settings = load_settings()
+            settings["publisher"] = config
+            save_settings(settings)
+            return self._send_json(self.server.service.publisher_status())
         if route == "/api/system/serial":
             payload = self._read_json()
             serial = payload.get("serial")
@@ -484,6 +687,165 @@ class ApiHandler(BaseHTTPRequestHandler):
             return self._send_json({"status": "ok"})
         self.send_error(404)
 
+    def _measurement_metrics(self, file_name, values, metrics):
+        """Metrics stored when the measurement was recorded; computed for older recordings without them."""
+        stored = self.server.storage.read_measurement_metrics(file_name) if file_name else None
+        return stored if stored is not None else metrics.compute(values)
+
+    def _query(self):
+        params = parse_qs(urlparse(self.path).query)
+        return {key: values[-1] for key, values in params.items() if values}
+
+    def _handle_history_plot(self):
+        query = self._query()
+        service = self.server.service
+        try:
+            width = int(query.get("width", 800))
+            cells = [int(c) for c in query["cells"].split(",") if c.strip()] if query.get("cells") else None
+            start = float(query["start"]) if query.get("start") else None
+            end = float(query["end"]) if query.get("end") else None
+            last = float(query["last"]) if query.get("last") else None
+        except ValueError:
+            return self._send_json({"error": "Invalid query parameters"}, status=400)
+        method = query.get("method", "minmax")
+        if method not in ("minmax", "lttb"):
+            return self._send_json({"error": "Unknown method"}, status=400)
+        if width <= 0:
+            return self._send_json({"error": "Invalid width"}, status=400)
+        session_name = query.get("session")
+        if session_name:
+            reader = self.server.storage.open_session(session_name)
+            if reader is None:
+                return self._send_json({"error": "Session not found"}, status=404)
+            with reader:
+                cells = [c for c in (cells if cells is not None else range(reader.cells)) if 0 <= c < reader.cells]
+                if not reader.frames:
+                    return self._send_plot(session_name, method, None, None, {}, [])
+                end = reader.end_time if end is None else end
+                start = (end - last if last else reader.start_time) if start is None else start
+                reduced = downsample_session(reader, cells, start, end, width, method)
+        else:
+            cells = [c for c in (cells if cells is not None else range(service.num_ids)) if 0 <= c < service.num_ids]
+            latest = service.history.latest()
+            if latest is None:
+                return self._send_plot("live", method, None, None, {}, [])
+            end = latest[1] if end is None else end
+            if start is None and last:
+                start = end - last
+            times, series = service.history.snapshot(start, end, cells)
+            if not times:
+                return self._send_plot("live", method, None, None, {}, [])
+            start = times[0] if start is None else start
+            reduced = {cell: downsample(times, series[cell], start, end, width, method) for cell in cells}
+        return self._send_plot(session_name or "live", method, start, end, reduced, cells)
+
+    def _send_plot(self, source, method, start, end, reduced, cells):
+        cells = [cell for cell in cells if cell in reduced]
+        if wants_binary(self.headers.get("Accept"), self._query()):
+            nan = float("nan")
+            payload = encode_plot(
+                method,
+                nan if start is None else start,
+                nan if end is None else end,
+                [(cell, reduced[cell][0], reduced[cell][1]) for cell in cells],
+            )
+            return self._send_bytes(payload, content_type=PLOT_TYPE, vary="Accept")
+        payload = {"source": source, "method": method}
+        if start is not None:
+            payload["start"] = start
+            payload["end"] = end
+        payload["series"] = [
+            {"cell": cell, "t": list(reduced[cell][0]), "v": list(reduced[cell][1])}
+            for cell in cells
+        ]
+        return self._send_json(payload, vary="Accept")
+
+    def _handle_profile(self, payload):
+        try:
+            seconds = float(payload.get("seconds", 10))
+            interval = float(payload.get("intervalMs", DEFAULT_INTERVAL * 1000)) / 1000.0
+        except (TypeError, ValueError):
+            return self._send_json({"error": "Invalid seconds or intervalMs"}, status=400)
+        if not 0 < seconds <= MAX_PROFILE_SECONDS:
+            return self._send_json({"error": f"seconds must be between 0 and {MAX_PROFILE_SECONDS:g}"}, status=400)
+        fmt = payload.get("format", "json")
+        if fmt not in ("json", "collapsed"):
+            return self._send_json({"error": "Unknown format"}, status=400)
+        service = self.server.service
+        remote = {}
+        worker = None
+        if isinstance(service, AcquisitionClient):
+            # PhidgetService runs in the acquisition process; profile it there at the same time.
+            def run_remote():
+                try:
+                    remote["result"] = service.profile(seconds, interval)
+                except Exception as e:
+                    remote["error"] = str(e)
+
+            worker = threading.Thread(target=run_remote, name="profile-acquisition", daemon=True)
+            worker.start()
+        roots = {getattr(ApiHandler, name).__code__: _request_label for name in ("do_GET", "do_POST", "do_PUT")}
+        try:
+            result = sample_stacks(
+                seconds,
+                interval,
+                labels=code_labels([ApiHandler, type(service), Storage]),
+                roots=roots,
+                exclude=[worker.ident] if worker else (),
+            )
+        except RuntimeError as e:
+            return self._send_json({"error": str(e)}, status=409)
+        if worker:
+            worker.join(seconds + 5.0)
+        stacks = collapsed(result)
+        if "result" in remote:
+            stacks += "\n" + collapsed(remote["result"], prefix="acquisition")
+        if fmt == "collapsed":
+            return self._send_bytes((stacks + "\n").encode("utf-8"), content_type="text/plain; charset=utf-8")
+        summary = summarize(result)
+        if worker:
+            summary["acquisition"] = summarize(remote["result"]) if "result" in remote else {
+                "error": remote.get("error", "Acquisition process did not answer"),
+            }
+        summary["collapsed"] = stacks
+        return self._send_json(summary)
+
+    def _handle_export(self):
+        query = self._query()
+        fmt = query.get("format", "csv")
+        if fmt not in EXPORT_FORMATS:
+            return self._send_json({"error": "Unknown format"}, status=400)
+        content_type, suffix = EXPORT_FORMATS[fmt]
+        storage = self.server.storage
+        session_name = query.get("session")
+        if session_name:
+            try:
+                cells = [int(c) for c in query["cells"].split(",") if c.strip()] if query.get("cells") else None
+                start = float(query["start"]) if query.get("start") else None
+                end = float(query["end"]) if query.get("end") else None
+            except ValueError:
+                return self._send_json({"error": "Invalid query parameters"}, status=400)
+            reader = storage.open_session(session_name)
+            if reader is None:
+                return self._send_json({"error": "Session not found"}, status=404)
+            cells = [c for c in (cells if cells is not None else range(reader.cells)) if 0 <= c < reader.cells]
+            schema = session_schema(cells)
+            batches = session_batches(reader, cells, start, end)
+            filename = Path(session_name).stem + suffix
+        elif query.get("measurements"):
+            names = query["measurements"].split(",")
+            if names == ["all"]:
+                names = storage.list_measurements()
+            paths = [storage.measurement_path(name.strip()) for name in names]
+            if None in paths:
+                return self._send_json({"error": "Measurement not found"}, status=404)
+            schema = measurement_schema()
+            batches = measurement_batches(paths)
+            filename = (paths[0].stem if len(paths) == 1 else "Measurements") + suffix
+        else:
+            return self._send_json({"error": "session or measurements required"}, status=400)
+        self._send_stream(export_chunks(fmt, schema, batches), content_type, filename=filename)
+
     def _serve_static(self):
         ui_dir = Path(self.server.ui_dir)
         path = urlparse(self.path).path
@@ -514,28 +876,98 @@ class ApiHandler(BaseHTTPRequestHandler):
         except json.JSONDecodeError:
             return {}
 
-    def _send_bytes(self, payload, content_type="application/octet-stream", status=200, filename=None):
+    def _send_bytes(self, payload, content_type="application/octet-stream", status=200, filename=None, vary=None):
         data = payload if isinstance(payload, (bytes, bytearray)) else bytes(payload)
         self.send_response(status)
         self.send_header("Content-Type", content_type)
         self.send_header("Content-Length", str(len(data)))
         self.send_header("Cache-Control", "no-store")
+        if vary:
+            self.send_header("Vary", vary)
         if filename:
             safe_filename = str(filename).replace('"', "")
             self.send_header("Content-Disposition", f'attachment; filename="{safe_filename}"')
         self.end_headers()
         self.wfile.write(data)
 
-    def _send_json(self, payload, status=200):
+    def _send_stream(self, chunks, content_type, filename=None):
+        """Send an iterable of byte chunks without knowing the total size (chunked for HTTP/1.1 clients)."""
+        chunked = self.request_version == "HTTP/1.1"
+        if chunked:
+            # Chunked transfer encoding needs an HTTP/1.1 status line; the connection still closes afterwards.
+            self.protocol_version = "HTTP/1.1"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Cache-Control", "no-store")
+        self.send_header("Connection", "close")
+        if chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        if filename:
+            safe_filename = str(filename).replace('"', "")
+            self.send_header("Content-Disposition", f'attachment; filename="{safe_filename}"')
+        self.end_headers()
+        self.close_connection = True
+        try:
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                if chunked:
+                    self.wfile.write(b"%X\r\n%s\r\n" % (len(chunk), chunk))
+                else:
+                    self.wfile.write(chunk)
+            if chunked:
+                self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            logger.info("Client closed the connection during a streamed response")
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+
+    def _send_json(self, payload, status=200, vary=None):
         data = json.dumps(payload).encode("utf-8")
         self.send_response(status)
         self.send_header("Content-Type", "application/json")
         self.send_header("Content-Length", str(len(data)))
         self.send_header("Cache-Control", "no-store")
+        if vary:
+            self.send_header("Vary", vary)
         self.end_headers()
         self.wfile.write(data)
 
 
+def _request_label(frame):
+    """Route of the request handled in an ApiHandler.do_* frame (root of profiled stacks)."""
+    try:
+        handler = frame.f_locals.get("self")
+        return f"{handler.command} {urlparse(handler.path).path}"
+    except AttributeError:
+        return None
+
+
+class StartupTimer:
+    """Durations of the backend startup phases, reported at /api/system."""
+
+    def __init__(self, started):
+        self.started = started
+        self._last = started
+        self.phases = []
+        self.milestones = {}
+
+    def phase(self, name):
+        now = time.perf_counter()
+        self.phases.append({"name": name, "seconds": round(now - self._last, 4)})
+        self._last = now
+
+    def milestone(self, name):
+        self.milestones[name] = round(time.perf_counter() - self.started, 4)
+
+    def describe(self):
+        info = {"phases": list(self.phases)}
+        info.update(self.milestones)
+        return info
+
+
 class CMeasureServer(ThreadingHTTPServer):
     def __init__(self, server_address, RequestHandlerClass, storage, service, ui_dir):
         super().__init__(server_address, RequestHandlerClass)
@@ -543,6 +975,13 @@ class CMeasureServer(ThreadingHTTPServer):
         self.service = service
         self.ui_dir = ui_dir
         self.system_info = {}
+        self.startup = None
+        # Set once storage and service are assigned; until then only /api/health and static files answer.
+        self.ready = threading.Event()
+        if storage is not None and service is not None:
+            self.ready.set()
+        self.startup_error = None
+        self.frame_ring = None
 
     def update_pairing(self, calibrated_at=None):
         now = calibrated_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -553,12 +992,61 @@ class CMeasureServer(ThreadingHTTPServer):
         save_settings(settings)
 
 
+def _process_memory_bytes():
+    if sys.platform == "win32":
+        try:
+            import ctypes
+            from ctypes import wintypes
+
+            class ProcessMemoryCounters(ctypes.Structure):
+                _fields_ = [
+                    ("cb", wintypes.DWORD),
+                    ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t),
+                    ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t),
+                    ("PeakPagefileUsage", ctypes.c_size_t),
+                ]
+
+            counters = ProcessMemoryCounters()
+            counters.cb = ctypes.sizeof(ProcessMemoryCounters)
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                return int(counters.WorkingSetSize)
+        except Exception:
+            return None
+        return None
+    try:
+        with open("/proc/self/statm", "r") as handle:
+            pages = int(handle.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except Exception:
+        return None
+
+
+def process_runtime_info():
+    return {
+        "pid": os.getpid(),
+        "threads": threading.active_count(),
+        "memoryBytes": _process_memory_bytes(),
+    }
+
+
 def new_pairing_serial():
     return uuid.uuid4().hex[:12].upper()
 
 
-def ensure_system_info():
-    settings = load_settings()
+def ensure_system_info(settings):
     if not settings.get("systemSerial"):
         settings["systemSerial"] = uuid.uuid4().hex[:12].upper()
         save_settings(settings)
@@ -692,14 +1180,9 @@ def auto_connect_wifi(settings):
         print(f"[WiFi] Auto-connect failed for {ssid}: {output}")
 
 
-def main():
-    logger.info("=" * 60)
-    logger.info("C-Measure Backend Starting")
-    logger.info("=" * 60)
-
-    settings = load_settings()
-    system_info = ensure_system_info()
-    settings = load_settings()
+def start_services(server, settings):
+    """Build storage and the acquisition service behind an already listening server."""
+    startup = server.startup
     data_dir = os.getenv("CMEASURE_DATA_DIR") or settings.get("dataDir") or default_data_dir()
     simulate_env = os.getenv("CMEASURE_SIMULATE")
     simulate = settings.get("simulate")
@@ -710,12 +1193,72 @@ def main():
     logger.info(f"Simulation mode: {simulate}")
 
     storage = Storage(data_dir)
+    startup.phase("storage")
     # Default: 6 ports x 2 channels = 12 sensors (same as WrapView)
     num_ports = int(settings.get("numPorts", 6))
     num_channels = int(settings.get("numChannels", 2))
     logger.info(f"Ports: {num_ports}, Channels per port: {num_channels}")
 
-    service = PhidgetService(storage, num_ports=num_ports, num_channels=num_channels, simulate=simulate)
+    acquisition_env = os.getenv("CMEASURE_ACQUISITION_PROCESS")
+    if acquisition_env is not None:
+        use_process = acquisition_env.lower() in ("1", "true", "yes")
+    else:
+        use_process = bool(settings.get("acquisitionProcess"))
+    ring_path = os.getenv("CMEASURE_LIVE_FRAMES") or settings.get("liveFramePath") or default_ring_path()
+    if use_process:
+        logger.info(f"Acquisition process enabled, frame ring: {ring_path}")
+        service = AcquisitionClient(storage, ring_path, num_ports=num_ports, num_channels=num_channels, simulate=simulate)
+    else:
+        service = PhidgetService(
+            storage,
+            num_ports=num_ports,
+            num_channels=num_channels,
+            simulate=simulate,
+            settings=settings,
+        )
+        if settings.get("liveFrames"):
+            try:
+                server.frame_ring = FrameRingWriter(ring_path, service.num_ids, service.history.capacity)
+                service.add_frame_listener(server.frame_ring.append)
+                logger.info(f"Publishing live frames to {ring_path}")
+            except OSError as e:
+                logger.error(f"Could not create live frame ring {ring_path}: {e}")
+    startup.phase("service")
+    # First use of the calibration reads it from disk and sets the storage calibration state.
+    calibration = service.calibration
+    logger.info(f"Calibration loaded for {len(calibration)} cells")
+    if isinstance(service, AcquisitionClient):
+        service.sync_calibration_state()
+    startup.phase("calibration")
+
+    server.storage = storage
+    server.service = service
+    if storage.calibration_timestamp:
+        server.system_info["lastCalibrationAt"] = storage.calibration_timestamp
+    server.ready.set()
+    startup.milestone("readySeconds")
+    service.diagnostics.start()
+    threading.Thread(target=auto_connect_wifi, args=(settings,), daemon=True).start()
+
+
+def _start_services(server, settings):
+    try:
+        start_services(server, settings)
+    except Exception as e:
+        logger.exception("Backend startup failed")
+        server.startup_error = f"Backend startup failed: {e}"
+
+
+def main():
+    logger.info("=" * 60)
+    logger.info("C-Measure Backend Starting")
+    logger.info("=" * 60)
+    startup = StartupTimer(STARTED)
+    startup.phase("imports")
+
+    settings = load_settings()
+    system_info = ensure_system_info(settings)
+    startup.phase("settings")
 
     port = int(os.getenv("CMEASURE_PORT", "8123"))
     ui_dir = os.getenv("CMEASURE_UI_DIR") or str(Path(__file__).resolve().parent.parent / "frontend")
@@ -725,11 +1268,13 @@ def main():
     index_path = Path(ui_dir) / "index.html"
     print(f"index.html exists: {index_path.exists()}")
 
-    server = CMeasureServer(("127.0.0.1", port), ApiHandler, storage, service, ui_dir)
+    # Bind before building the service so /api/health answers while Phidget and storage start up.
+    server = CMeasureServer(("127.0.0.1", port), ApiHandler, None, None, ui_dir)
+    startup.phase("bind")
+    startup.milestone("listeningSeconds")
+    server.startup = startup
     server.system_info = system_info
-    if storage.calibration_timestamp:
-        server.system_info["lastCalibrationAt"] = storage.calibration_timestamp
-    threading.Thread(target=auto_connect_wifi, args=(settings,), daemon=True).start()
+    threading.Thread(target=_start_services, args=(server, settings), name="startup", daemon=True).start()
     logger.info(f"C-Measure backend running on http://127.0.0.1:{port}")
     print(f"C-Measure backend running on http://127.0.0.1:{port}")
     try:
@@ -739,7 +1284,14 @@ def main():
     finally:
         logger.info("Server shutdown")
         server.shutdown()
+        service = server.service
+        if isinstance(service, AcquisitionClient):
+            service.close()
+        if server.frame_ring is not None:
+            service.remove_frame_listener(server.frame_ring.append)
+            server.frame_ring.close()
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main()
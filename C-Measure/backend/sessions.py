@@ -0,0 +1,490 @@
+import json
+import logging
+import lzma
+import operator
+import os
+import queue
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, namedtuple
+from itertools import accumulate, chain
+
+logger = logging.getLogger('CMeasure.Sessions')
+
+SESSION_MAGIC = b"CMSESS1\n"
+BLOCK_SESSION_MAGIC = b"CMSESS2\n"
+SESSION_SUFFIX = ".cms"
+_HEADER_LEN = struct.Struct("<I")
+_TIME = struct.Struct("<d")
+_FLUSH_FRAMES = 256
+
+# Block container (version 2): after the JSON header, a sequence of blocks,
+# each a header (magic, frame count, payload bytes, first and last timestamp),
+# per-cell float32 minimums then maximums, and the compressed payload.
+_BLOCK_MAGIC = b"CMBK"
+_BLOCK_HEADER = struct.Struct("<4sIIdd")
+_CACHED_BLOCKS = 8
+COMPRESSORS = {
+    "zlib": (lambda data, level: zlib.compress(data, level), zlib.decompress),
+    "lzma": (lambda data, level: lzma.compress(data, preset=level), lzma.decompress),
+}
+DEFAULT_SESSION_STORAGE_CONFIG = {
+    "compression": "zlib",
+    "level": 6,
+    "blockFrames": 4096,
+    "blockSeconds": 10.0,
+}
+
+BlockInfo = namedtuple("BlockInfo", ["start", "frames", "first_time", "last_time", "mins", "maxs", "offset", "length"])
+
+
+def normalize_session_storage_config(config):
+    merged = dict(DEFAULT_SESSION_STORAGE_CONFIG)
+    for key, value in (config or {}).items():
+        if key not in DEFAULT_SESSION_STORAGE_CONFIG:
+            continue
+        if key == "compression":
+            if value not in COMPRESSORS and value != "none":
+                raise ValueError(f"Unknown session compression: {value}")
+            merged[key] = value
+        elif key == "level":
+            merged[key] = min(max(int(value), 0), 9)
+        elif key == "blockFrames":
+            merged[key] = min(max(int(value), 16), 65535)
+        else:
+            merged[key] = max(float(value), 0.1)
+    return merged
+
+
+class SessionWriter:
+    """Appends fixed-size frames (float64 timestamp + float32 per cell) to a session file."""
+
+    def __init__(self, path, cells, metadata=None):
+        self.path = path
+        self.cells = int(cells)
+        self.frames = 0
+        self.first_time = None
+        self.last_time = None
+        self._record = struct.Struct(f"<d{self.cells}f")
+        self._buffer = bytearray()
+        self._pending = 0
+        self._lock = threading.Lock()
+        header = dict(metadata or {})
+        header["version"] = 1
+        header["cells"] = self.cells
+        encoded = json.dumps(header).encode("utf-8")
+        self._handle = open(path, "wb")
+        self._handle.write(SESSION_MAGIC)
+        self._handle.write(_HEADER_LEN.pack(len(encoded)))
+        self._handle.write(encoded)
+
+    @property
+    def closed(self):
+        return self._handle is None
+
+    def append(self, timestamp, values):
+        with self._lock:
+            if self._handle is None:
+                return
+            self._buffer += self._record.pack(timestamp, *values[:self.cells])
+            self._pending += 1
+            self.frames += 1
+            if self.first_time is None:
+                self.first_time = timestamp
+            self.last_time = timestamp
+            if self._pending >= _FLUSH_FRAMES:
+                self._flush_locked()
+
+    def _flush_locked(self):
+        if self._buffer:
+            self._handle.write(self._buffer)
+            self._handle.flush()
+            self._buffer = bytearray()
+            self._pending = 0
+
+    def flush(self):
+        with self._lock:
+            if self._handle is not None:
+                self._flush_locked()
+
+    def close(self):
+        with self._lock:
+            if self._handle is None:
+                return
+            self._flush_locked()
+            self._handle.close()
+            self._handle = None
+
+
+class SessionReader:
+    """Random access to a session file written by SessionWriter."""
+
+    def __init__(self, path):
+        self.path = path
+        self._handle = open(path, "rb")
+        magic = self._handle.read(len(SESSION_MAGIC))
+        if magic != SESSION_MAGIC:
+            self._handle.close()
+            raise ValueError("Not a C-Measure session file")
+        (length,) = _HEADER_LEN.unpack(self._handle.read(_HEADER_LEN.size))
+        self.header = json.loads(self._handle.read(length).decode("utf-8"))
+        self.cells = int(self.header.get("cells", 0))
+        self._data_offset = self._handle.tell()
+        self._record = struct.Struct(f"<d{self.cells}f")
+        self._record_size = self._record.size
+        size = os.fstat(self._handle.fileno()).st_size
+        self.frames = max(size - self._data_offset, 0) // self._record_size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def time_at(self, index):
+        self._handle.seek(self._data_offset + index * self._record_size)
+        return _TIME.unpack(self._handle.read(8))[0]
+
+    @property
+    def start_time(self):
+        return self.time_at(0) if self.frames else None
+
+    @property
+    def end_time(self):
+        return self.time_at(self.frames - 1) if self.frames else None
+
+    def index_at(self, timestamp, right=False):
+        """First frame index with time >= timestamp (> when right), by binary search on disk."""
+        lo, hi = 0, self.frames
+        while lo < hi:
+            mid = (lo + hi) // 2
+            t = self.time_at(mid)
+            if t < timestamp or (right and t == timestamp):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def read(self, start=0, stop=None, cells=None):
+        """Frames [start, stop) as (times, {cell: values})."""
+        start = max(int(start), 0)
+        stop = self.frames if stop is None else min(stop, self.frames)
+        cells = list(range(self.cells)) if cells is None else [c for c in cells if 0 <= c < self.cells]
+        count = max(stop - start, 0)
+        self._handle.seek(self._data_offset + start * self._record_size)
+        data = self._handle.read(count * self._record_size)
+        data = data[:len(data) - len(data) % self._record_size]
+        if not data:
+            return array("d"), {cell: array("d") for cell in cells}
+        columns = list(zip(*struct.iter_unpack(self._record.format, data)))
+        times = array("d", columns[0])
+        series = {}
+        for cell in cells:
+            series[cell] = array("d", columns[cell + 1])
+        return times, series
+
+    def read_range(self, start_time=None, end_time=None, cells=None):
+        start = 0 if start_time is None else self.index_at(start_time)
+        stop = self.frames if end_time is None else self.index_at(end_time, right=True)
+        return self.read(start, stop, cells=cells)
+
+
+def _deltas(values):
+    return map(operator.sub, values, chain((0,), values))
+
+
+def _shuffle(data, width):
+    # Byte planes (all first bytes, then all second bytes, ...): small deltas leave whole planes at zero.
+    return b"".join(data[i::width] for i in range(width))
+
+
+def _unshuffle(data, width):
+    count = len(data) // width
+    out = bytearray(len(data))
+    for i in range(width):
+        out[i::width] = data[i * count:(i + 1) * count]
+    return out
+
+
+def encode_block(times, values, cells):
+    """Delta-encode one block: `times` array('d'), `values` array('f') of frames x cells, row-major.
+
+    Timestamps are differenced as int64 bit patterns and values per cell as
+    int32 bit patterns, which is lossless and turns slowly changing signals
+    into small integers that compress well.
+    """
+    words = array("q")
+    time_bits = array("q")
+    time_bits.frombytes(times.tobytes())
+    words.extend(_deltas(time_bits))
+    value_bits = array("i")
+    value_bits.frombytes(values.tobytes())
+    for cell in range(cells):
+        words.extend(_deltas(value_bits[cell::cells]))
+    if sys.byteorder != "little":
+        words.byteswap()
+    return _shuffle(words.tobytes(), 8)
+
+
+def decode_block(payload, frames, cells):
+    """(times, [values per cell]) as array('d') from an encode_block payload."""
+    words = array("q")
+    words.frombytes(_unshuffle(payload, 8))
+    if sys.byteorder != "little":
+        words.byteswap()
+    times = array("d")
+    times.frombytes(array("q", accumulate(words[:frames])).tobytes())
+    columns = []
+    for cell in range(cells):
+        base = (cell + 1) * frames
+        column = array("f")
+        column.frombytes(array("i", accumulate(words[base:base + frames])).tobytes())
+        columns.append(array("d", column.tolist()))
+    return times, columns
+
+
+class BlockSessionWriter:
+    """Session file of compressed blocks of up to `block_frames` frames or `block_seconds` seconds.
+
+    Same interface as SessionWriter. Finished blocks are encoded and written
+    by a background thread, so append() never waits for the compressor.
+    """
+
+    def __init__(self, path, cells, metadata=None, compression="zlib", level=6, block_frames=4096, block_seconds=10.0):
+        if compression not in COMPRESSORS:
+            raise ValueError(f"Unknown session compression: {compression}")
+        self.path = path
+        self.cells = int(cells)
+        self.frames = 0
+        self.blocks = 0
+        self.errors = 0
+        self.first_time = None
+        self.last_time = None
+        self.block_frames = int(block_frames)
+        self.block_seconds = float(block_seconds)
+        self._compress = COMPRESSORS[compression][0]
+        self._level = level
+        self._summary = struct.Struct(f"<{2 * self.cells}f")
+        self._times = array("d")
+        self._values = array("f")
+        self._block_start = None
+        self._closed = False
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        header = dict(metadata or {})
+        header["version"] = 2
+        header["cells"] = self.cells
+        header["compression"] = compression
+        header["blockFrames"] = self.block_frames
+        encoded = json.dumps(header).encode("utf-8")
+        self._handle = open(path, "wb")
+        self._handle.write(BLOCK_SESSION_MAGIC)
+        self._handle.write(_HEADER_LEN.pack(len(encoded)))
+        self._handle.write(encoded)
+        self._handle.flush()
+        self._thread = threading.Thread(target=self._write_blocks, name="session-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def append(self, timestamp, values):
+        with self._lock:
+            if self._closed:
+                return
+            self._times.append(timestamp)
+            self._values.extend(values[:self.cells])
+            self.frames += 1
+            if self.first_time is None:
+                self.first_time = timestamp
+            self.last_time = timestamp
+            if self._block_start is None:
+                self._block_start = timestamp
+            if len(self._times) >= self.block_frames or timestamp - self._block_start >= self.block_seconds:
+                self._cut_locked()
+
+    def _cut_locked(self):
+        if self._times:
+            self._queue.put((self._times, self._values))
+            self._times = array("d")
+            self._values = array("f")
+            self._block_start = None
+
+    def _write_blocks(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    break
+                times, values = item
+                cells = self.cells
+                columns = [values[cell::cells] for cell in range(cells)]
+                summary = self._summary.pack(*([min(c) for c in columns] + [max(c) for c in columns]))
+                payload = self._compress(encode_block(times, values, cells), self._level)
+                self._handle.write(_BLOCK_HEADER.pack(_BLOCK_MAGIC, len(times), len(payload), times[0], times[-1]))
+                self._handle.write(summary)
+                self._handle.write(payload)
+                self._handle.flush()
+                self.blocks += 1
+            except OSError as e:
+                self.errors += 1
+                logger.error(f"Could not write session block to {self.path}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Write the frames collected so far as a (short) block and wait until it is on disk."""
+        with self._lock:
+            if self._closed:
+                return
+            self._cut_locked()
+        self._queue.join()
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._cut_locked()
+            self._queue.put(None)
+        self._thread.join()
+        self._handle.close()
+
+
+class BlockSessionReader:
+    """Random access to a block session file; only the blocks a read touches are decompressed."""
+
+    def __init__(self, path):
+        self.path = path
+        self._handle = open(path, "rb")
+        magic = self._handle.read(len(BLOCK_SESSION_MAGIC))
+        if magic != BLOCK_SESSION_MAGIC:
+            self._handle.close()
+            raise ValueError("Not a C-Measure block session file")
+        (length,) = _HEADER_LEN.unpack(self._handle.read(_HEADER_LEN.size))
+        self.header = json.loads(self._handle.read(length).decode("utf-8"))
+        self.cells = int(self.header.get("cells", 0))
+        compression = self.header.get("compression")
+        if compression not in COMPRESSORS:
+            self._handle.close()
+            raise ValueError(f"Unknown session compression: {compression}")
+        self._decompress = COMPRESSORS[compression][1]
+        self.blocks = self._scan_blocks(self._handle.tell())
+        self.frames = sum(block.frames for block in self.blocks)
+        self._starts = [block.start for block in self.blocks]
+        self._last_times = [block.last_time for block in self.blocks]
+        self._cache = OrderedDict()
+
+    def _scan_blocks(self, offset):
+        summary = struct.Struct(f"<{2 * self.cells}f")
+        size = os.fstat(self._handle.fileno()).st_size
+        blocks = []
+        start = 0
+        while offset + _BLOCK_HEADER.size + summary.size <= size:
+            self._handle.seek(offset)
+            magic, frames, length, first_time, last_time = _BLOCK_HEADER.unpack(self._handle.read(_BLOCK_HEADER.size))
+            payload = offset + _BLOCK_HEADER.size + summary.size
+            # A block still being written (or cut off by a crash) ends the readable part.
+            if magic != _BLOCK_MAGIC or payload + length > size:
+                break
+            limits = summary.unpack(self._handle.read(summary.size))
+            blocks.append(BlockInfo(
+                start, frames, first_time, last_time, limits[:self.cells], limits[self.cells:], payload, length,
+            ))
+            start += frames
+            offset = payload + length
+        return blocks
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def block_data(self, number):
+        """Decoded (times, [values per cell]) of block `number`, from a small LRU cache."""
+        data = self._cache.get(number)
+        if data is not None:
+            self._cache.move_to_end(number)
+            return data
+        block = self.blocks[number]
+        self._handle.seek(block.offset)
+        payload = self._decompress(self._handle.read(block.length))
+        data = decode_block(payload, block.frames, self.cells)
+        self._cache[number] = data
+        if len(self._cache) > _CACHED_BLOCKS:
+            self._cache.popitem(last=False)
+        return data
+
+    def time_at(self, index):
+        number = bisect_right(self._starts, index) - 1
+        return self.block_data(number)[0][index - self.blocks[number].start]
+
+    @property
+    def start_time(self):
+        return self.blocks[0].first_time if self.blocks else None
+
+    @property
+    def end_time(self):
+        return self.blocks[-1].last_time if self.blocks else None
+
+    def index_at(self, timestamp, right=False):
+        """First frame index with time >= timestamp (> when right); decodes at most one block."""
+        find = bisect_right if right else bisect_left
+        number = find(self._last_times, timestamp)
+        if number >= len(self.blocks):
+            return self.frames
+        block = self.blocks[number]
+        if (timestamp < block.first_time) or (not right and timestamp == block.first_time):
+            return block.start
+        return block.start + find(self.block_data(number)[0], timestamp)
+
+    def read(self, start=0, stop=None, cells=None):
+        """Frames [start, stop) as (times, {cell: values})."""
+        start = max(int(start), 0)
+        stop = self.frames if stop is None else min(stop, self.frames)
+        cells = list(range(self.cells)) if cells is None else [c for c in cells if 0 <= c < self.cells]
+        times = array("d")
+        series = {cell: array("d") for cell in cells}
+        if stop <= start:
+            return times, series
+        for number in range(bisect_right(self._starts, start) - 1, len(self.blocks)):
+            block = self.blocks[number]
+            if block.start >= stop:
+                break
+            lo = max(start - block.start, 0)
+            hi = min(stop - block.start, block.frames)
+            block_times, columns = self.block_data(number)
+            times.extend(block_times[lo:hi])
+            for cell in cells:
+                series[cell].extend(columns[cell][lo:hi])
+        return times, series
+
+    def read_range(self, start_time=None, end_time=None, cells=None):
+        start = 0 if start_time is None else self.index_at(start_time)
+        stop = self.frames if end_time is None else self.index_at(end_time, right=True)
+        return self.read(start, stop, cells=cells)
+
+
+def open_session_reader(path):
+    """SessionReader or BlockSessionReader, depending on the file format."""
+    with open(path, "rb") as handle:
+        magic = handle.read(len(BLOCK_SESSION_MAGIC))
+    if magic == BLOCK_SESSION_MAGIC:
+        return BlockSessionReader(path)
+    return SessionReader(path)
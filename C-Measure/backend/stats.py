@@ -0,0 +1,71 @@
+import math
+import time
+from array import array
+
+
+class ChannelStats:
+    """Per-channel peak/valley hold and Welford running mean/variance.
+
+    update() is called for every sample from the ingestion path, so it only
+    touches preallocated arrays.
+    """
+
+    def __init__(self, count):
+        self.count = count
+        self.peak = array("d", [0.0] * count)
+        self.valley = array("d", [0.0] * count)
+        self.peak_time = array("d", [0.0] * count)
+        self.valley_time = array("d", [0.0] * count)
+        self.samples = array("d", [0.0] * count)
+        self.mean = array("d", [0.0] * count)
+        self.m2 = array("d", [0.0] * count)
+        self.reset_at = time.time()
+
+    def update(self, idx, value, timestamp):
+        n = self.samples[idx] + 1.0
+        self.samples[idx] = n
+        if n == 1.0:
+            self.peak[idx] = self.valley[idx] = value
+            self.peak_time[idx] = self.valley_time[idx] = timestamp
+            self.mean[idx] = value
+            self.m2[idx] = 0.0
+            return
+        if value > self.peak[idx]:
+            self.peak[idx] = value
+            self.peak_time[idx] = timestamp
+        elif value < self.valley[idx]:
+            self.valley[idx] = value
+            self.valley_time[idx] = timestamp
+        mean = self.mean[idx]
+        delta = value - mean
+        mean += delta / n
+        self.mean[idx] = mean
+        self.m2[idx] += delta * (value - mean)
+
+    def reset(self, idx=None):
+        indices = range(self.count) if idx is None else [idx]
+        for i in indices:
+            self.samples[i] = 0.0
+            self.peak[i] = self.valley[i] = 0.0
+            self.peak_time[i] = self.valley_time[i] = 0.0
+            self.mean[i] = self.m2[i] = 0.0
+        if idx is None:
+            self.reset_at = time.time()
+
+    def snapshot(self):
+        items = []
+        for idx in range(self.count):
+            n = self.samples[idx]
+            if not n:
+                items.append({"samples": 0, "peak": None, "valley": None, "mean": None, "std": None})
+                continue
+            items.append({
+                "samples": int(n),
+                "peak": self.peak[idx],
+                "peakTime": self.peak_time[idx],
+                "valley": self.valley[idx],
+                "valleyTime": self.valley_time[idx],
+                "mean": self.mean[idx],
+                "std": math.sqrt(self.m2[idx] / (n - 1)) if n > 1 else 0.0,
+            })
+        return items
@@ -1,9 +1,18 @@
 import csv
+import json
 import os
 import sys
 from pathlib import Path
 from datetime import datetime
 
+from sessions import (
+    SESSION_SUFFIX,
+    BlockSessionWriter,
+    SessionWriter,
+    normalize_session_storage_config,
+    open_session_reader,
+)
+
 
 def get_app_dir():
     """Get the application directory - works for both script and frozen exe."""
@@ -35,16 +44,22 @@ class Storage:
     def __init__(self, data_dir):
         self.calibration_missing = True
         self.calibration_timestamp = None
+        self.session_config = normalize_session_storage_config(None)
         self.set_data_dir(data_dir)
 
+    def configure_sessions(self, config):
+        self.session_config = normalize_session_storage_config(config)
+
     def set_data_dir(self, data_dir):
         self.data_dir = Path(data_dir).resolve()
         self.measurements_dir = self.data_dir / "measurements"
+        self.sessions_dir = self.data_dir / "sessions"
         self._ensure_dirs()
 
     def _ensure_dirs(self):
         self.data_dir.mkdir(parents=True, exist_ok=True)
         self.measurements_dir.mkdir(parents=True, exist_ok=True)
+        self.sessions_dir.mkdir(parents=True, exist_ok=True)
 
     def _calibration_path(self, serial=None):
         if serial:
@@ -116,7 +131,7 @@ class Storage:
         self.calibration_missing = False
         self.calibration_timestamp = calibrated_at
 
-    def write_measurement(self, values, name=None):
+    def write_measurement(self, values, name=None, unfiltered=None, metrics=None, stats=None):
         self._ensure_dirs()
         timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
         safe_name = self._sanitize_name(name)
@@ -125,19 +140,56 @@ class Storage:
         else:
             filename = f"Data_{timestamp}.csv"
         filepath = self.measurements_dir / filename
+        fieldnames = ["LoadCell", "MeasuredValue"]
+        if unfiltered is not None:
+            fieldnames.append("UnfilteredValue")
+        if stats is not None:
+            fieldnames.extend(["Peak", "Valley", "Mean", "StdDev"])
         with filepath.open("w", newline="") as handle:
-            writer = csv.DictWriter(handle, fieldnames=["LoadCell", "MeasuredValue"])
+            writer = csv.DictWriter(handle, fieldnames=fieldnames)
             writer.writeheader()
             for idx, value in enumerate(values):
-                writer.writerow({"LoadCell": idx, "MeasuredValue": value})
+                row = {"LoadCell": idx, "MeasuredValue": value}
+                if unfiltered is not None:
+                    row["UnfilteredValue"] = unfiltered[idx] if idx < len(unfiltered) else ""
+                if stats is not None:
+                    item = stats[idx] if idx < len(stats) else {}
+                    row["Peak"] = _blank(item.get("peak"))
+                    row["Valley"] = _blank(item.get("valley"))
+                    row["Mean"] = _blank(item.get("mean"))
+                    row["StdDev"] = _blank(item.get("std"))
+                writer.writerow(row)
+        if metrics is not None:
+            # Sidecar next to the CSV; list_measurements only picks up Data_*.csv.
+            filepath.with_suffix(".json").write_text(json.dumps({"metrics": metrics}, indent=2), encoding="utf-8")
         return filename
 
+    def read_measurement_metrics(self, filename):
+        """Metrics stored with a recorded measurement, or None for recordings without a sidecar."""
+        filepath = self.measurement_path(filename)
+        if filepath is None:
+            return None
+        filepath = filepath.with_suffix(".json")
+        if not filepath.exists():
+            return None
+        try:
+            return json.loads(filepath.read_text(encoding="utf-8")).get("metrics")
+        except (OSError, ValueError, AttributeError):
+            return None
+
     def list_measurements(self):
         if not self.measurements_dir.exists():
             return []
         files = [p.name for p in self.measurements_dir.glob("Data_*.csv") if p.is_file()]
         return sorted(files)
 
+    def measurement_path(self, filename):
+        name = Path(str(filename)).name
+        if not name or name != str(filename) or not (name.startswith("Data_") and name.endswith(".csv")):
+            return None
+        filepath = self.measurements_dir / name
+        return filepath if filepath.is_file() else None
+
     def read_measurement(self, filename):
         filepath = self.measurements_dir / filename
         if not filepath.exists():
@@ -157,6 +209,66 @@ class Storage:
         max_idx = max(values.keys())
         return [values.get(i, 0.0) for i in range(max_idx + 1)]
 
+    def create_session(self, cells, name=None, metadata=None):
+        self._ensure_dirs()
+        now = datetime.now()
+        safe_name = self._sanitize_name(name)
+        stem = f"Session_{now.strftime('%Y%m%d-%H%M%S')}"
+        if safe_name:
+            stem = f"{stem}_{safe_name}"
+        filepath = self.sessions_dir / f"{stem}{SESSION_SUFFIX}"
+        counter = 1
+        while filepath.exists():
+            filepath = self.sessions_dir / f"{stem}_{counter}{SESSION_SUFFIX}"
+            counter += 1
+        header = dict(metadata or {})
+        header["name"] = safe_name or None
+        header["createdAt"] = now.strftime("%Y-%m-%d %H:%M:%S")
+        config = self.session_config
+        if config["compression"] == "none":
+            return SessionWriter(filepath, cells, metadata=header)
+        return BlockSessionWriter(
+            filepath,
+            cells,
+            metadata=header,
+            compression=config["compression"],
+            level=config["level"],
+            block_frames=config["blockFrames"],
+            block_seconds=config["blockSeconds"],
+        )
+
+    def write_session(self, cells, times, series, name=None, metadata=None):
+        writer = self.create_session(cells, name=name, metadata=metadata)
+        try:
+            columns = [series.get(idx, ()) for idx in range(cells)]
+            for row, timestamp in enumerate(times):
+                writer.append(timestamp, [column[row] if row < len(column) else 0.0 for column in columns])
+        finally:
+            writer.close()
+        return writer.path.name
+
+    def list_sessions(self):
+        if not self.sessions_dir.exists():
+            return []
+        files = [p.name for p in self.sessions_dir.glob(f"Session_*{SESSION_SUFFIX}") if p.is_file()]
+        return sorted(files)
+
+    def session_path(self, filename):
+        name = Path(str(filename)).name
+        if not name or name != str(filename) or not name.endswith(SESSION_SUFFIX):
+            return None
+        filepath = self.sessions_dir / name
+        return filepath if filepath.is_file() else None
+
+    def open_session(self, filename):
+        filepath = self.session_path(filename)
+        if filepath is None:
+            return None
+        try:
+            return open_session_reader(filepath)
+        except (OSError, ValueError):
+            return None
+
     def _write_default_calibration(self, count, serial=None):
         rows = [self._default_row(i) for i in range(count)]
         self.write_calibration(rows, serial=serial)
@@ -179,6 +291,10 @@ class Storage:
         return safe[:40]
 
 
+def _blank(value):
+    return "" if value is None else value
+
+
 def default_data_dir():
     env_dir = os.getenv("CMEASURE_DATA_DIR")
     if env_dir:
@@ -0,0 +1,196 @@
+import itertools
+import logging
+import math
+import threading
+from collections import deque
+
+logger = logging.getLogger('CMeasure.Triggers')
+
+TRIGGER_TYPES = ("rising", "falling", "slope", "multi")
+MAX_WINDOW_SECONDS = 300.0
+
+
+class Trigger:
+    """One armed condition on the frame stream.
+
+    The condition is bound to a plain method at construction, so evaluating a
+    frame is a few float comparisons on values the frame already carries.
+    """
+
+    def __init__(self, trigger_id, config, count):
+        kind = config.get("type")
+        if kind not in TRIGGER_TYPES:
+            raise ValueError(f"Unknown trigger type: {kind}")
+        self.id = trigger_id
+        self.kind = kind
+        self.level = float(config.get("level", 0.0))
+        self.slope = float(config.get("slope", 0.0))
+        self.pre_seconds = min(max(float(config.get("preSeconds", 2.0)), 0.0), MAX_WINDOW_SECONDS)
+        self.post_seconds = min(max(float(config.get("postSeconds", 2.0)), 0.0), MAX_WINDOW_SECONDS)
+        self.rearm = bool(config.get("rearm", False))
+        self.name = str(config.get("name") or f"trigger{trigger_id}")
+        cell = config.get("cell", "total")
+        if cell == "total":
+            self.cell = None
+        else:
+            self.cell = int(cell)
+            if not 0 <= self.cell < count:
+                raise ValueError("Invalid trigger cell")
+        cells = config.get("cells")
+        self.cells = [int(c) for c in cells if 0 <= int(c) < count] if cells else list(range(count))
+        self.min_cells = max(int(config.get("minCells", 1)), 1)
+        self.armed = True
+        self.fired = 0
+        self._prev = None
+        self._prev_time = None
+        self.evaluate = {
+            "rising": self._rising,
+            "falling": self._falling,
+            "slope": self._slope,
+            "multi": self._multi,
+        }[kind]
+
+    def describe(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "type": self.kind,
+            "cell": "total" if self.cell is None else self.cell,
+            "cells": self.cells,
+            "minCells": self.min_cells,
+            "level": self.level,
+            "slope": self.slope,
+            "preSeconds": self.pre_seconds,
+            "postSeconds": self.post_seconds,
+            "rearm": self.rearm,
+            "armed": self.armed,
+            "fired": self.fired,
+        }
+
+    def _signal(self, values):
+        if self.cell is None:
+            return math.fsum(values)
+        return values[self.cell]
+
+    def _rising(self, timestamp, values):
+        value = self._signal(values)
+        prev = self._prev
+        self._prev = value
+        return prev is not None and prev < self.level <= value
+
+    def _falling(self, timestamp, values):
+        value = self._signal(values)
+        prev = self._prev
+        self._prev = value
+        return prev is not None and prev > self.level >= value
+
+    def _slope(self, timestamp, values):
+        value = self._signal(values)
+        prev, prev_time = self._prev, self._prev_time
+        self._prev, self._prev_time = value, timestamp
+        if prev is None or timestamp <= prev_time:
+            return False
+        rate = (value - prev) / (timestamp - prev_time)
+        return rate >= self.slope if self.slope >= 0 else rate <= self.slope
+
+    def _multi(self, timestamp, values):
+        level = self.level
+        hits = 0
+        for idx in self.cells:
+            if values[idx] >= level:
+                hits += 1
+        prev = self._prev
+        self._prev = hits
+        return prev is not None and prev < self.min_cells <= hits
+
+
+class TriggerEngine:
+    """Evaluates armed triggers per frame and saves pre/post windows from the frame history."""
+
+    def __init__(self, count, history, save_capture, on_capture=None):
+        self.count = count
+        self.history = history
+        self.save_capture = save_capture
+        self.on_capture = on_capture
+        self.events = deque(maxlen=50)
+        self._triggers = ()
+        self._pending = ()
+        self._ids = itertools.count(1)
+        self._event_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def active(self):
+        return bool(self._triggers or self._pending)
+
+    def arm(self, config):
+        trigger = Trigger(next(self._ids), config, self.count)
+        with self._lock:
+            self._triggers = self._triggers + (trigger,)
+        return trigger.describe()
+
+    def disarm(self, trigger_id=None):
+        with self._lock:
+            if trigger_id is None:
+                removed = self._triggers
+                self._triggers = ()
+            else:
+                removed = tuple(t for t in self._triggers if t.id == trigger_id)
+                self._triggers = tuple(t for t in self._triggers if t.id != trigger_id)
+        return [t.describe() for t in removed]
+
+    def describe(self):
+        return [t.describe() for t in self._triggers]
+
+    def update(self, seq, timestamp, values):
+        # Lock-free on the hot path: arm/disarm swap whole tuples.
+        if self._pending:
+            self._complete_due(timestamp)
+        for trigger in self._triggers:
+            if trigger.armed and trigger.evaluate(timestamp, values):
+                self._fire(trigger, seq, timestamp)
+
+    def _fire(self, trigger, seq, timestamp):
+        trigger.armed = False
+        trigger.fired += 1
+        event = {
+            "id": next(self._event_ids),
+            "trigger": trigger.describe(),
+            "seq": seq,
+            "firedAt": timestamp,
+            "start": timestamp - trigger.pre_seconds,
+            "end": timestamp + trigger.post_seconds,
+            "session": None,
+            "state": "capturing",
+        }
+        with self._lock:
+            self._pending = self._pending + ((trigger, event),)
+        self.events.append(event)
+        logger.info(f"Trigger {trigger.name} fired at seq {seq}")
+
+    def _complete_due(self, timestamp):
+        with self._lock:
+            due = tuple(item for item in self._pending if timestamp >= item[1]["end"])
+            if not due:
+                return
+            self._pending = tuple(item for item in self._pending if timestamp < item[1]["end"])
+        for trigger, event in due:
+            if trigger.rearm:
+                trigger.armed = True
+            threading.Thread(target=self._save, args=(event,), daemon=True).start()
+
+    def _save(self, event):
+        try:
+            times, series = self.history.snapshot(event["start"], event["end"])
+            event["frames"] = len(times)
+            event["session"] = self.save_capture(event, times, series)
+            event["state"] = "saved"
+        except OSError as e:
+            event["state"] = "failed"
+            event["error"] = str(e)
+            logger.error(f"Failed to save trigger capture {event['id']}: {e}")
+        if self.on_capture is not None:
+            self.on_capture(event)
+
+    def events_since(self, event_id=0):
+        return [event for event in list(self.events) if event["id"] > event_id]
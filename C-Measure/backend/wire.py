@@ -0,0 +1,155 @@
+"""Packed binary responses for /api/measurements and /api/history/plot.
+
+Sent instead of JSON when the request has ``Accept: application/octet-stream``
+(or the media types below) or ``?format=binary``. Everything is little-endian
+and every float array starts on an 8-byte boundary, so clients can read the
+arrays in place (``numpy.frombuffer``, ``Float64Array``) without parsing.
+
+Measurements (application/vnd.cmeasure.measurements)::
+
+    offset  size  field
+    0       4     magic b"CMMS"
+    4       1     version (1)
+    5       1     flags: 1 = unfiltered arrays present, 2 = stats arrays present
+    6       2     cell count N (uint16)
+    8       8     time of the snapshot, seconds since the epoch (float64)
+    16      8     statsResetAt (float64, NaN if never reset)
+    24      8*N   value, calibrated force (float64)
+            8*N   raw voltage ratio (float64)
+            8*N   valueUnfiltered, then 8*N rawUnfiltered     (flag 1)
+            8*N   peak, valley, mean, std, NaN when unknown   (flag 2, 4 arrays)
+            N     status per cell (uint8, STATUS_CODES)
+
+Plot (application/vnd.cmeasure.plot)::
+
+    0       4     magic b"CMPL"
+    4       1     version (1)
+    5       1     method: 0 = minmax, 1 = lttb
+    6       2     series count S (uint16)
+    8       8     start time (float64)
+    16      8     end time (float64)
+    then S times:
+            2     cell index (uint16)
+            2     reserved
+            4     point count P (uint32)
+            8*P   times (float64)
+            4*P   values (float32), zero-padded to a multiple of 8 bytes
+"""
+import math
+import struct
+import sys
+import time
+from array import array
+
+BINARY_TYPES = ("application/octet-stream", "application/vnd.cmeasure.measurements", "application/vnd.cmeasure.plot")
+MEASUREMENTS_TYPE = "application/vnd.cmeasure.measurements"
+PLOT_TYPE = "application/vnd.cmeasure.plot"
+VERSION = 1
+FLAG_UNFILTERED = 1
+FLAG_STATS = 2
+STATUS_CODES = {"Disconnected": 0, "Connecting": 1, "Connected": 2, "Error": 3}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+UNKNOWN_STATUS = 255
+PLOT_METHODS = {"minmax": 0, "lttb": 1}
+
+MEASUREMENTS_HEADER = struct.Struct("<4sBBHdd")
+PLOT_HEADER = struct.Struct("<4sBBHdd")
+SERIES_HEADER = struct.Struct("<HHI")
+NAN = float("nan")
+
+
+def _le(typecode, values):
+    data = array(typecode, values)
+    if sys.byteorder != "little":
+        data.byteswap()
+    return data.tobytes()
+
+
+def _from_le(typecode, data):
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+def _nan(value):
+    return NAN if value is None else value
+
+
+def encode_measurements(values, raw, statuses, unfiltered=None, raw_unfiltered=None, stats=None, stats_reset_at=None):
+    count = len(values)
+    flags = (FLAG_UNFILTERED if unfiltered is not None else 0) | (FLAG_STATS if stats else 0)
+    parts = [
+        MEASUREMENTS_HEADER.pack(b"CMMS", VERSION, flags, count, time.time(), _nan(stats_reset_at)),
+        _le("d", [_nan(value) for value in values]),
+        _le("d", [_nan(raw[idx]) if idx < len(raw) else NAN for idx in range(count)]),
+    ]
+    if unfiltered is not None:
+        parts.append(_le("d", [_nan(value) for value in unfiltered[:count]]))
+        parts.append(_le("d", [_nan(value) for value in raw_unfiltered[:count]]))
+    if stats:
+        for key in ("peak", "valley", "mean", "std"):
+            parts.append(_le("d", [_nan(stats[idx].get(key)) if idx < len(stats) else NAN for idx in range(count)]))
+    parts.append(bytes(STATUS_CODES.get(status, UNKNOWN_STATUS) for status in statuses[:count]))
+    return b"".join(parts)
+
+
+def decode_measurements(data):
+    """Inverse of encode_measurements, for scripts: dict of field name -> list."""
+    magic, version, flags, count, timestamp, reset_at = MEASUREMENTS_HEADER.unpack_from(data)
+    if magic != b"CMMS":
+        raise ValueError("Not a measurements payload")
+    names = ["value", "raw"]
+    if flags & FLAG_UNFILTERED:
+        names += ["valueUnfiltered", "rawUnfiltered"]
+    if flags & FLAG_STATS:
+        names += ["peak", "valley", "mean", "std"]
+    result = {"time": timestamp, "statsResetAt": None if math.isnan(reset_at) else reset_at}
+    offset = MEASUREMENTS_HEADER.size
+    for name in names:
+        result[name] = _from_le("d", data[offset:offset + 8 * count]).tolist()
+        offset += 8 * count
+    result["status"] = [STATUS_NAMES.get(code, "Unknown") for code in data[offset:offset + count]]
+    return result
+
+
+def encode_plot(method, start, end, series):
+    """`series` is a list of (cell, times, values)."""
+    parts = [PLOT_HEADER.pack(b"CMPL", VERSION, PLOT_METHODS[method], len(series), start, end)]
+    for cell, times, values in series:
+        count = len(times)
+        parts.append(SERIES_HEADER.pack(cell, 0, count))
+        parts.append(_le("d", times))
+        parts.append(_le("f", values))
+        if count % 2:
+            parts.append(bytes(4))
+    return b"".join(parts)
+
+
+def decode_plot(data):
+    """Inverse of encode_plot: (header dict, [(cell, times, values)])."""
+    magic, version, method, count, start, end = PLOT_HEADER.unpack_from(data)
+    if magic != b"CMPL":
+        raise ValueError("Not a plot payload")
+    offset = PLOT_HEADER.size
+    series = []
+    for _ in range(count):
+        cell, _, points = SERIES_HEADER.unpack_from(data, offset)
+        offset += SERIES_HEADER.size
+        times = _from_le("d", data[offset:offset + 8 * points])
+        offset += 8 * points
+        values = _from_le("f", data[offset:offset + 4 * points])
+        offset += 4 * points + (4 if points % 2 else 0)
+        series.append((cell, times, values))
+    methods = {code: name for name, code in PLOT_METHODS.items()}
+    return {"method": methods.get(method), "start": start, "end": end}, series
+
+
+def wants_binary(accept, query):
+    if query.get("format") == "binary":
+        return True
+    if not accept:
+        return False
+    accepted = [item.split(";")[0].strip().lower() for item in accept.split(",")]
+    return any(item in BINARY_TYPES for item in accepted)
@@ -1,4 +1,6 @@
 const PLOT_AXIS_PAD = 18;
+const STATUS_WAIT_SECONDS = 20;
+const CONNECT_TIMEOUT_MS = 40000;
 
 let measurementDotsRaf = null;
 
@@ -10,6 +12,8 @@ const state = {
   connectTimer: null,
   connecting: false,
   statusTimer: null,
+  statusLoop: null,
+  statusVersion: null,
   previewTimer: null,
   showRaw: false,
   lastMeasurements: null,
@@ -765,11 +769,16 @@ function maybeAutoCompareReports() {
   }
 }
 
-async function refreshStatus({ silent = false } = {}) {
-  const status = await safeRequest(() => apiRequest('/api/status'), silent ? null : 'Backend not reachable');
+async function refreshStatus({ silent = false, wait = 0 } = {}) {
+  // With `wait`, the backend holds the request until the status changes (long poll).
+  const path = wait > 0 && state.statusVersion !== null
+    ? `/api/status?since=${state.statusVersion}&wait=${wait}`
+    : '/api/status';
+  const status = await safeRequest(() => apiRequest(path), silent ? null : 'Backend not reachable');
   if (!status) {
     return null;
   }
+  state.statusVersion = Number.isInteger(status.version) ? status.version : null;
   renderStatus(status.statuses);
   updateSidebarStatus(status.statuses);
   state.lastBridge = status.bridge;
@@ -802,30 +811,40 @@ async function loadWifiNetworks() {
   });
 }
 
+function delay(ms) {
+  return new Promise((resolve) => setTimeout(resolve, ms));
+}
+
 function stopStatusPolling() {
   if (state.statusTimer) {
     clearInterval(state.statusTimer);
     state.statusTimer = null;
   }
+  state.statusLoop = null;
 }
 
 function startStatusPolling() {
   stopStatusPolling();
-  const interval = state.showRaw ? 1000 : 2000;
-  state.statusTimer = setInterval(() => {
-    if (state.showRaw) {
+  if (state.showRaw) {
+    state.statusTimer = setInterval(() => {
       refreshMeasurements();
-    } else {
-      refreshStatus({ silent: true });
+    }, 1000);
+    return;
+  }
+  const loop = {};
+  state.statusLoop = loop;
+  (async () => {
+    while (state.statusLoop === loop) {
+      const status = await refreshStatus({ silent: true, wait: STATUS_WAIT_SECONDS });
+      if (!status) {
+        await delay(2000);
+      }
     }
-  }, interval);
+  })();
 }
 
 function stopConnectPolling() {
-  if (state.connectTimer) {
-    clearInterval(state.connectTimer);
-    state.connectTimer = null;
-  }
+  state.connectTimer = null;
 }
 
 function stopMeasurementPreview() {
@@ -846,21 +865,26 @@ function startMeasurementPreview() {
 
 function startConnectPolling() {
   stopConnectPolling();
-  let attempts = 0;
-  state.connectTimer = setInterval(async () => {
-    attempts += 1;
-    const status = await refreshStatus({ silent: true });
-    if (!status) {
-      return;
-    }
-    const statuses = status.statuses || [];
-    const stillConnecting = statuses.some((s) => s === 'Connecting');
-    if (!stillConnecting || attempts >= 40) {
-      stopConnectPolling();
-      state.connecting = false;
-      elements.connectBtn.disabled = false;
+  const poll = {};
+  const deadline = Date.now() + CONNECT_TIMEOUT_MS;
+  state.connectTimer = poll;
+  (async () => {
+    while (state.connectTimer === poll) {
+      const remaining = Math.max((deadline - Date.now()) / 1000, 0);
+      const status = await refreshStatus({ silent: true, wait: Math.min(STATUS_WAIT_SECONDS, remaining) });
+      const statuses = status ? status.statuses || [] : [];
+      const stillConnecting = !status || statuses.some((s) => s === 'Connecting');
+      if (!stillConnecting || Date.now() >= deadline) {
+        stopConnectPolling();
+        state.connecting = false;
+        elements.connectBtn.disabled = false;
+        return;
+      }
+      if (!status) {
+        await delay(1000);
+      }
     }
-  }, 1000);
+  })();
 }
 
 function updateRawToggle() {
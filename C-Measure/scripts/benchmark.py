@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the C-Measure backend hot paths.
+
+Measures acquisition ingestion, measurement snapshots, JSON encoding, the
+HTTP API (against a CMeasureServer in simulation mode) and Storage file
+access. Results are written as JSON and compared against a stored baseline
+so regressions are noticed before a new installer is shipped.
+
+Usage:
+    python scripts/benchmark.py
+    python scripts/benchmark.py --quick --output bench.json
+    python scripts/benchmark.py --update-baseline
+"""
+import argparse
+import http.client
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from phidget_service import PhidgetService  # noqa: E402
+from server import ApiHandler, CMeasureServer  # noqa: E402
+from storage import Storage  # noqa: E402
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "benchmark-baseline.json"
+DEFAULT_TOLERANCE = 0.25
+
+
+class _FakeChannel:
+    def __init__(self, idx):
+        self.channelIndex = idx
+
+
+class _QuietHandler(ApiHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def _percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[rank]
+
+
+def _metric(value, unit, better):
+    return {"value": value, "unit": unit, "better": better}
+
+
+def _latency_metrics(prefix, samples_s):
+    samples_us = [s * 1e6 for s in samples_s]
+    return {
+        f"{prefix}.meanUs": _metric(statistics.mean(samples_us) if samples_us else 0.0, "us", "lower"),
+        f"{prefix}.p50Us": _metric(_percentile(samples_us, 50), "us", "lower"),
+        f"{prefix}.p99Us": _metric(_percentile(samples_us, 99), "us", "lower"),
+    }
+
+
+def _make_service(storage, num_ports=6, num_channels=2, simulate=False):
+    return PhidgetService(storage, num_ports=num_ports, num_channels=num_channels, simulate=simulate)
+
+
+def bench_ingest(storage, duration, readers=(0, 1, 4)):
+    """_on_change throughput while reader threads poll get_measurements."""
+    results = {}
+    for reader_count in readers:
+        service = _make_service(storage)
+        channels = [_FakeChannel(idx) for idx in range(service.num_ids)]
+        stop = threading.Event()
+        reads = [0]
+
+        def reader():
+            while not stop.is_set():
+                service.get_measurements()
+                reads[0] += 1
+
+        threads = [threading.Thread(target=reader, daemon=True) for _ in range(reader_count)]
+        for thread in threads:
+            thread.start()
+        events = 0
+        value = 0.0
+        start = time.perf_counter()
+        deadline = start + duration
+        while time.perf_counter() < deadline:
+            for ph in channels:
+                value += 1e-6
+                service._on_change(ph, value)
+            events += len(channels)
+        elapsed = time.perf_counter() - start
+        stop.set()
+        for thread in threads:
+            thread.join()
+        key = f"ingest.readers{reader_count}"
+        results[f"{key}.eventsPerSec"] = _metric(events / elapsed, "events/s", "higher")
+        if reader_count:
+            results[f"{key}.readsPerSec"] = _metric(reads[0] / elapsed, "reads/s", "higher")
+    return results
+
+
+def bench_get_measurements(storage, iterations, channel_counts=(12, 48, 96, 192)):
+    """get_measurements latency versus channel count."""
+    results = {}
+    for count in channel_counts:
+        service = _make_service(storage, num_ports=count // 2, num_channels=2)
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            service.get_measurements()
+            samples.append(time.perf_counter() - start)
+        results.update(_latency_metrics(f"getMeasurements.ch{count}", samples))
+    return results
+
+
+def bench_json_encoding(storage, iterations, channel_counts=(12, 48, 96, 192)):
+    """json.dumps cost of the /api/measurements payload."""
+    results = {}
+    for count in channel_counts:
+        service = _make_service(storage, num_ports=count // 2, num_channels=2)
+        values = service.get_measurements()
+        raw_values = service.get_raw_values()
+        statuses = service.get_statuses()
+        items = []
+        for idx, value in enumerate(values):
+            items.append({
+                "id": idx,
+                "status": statuses[idx],
+                "value": value,
+                "raw": raw_values[idx],
+                "unit": "N",
+            })
+        payload = {"measurements": items}
+        samples = []
+        size = 0
+        for _ in range(iterations):
+            start = time.perf_counter()
+            size = len(json.dumps(payload).encode("utf-8"))
+            samples.append(time.perf_counter() - start)
+        results.update(_latency_metrics(f"jsonMeasurements.ch{count}", samples))
+        results[f"jsonMeasurements.ch{count}.bytes"] = _metric(size, "bytes", "lower")
+    return results
+
+
+def _start_server(storage):
+    service = _make_service(storage, simulate=True)
+    service.connect()
+    server = CMeasureServer(("127.0.0.1", 0), _QuietHandler, storage, service, str(BACKEND_DIR))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, thread
+
+
+def _http_load(port, route, duration, clients):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def client():
+        local = []
+        local_errors = 0
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+                conn.request("GET", route)
+                response = conn.getresponse()
+                response.read()
+                conn.close()
+                if response.status != 200:
+                    local_errors += 1
+                    continue
+            except OSError:
+                local_errors += 1
+                continue
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=client, daemon=True) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return latencies, errors[0], elapsed
+
+
+def bench_http(storage, duration, clients=(1, 4)):
+    """requests/s and p50/p99 for /api/status and /api/measurements."""
+    results = {}
+    server, thread = _start_server(storage)
+    port = server.server_address[1]
+    try:
+        for route, name in (("/api/status", "status"), ("/api/measurements", "measurements")):
+            for client_count in clients:
+                latencies, errors, elapsed = _http_load(port, route, duration, client_count)
+                key = f"http.{name}.c{client_count}"
+                results[f"{key}.requestsPerSec"] = _metric(len(latencies) / elapsed, "req/s", "higher")
+                latency_ms = [value * 1000 for value in latencies]
+                results[f"{key}.p50Ms"] = _metric(_percentile(latency_ms, 50), "ms", "lower")
+                results[f"{key}.p99Ms"] = _metric(_percentile(latency_ms, 99), "ms", "lower")
+                results[f"{key}.errors"] = _metric(errors, "count", "lower")
+    finally:
+        server.shutdown()
+        server.server_close()
+        server.service.disconnect()
+        thread.join(timeout=2)
+    return results
+
+
+def bench_storage(base_dir, iterations, sizes=(10, 100, 1000)):
+    """Storage.list_measurements / read_measurement versus directory size."""
+    results = {}
+    values = [float(idx) * 1.5 for idx in range(12)]
+    for size in sizes:
+        storage = Storage(Path(base_dir) / f"storage_{size}")
+        for idx in range(size):
+            path = storage.measurements_dir / f"Data_20240101-{idx:06d}.csv"
+            with path.open("w", newline="") as handle:
+                handle.write("LoadCell,MeasuredValue\n")
+                for cell, value in enumerate(values):
+                    handle.write(f"{cell},{value}\n")
+        samples = []
+        files = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            files = storage.list_measurements()
+            samples.append(time.perf_counter() - start)
+        results.update(_latency_metrics(f"storage.list.files{size}", samples))
+        target = files[len(files) // 2]
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            storage.read_measurement(target)
+            samples.append(time.perf_counter() - start)
+        results.update(_latency_metrics(f"storage.read.files{size}", samples))
+    return results
+
+
+def run_all(quick=False, only=None):
+    duration = 0.5 if quick else 2.0
+    iterations = 200 if quick else 2000
+    storage_iterations = 20 if quick else 100
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="cmeasure-bench-") as tmp:
+        storage = Storage(Path(tmp) / "data")
+        suites = [
+            ("ingest", lambda: bench_ingest(storage, duration)),
+            ("getMeasurements", lambda: bench_get_measurements(storage, iterations)),
+            ("json", lambda: bench_json_encoding(storage, iterations)),
+            ("http", lambda: bench_http(storage, duration)),
+            ("storage", lambda: bench_storage(tmp, storage_iterations)),
+        ]
+        for name, suite in suites:
+            if only and name not in only:
+                continue
+            print(f"[bench] {name}...", file=sys.stderr)
+            results.update(suite())
+    return {
+        "meta": {
+            "createdAt": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "bits": 64 if sys.maxsize > 2 ** 32 else 32,
+            "quick": bool(quick),
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, tolerance):
+    """Return a list of (key, baseline, current, change) for regressed metrics."""
+    regressions = []
+    base_results = baseline.get("results", {})
+    for key, entry in current.get("results", {}).items():
+        base = base_results.get(key)
+        if not base:
+            continue
+        old = float(base.get("value") or 0)
+        new = float(entry.get("value") or 0)
+        if old == 0:
+            continue
+        change = (new - old) / old
+        if entry.get("better") == "higher" and change < -tolerance:
+            regressions.append((key, old, new, change))
+        elif entry.get("better") == "lower" and change > tolerance:
+            regressions.append((key, old, new, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="C-Measure backend benchmarks")
+    parser.add_argument("--output", help="Write results JSON to this path")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="Baseline JSON to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed relative change before a metric counts as a regression")
+    parser.add_argument("--quick", action="store_true", help="Shorter runs for a smoke check")
+    parser.add_argument("--only", nargs="*", help="Run only these suites (ingest, getMeasurements, json, http, storage)")
+    args = parser.parse_args()
+
+    report = run_all(quick=args.quick, only=set(args.only) if args.only else None)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text, encoding="utf-8")
+    else:
+        print(text)
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        baseline_path.write_text(text, encoding="utf-8")
+        print(f"[bench] Baseline written: {baseline_path}", file=sys.stderr)
+        return 0
+    if not baseline_path.exists():
+        print(f"[bench] No baseline at {baseline_path}; run with --update-baseline to store one", file=sys.stderr)
+        return 0
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    regressions = compare(report, baseline, args.tolerance)
+    if not regressions:
+        print(f"[bench] No regressions against {baseline_path} (tolerance {args.tolerance:.0%})", file=sys.stderr)
+        return 0
+    print(f"[bench] {len(regressions)} regression(s) against {baseline_path}:", file=sys.stderr)
+    for key, old, new, change in regressions:
+        print(f"  {key}: {old:.4g} -> {new:.4g} ({change:+.1%})", file=sys.stderr)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+CPU cost of the legacy WrapView acquisition control loop.
+
+WrapView itself needs Qt and the Phidget22 driver, so this reproduces the
+PhidgetMeas.run control loop on the same multiprocessing queues: the old
+version spun on qcontrol.empty(), the current one blocks in qcontrol.get()
+with a timeout. A feeder sends one GetMeasurement per interval, as the GUI
+timer does, and the CPU time of the loop thread is reported for each.
+
+Usage:
+    python scripts/legacy_loop_cpu.py
+    python scripts/legacy_loop_cpu.py --seconds 10 --interval 0.2
+"""
+import argparse
+import queue
+import threading
+import time
+from multiprocessing import Queue
+
+CONTROL_TIMEOUT = 1.0
+NUM_MEAS_IDS = 12
+
+
+def _reply(qdata):
+    if not qdata.full():
+        for idx in range(NUM_MEAS_IDS):
+            qdata.put((idx, 0.0))
+
+
+def spin_loop(qcontrol, qdata, stop):
+    while not stop.is_set():
+        while not qcontrol.empty():
+            item = qcontrol.get()
+            if item[0] == 'GetMeasurement':
+                _reply(qdata)
+
+
+def blocking_loop(qcontrol, qdata, stop):
+    while not stop.is_set():
+        try:
+            item = qcontrol.get(timeout=CONTROL_TIMEOUT)
+        except queue.Empty:
+            continue
+        if item[0] == 'Stop':
+            break
+        if item[0] == 'GetMeasurement':
+            _reply(qdata)
+
+
+def measure(loop, seconds, interval):
+    qcontrol = Queue()
+    qdata = Queue()
+    stop = threading.Event()
+    result = {}
+
+    def worker():
+        start = time.thread_time()
+        loop(qcontrol, qdata, stop)
+        result["cpu"] = time.thread_time() - start
+
+    thread = threading.Thread(target=worker)
+    started = time.perf_counter()
+    thread.start()
+    replies = 0
+    while time.perf_counter() - started < seconds:
+        qcontrol.put(("GetMeasurement", True))
+        time.sleep(interval)
+        while True:
+            try:
+                qdata.get_nowait()
+            except queue.Empty:
+                break
+            replies += 1
+    stop.set()
+    qcontrol.put(("Stop", True))
+    thread.join()
+    wall = time.perf_counter() - started
+    return {"cpuPercent": 100.0 * result["cpu"] / wall, "cpuSeconds": result["cpu"], "replies": replies}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Legacy WrapView control loop CPU usage")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duration per variant")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between GetMeasurement requests")
+    args = parser.parse_args()
+    for name, loop in (("busy-spin", spin_loop), ("blocking get", blocking_loop)):
+        stats = measure(loop, args.seconds, args.interval)
+        print(f"{name:<14} cpu {stats['cpuPercent']:6.1f}%  ({stats['cpuSeconds']:.3f} s, {stats['replies']} values)")
+
+
+if __name__ == "__main__":
+    main()
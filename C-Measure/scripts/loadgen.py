@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+Multi-client load generator for the C-Measure HTTP API.
+
+Spins up N simulated UI clients that reproduce the polling mix of
+frontend/app.js (status long poll, measurements every 1 s, connect polling
+and report fetches) and reports throughput, latency percentiles, error rates
+and the handler thread count and memory of the server process.
+
+Usage:
+    python scripts/loadgen.py --spawn --clients 1 5 10 20 --duration 30
+    python scripts/loadgen.py --url http://127.0.0.1:8123 --clients 8
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+STATUS_WAIT = 20.0
+MEASUREMENT_INTERVAL = 1.0
+CONNECT_TIMEOUT = 40.0
+
+
+def _percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[rank]
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+
+    def add(self, route, elapsed, ok):
+        with self.lock:
+            if ok:
+                self.latencies.setdefault(route, []).append(elapsed)
+            else:
+                self.errors[route] = self.errors.get(route, 0) + 1
+                self.latencies.setdefault(route, [])
+
+    def summary(self, elapsed):
+        with self.lock:
+            routes = sorted(set(self.latencies) | set(self.errors))
+            result = {}
+            total_ok = 0
+            total_errors = 0
+            for route in routes:
+                samples = [value * 1000 for value in self.latencies.get(route, [])]
+                errors = self.errors.get(route, 0)
+                count = len(samples) + errors
+                total_ok += len(samples)
+                total_errors += errors
+                result[route] = {
+                    "requests": count,
+                    "requestsPerSec": count / elapsed if elapsed else 0.0,
+                    "errorRate": errors / count if count else 0.0,
+                    "p50Ms": _percentile(samples, 50),
+                    "p90Ms": _percentile(samples, 90),
+                    "p99Ms": _percentile(samples, 99),
+                    "maxMs": max(samples) if samples else 0.0,
+                }
+            total = total_ok + total_errors
+            result["total"] = {
+                "requests": total,
+                "requestsPerSec": total / elapsed if elapsed else 0.0,
+                "errorRate": total_errors / total if total else 0.0,
+            }
+            return result
+
+
+class SimulatedClient(threading.Thread):
+    """One UI instance polling the backend like frontend/app.js does."""
+
+    def __init__(self, host, port, recorder, stop, report_interval, connect_interval, timeout):
+        super().__init__(daemon=True)
+        self.host = host
+        self.port = port
+        self.recorder = recorder
+        self.stop = stop
+        self.report_interval = report_interval
+        self.connect_interval = connect_interval
+        self.timeout = timeout
+        self.files = []
+
+    def request(self, method, route, payload=None, label=None, timeout=None):
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        start = time.perf_counter()
+        ok = False
+        data = None
+        try:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=timeout or self.timeout)
+            conn.request(method, route, body=body, headers=headers)
+            response = conn.getresponse()
+            raw = response.read()
+            conn.close()
+            ok = response.status == 200
+            if ok and raw:
+                data = json.loads(raw.decode("utf-8"))
+        except (OSError, ValueError):
+            ok = False
+        self.recorder.add(label or f"{method} {route}", time.perf_counter() - start, ok)
+        return data
+
+    def fetch_reports(self):
+        data = self.request("GET", "/api/tests")
+        if data:
+            self.files = data.get("files") or []
+        if not self.files:
+            return
+        file_a = random.choice(self.files)
+        file_b = random.choice(self.files)
+        self.request("POST", "/api/reports/single", {"file": file_a})
+        self.request("POST", "/api/reports/compare", {"fileA": file_a, "fileB": file_b})
+
+    def wait_status(self, version, wait, label):
+        """One /api/status long poll; the backend answers when the status version moves past `version`."""
+        route = "/api/status" if version is None else f"/api/status?since={version}&wait={wait:g}"
+        return self.request("GET", route, label=label, timeout=self.timeout + wait)
+
+    def status_loop(self):
+        version = None
+        while not self.stop.is_set():
+            status = self.wait_status(version, STATUS_WAIT, "GET /api/status (long poll)")
+            if status is None:
+                if self.stop.wait(2.0):
+                    return
+                continue
+            version = status.get("version")
+
+    def connect_and_poll(self):
+        self.request("POST", "/api/connect")
+        deadline = time.monotonic() + CONNECT_TIMEOUT
+        version = None
+        while not self.stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            status = self.wait_status(version, min(STATUS_WAIT, remaining), "GET /api/status (connect poll)")
+            if status is None:
+                if self.stop.wait(1.0):
+                    return
+                continue
+            if not any(s == "Connecting" for s in status.get("statuses") or []):
+                return
+            version = status.get("version")
+
+    def run(self):
+        threading.Thread(target=self.status_loop, daemon=True).start()
+        now = time.monotonic()
+        # Spread clients out the way independently opened windows would be.
+        due = {
+            "measurements": now + random.uniform(0, MEASUREMENT_INTERVAL),
+            "reports": now + random.uniform(0, self.report_interval),
+            "connect": now + random.uniform(0, self.connect_interval),
+        }
+        while not self.stop.is_set():
+            task = min(due, key=due.get)
+            wait = due[task] - time.monotonic()
+            if wait > 0 and self.stop.wait(wait):
+                return
+            if task == "measurements":
+                self.request("GET", "/api/measurements")
+                due[task] += MEASUREMENT_INTERVAL
+            elif task == "reports":
+                self.fetch_reports()
+                due[task] += self.report_interval
+            elif task == "connect":
+                self.connect_and_poll()
+                due[task] = time.monotonic() + self.connect_interval
+            # Skip ticks that were missed instead of bursting to catch up.
+            now = time.monotonic()
+            for key in due:
+                if due[key] < now - 1.0:
+                    due[key] = now
+
+
+class RuntimeSampler(threading.Thread):
+    """Polls /api/system/runtime for thread count and memory of the server."""
+
+    def __init__(self, host, port, stop, interval=1.0):
+        super().__init__(daemon=True)
+        self.host = host
+        self.port = port
+        self.stop = stop
+        self.interval = interval
+        self.samples = []
+
+    def run(self):
+        while not self.stop.is_set():
+            try:
+                conn = http.client.HTTPConnection(self.host, self.port, timeout=2)
+                conn.request("GET", "/api/system/runtime")
+                response = conn.getresponse()
+                raw = response.read()
+                conn.close()
+                if response.status == 200:
+                    self.samples.append(json.loads(raw.decode("utf-8")))
+            except (OSError, ValueError):
+                pass
+            self.stop.wait(self.interval)
+
+    def summary(self):
+        threads = [s.get("threads") for s in self.samples if s.get("threads") is not None]
+        memory = [s.get("memoryBytes") for s in self.samples if s.get("memoryBytes") is not None]
+        return {
+            "samples": len(self.samples),
+            "threadsMax": max(threads) if threads else None,
+            "threadsMean": sum(threads) / len(threads) if threads else None,
+            "memoryStartMb": memory[0] / 1e6 if memory else None,
+            "memoryEndMb": memory[-1] / 1e6 if memory else None,
+            "memoryMaxMb": max(memory) / 1e6 if memory else None,
+        }
+
+
+def run_stage(host, port, clients, duration, report_interval, connect_interval, timeout):
+    recorder = Recorder()
+    stop = threading.Event()
+    sampler = RuntimeSampler(host, port, stop)
+    workers = [
+        SimulatedClient(host, port, recorder, stop, report_interval, connect_interval, timeout)
+        for _ in range(clients)
+    ]
+    start = time.perf_counter()
+    sampler.start()
+    for worker in workers:
+        worker.start()
+    try:
+        stop.wait(duration)
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.join(timeout=timeout + 1)
+        sampler.join(timeout=3)
+    elapsed = time.perf_counter() - start
+    return {
+        "clients": clients,
+        "durationSec": elapsed,
+        "routes": recorder.summary(elapsed),
+        "server": sampler.summary(),
+    }
+
+
+def _wait_for_health(host, port, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=1)
+            conn.request("GET", "/api/health")
+            response = conn.getresponse()
+            response.read()
+            conn.close()
+            if response.status == 200:
+                return True
+        except OSError:
+            pass
+        time.sleep(0.1)
+    return False
+
+
+def spawn_backend(port, data_dir, seed_tests):
+    env = dict(os.environ)
+    env["CMEASURE_PORT"] = str(port)
+    env["CMEASURE_DATA_DIR"] = str(data_dir)
+    env["CMEASURE_SIMULATE"] = "1"
+    process = subprocess.Popen(
+        [sys.executable, str(BACKEND_DIR / "server.py")],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    if not _wait_for_health("127.0.0.1", port):
+        process.terminate()
+        raise RuntimeError("Spawned backend did not answer /api/health")
+    for idx in range(seed_tests):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        body = json.dumps({"name": f"loadgen_{idx}"}).encode("utf-8")
+        conn.request("POST", "/api/measurements", body=body, headers={"Content-Type": "application/json"})
+        conn.getresponse().read()
+        conn.close()
+    return process
+
+
+def print_stage(stage):
+    server = stage["server"]
+    total = stage["routes"]["total"]
+    print(f"\n=== {stage['clients']} client(s), {stage['durationSec']:.1f}s ===")
+    print(f"{'route':<42}{'req':>7}{'req/s':>9}{'err%':>7}{'p50ms':>9}{'p90ms':>9}{'p99ms':>9}{'maxms':>9}")
+    for route, item in stage["routes"].items():
+        if route == "total":
+            continue
+        print(
+            f"{route:<42}{item['requests']:>7}{item['requestsPerSec']:>9.1f}{item['errorRate'] * 100:>7.1f}"
+            f"{item['p50Ms']:>9.1f}{item['p90Ms']:>9.1f}{item['p99Ms']:>9.1f}{item['maxMs']:>9.1f}"
+        )
+    print(f"{'total':<42}{total['requests']:>7}{total['requestsPerSec']:>9.1f}{total['errorRate'] * 100:>7.1f}")
+
+    def fmt(value, spec):
+        return "-" if value is None else format(value, spec)
+
+    print(
+        f"server threads max {fmt(server['threadsMax'], 'd')} "
+        f"(mean {fmt(server['threadsMean'], '.1f')}), "
+        f"memory {fmt(server['memoryStartMb'], '.1f')} -> {fmt(server['memoryEndMb'], '.1f')} MB "
+        f"(max {fmt(server['memoryMaxMb'], '.1f')})"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="C-Measure HTTP API load generator")
+    parser.add_argument("--url", default="http://127.0.0.1:8123", help="Backend base URL")
+    parser.add_argument("--spawn", action="store_true",
+                        help="Start a simulated backend (temporary data dir) instead of using --url")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 5, 10],
+                        help="Client counts; each value runs as one stage")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per stage")
+    parser.add_argument("--report-interval", type=float, default=30.0, help="Seconds between report fetches")
+    parser.add_argument("--connect-interval", type=float, default=120.0, help="Seconds between connect clicks")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Per-request timeout in seconds")
+    parser.add_argument("--json", help="Write the results as JSON to this path")
+    args = parser.parse_args()
+
+    process = None
+    tmp = None
+    if args.spawn:
+        tmp = tempfile.TemporaryDirectory(prefix="cmeasure-loadgen-")
+        host = "127.0.0.1"
+        port = int(urlparse(args.url).port or 8123)
+        process = spawn_backend(port, Path(tmp.name) / "data", seed_tests=5)
+        print(f"[loadgen] Spawned simulated backend pid {process.pid} on port {port}", file=sys.stderr)
+    else:
+        parsed = urlparse(args.url)
+        host = parsed.hostname or "127.0.0.1"
+        port = int(parsed.port or 80)
+        if not _wait_for_health(host, port, timeout=3):
+            print(f"[loadgen] Backend not reachable at {args.url}", file=sys.stderr)
+            return 1
+
+    stages = []
+    try:
+        for clients in args.clients:
+            stage = run_stage(host, port, clients, args.duration, args.report_interval,
+                              args.connect_interval, args.timeout)
+            stages.append(stage)
+            print_stage(stage)
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if tmp is not None:
+            tmp.cleanup()
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({"stages": stages}, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Compression ratio and throughput of the session file formats.
+
+Writes the same synthetic recording (simulator-like load curves plus sensor
+noise, float32 per cell at a fixed frame rate) as a raw session and as block
+sessions with each compressor, then reports file size, write rate, a full
+sequential read and random one-second window reads.
+
+Usage:
+    python scripts/session_compression.py
+    python scripts/session_compression.py --frames 500000 --cells 12 --rate 500
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from history import downsample_session  # noqa: E402
+from sessions import BlockSessionWriter, SessionWriter, open_session_reader  # noqa: E402
+
+
+def synthetic_frames(frames, cells, rate, noise):
+    rng = random.Random(1)
+    start = 1700000000.0
+    for i in range(frames):
+        t = start + i / rate
+        phase = t * 0.2
+        yield t, [
+            max((math.sin(phase + cell * 0.4) + 1.5) * 8 + cell * 0.2 + rng.gauss(0.0, noise), 0.0)
+            for cell in range(cells)
+        ]
+
+
+def measure(name, make_writer, data, cells, rate, windows, directory):
+    path = Path(directory) / f"{name}.cms"
+    writer = make_writer(path, cells)
+    started = time.perf_counter()
+    for timestamp, values in data:
+        writer.append(timestamp, values)
+    writer.close()
+    write_seconds = time.perf_counter() - started
+    size = os.path.getsize(path)
+
+    with open_session_reader(path) as reader:
+        started = time.perf_counter()
+        for index in range(0, reader.frames, 8192):
+            reader.read(index, index + 8192)
+        read_seconds = time.perf_counter() - started
+        rng = random.Random(2)
+        start_time, end_time = reader.start_time, reader.end_time
+        started = time.perf_counter()
+        for _ in range(windows):
+            t = rng.uniform(start_time, end_time - 1.0)
+            reader.read_range(t, t + 1.0)
+        window_seconds = (time.perf_counter() - started) / windows
+        started = time.perf_counter()
+        downsample_session(reader, list(range(cells)), start_time, end_time, 1000)
+        plot_seconds = time.perf_counter() - started
+    path.unlink()
+    return {
+        "size": size,
+        "write": len(data) / write_seconds,
+        "read": len(data) / read_seconds,
+        "window": window_seconds,
+        "plot": plot_seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Session file compression benchmark")
+    parser.add_argument("--frames", type=int, default=200000)
+    parser.add_argument("--cells", type=int, default=12)
+    parser.add_argument("--rate", type=float, default=500.0, help="Frames per second of the synthetic recording")
+    parser.add_argument("--noise", type=float, default=0.02, help="Sensor noise (N, standard deviation)")
+    parser.add_argument("--windows", type=int, default=200, help="Random 1 s window reads")
+    args = parser.parse_args()
+
+    data = list(synthetic_frames(args.frames, args.cells, args.rate, args.noise))
+    variants = [
+        ("raw", lambda path, cells: SessionWriter(path, cells)),
+        ("zlib-1", lambda path, cells: BlockSessionWriter(path, cells, compression="zlib", level=1)),
+        ("zlib-6", lambda path, cells: BlockSessionWriter(path, cells, compression="zlib", level=6)),
+        ("lzma-6", lambda path, cells: BlockSessionWriter(path, cells, compression="lzma", level=6)),
+    ]
+    print(f"{args.frames} frames x {args.cells} cells at {args.rate:g} Hz, noise {args.noise} N")
+    print(f"{'format':<8} {'size MB':>8} {'ratio':>6} {'write f/s':>10} {'read f/s':>10} {'1 s window':>11} {'plot':>8}")
+    raw_size = None
+    with tempfile.TemporaryDirectory() as directory:
+        for name, make_writer in variants:
+            result = measure(name, make_writer, data, args.cells, args.rate, args.windows, directory)
+            raw_size = raw_size or result["size"]
+            print(
+                f"{name:<8} {result['size'] / 1e6:8.2f} {raw_size / result['size']:6.2f} "
+                f"{result['write']:10.0f} {result['read']:10.0f} "
+                f"{result['window'] * 1000:9.2f}ms {result['plot'] * 1000:6.0f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()